@@ -22,16 +22,9 @@ class Branch(object):
 		self._start_state = StateObject
 
 	def _build_states(self):
-		def add(new_states, state_list):
-			for state in new_states:
-				if state and state not in state_list:
-					state_list.append(state)
-					add(state.get_child_states(), state_list)
-
-		states = []
-		if self.get_start_state():
-			add(self.get_start_state().get_child_states(), states)
-		return states
+		if not self.get_start_state():
+			return []
+		return self.get_start_state().get_child_states()
 
 	def to_json(self):
 		j = {
@@ -1,3 +1,21 @@
+import operator
+from .reference_path import compile_reference_path, parse_timestamp
+
+try:
+	_STRING_TYPES = (basestring,)
+	_NUMERIC_TYPES = (int, long, float)
+except NameError:
+	_STRING_TYPES = (str,)
+	_NUMERIC_TYPES = (int, float)
+
+_OPERATORS = {
+	"Equals": operator.eq,
+	"LessThan": operator.lt,
+	"GreaterThan": operator.gt,
+	"LessThanEquals": operator.le,
+	"GreaterThanEquals": operator.ge
+}
+
 class Comparison(object):
 	"""
 	Defines the available set of Comparisons which returns True or False 
@@ -84,3 +102,46 @@ class Comparison(object):
 			Variable=self.get_variable(),
 			Comparator=self.get_comparator(),
 			Value=self.get_value())
+
+	def compile(self):
+		"""
+		Returns a predicate that evaluates this Comparison against an input document.
+
+		The ``Variable`` lookup is resolved once, and ``Timestamp`` values are parsed once, so that each evaluation
+		costs little more than the comparison itself.  As per the ASL specification, the predicate returns ``False``
+		if the value found at ``Variable`` is not of the type expected by the ``Comparator``.
+
+		:returns: function -- Accepts the input document and returns ``bool``
+		"""
+		self.validate()
+		get_variable = compile_reference_path(self.get_variable())
+		comparator_type = self._comparator_type
+		op = _OPERATORS[self.get_comparator()[len(comparator_type):]]
+		value = self.get_value()
+
+		if comparator_type == "String":
+			def compare_string(document):
+				v = get_variable(document)
+				return isinstance(v, _STRING_TYPES) and op(v, value)
+			return compare_string
+
+		if comparator_type == "Numeric":
+			def compare_numeric(document):
+				v = get_variable(document)
+				return isinstance(v, _NUMERIC_TYPES) and not isinstance(v, bool) and op(v, value)
+			return compare_numeric
+
+		if comparator_type == "Boolean":
+			def compare_boolean(document):
+				v = get_variable(document)
+				return isinstance(v, bool) and v == value
+			return compare_boolean
+
+		timestamp = parse_timestamp(value)
+		if timestamp is None:
+			raise Exception("Invalid Timestamp Value provided for ChoiceRule (Comparator: {}, Value: {})".format(self.get_comparator(), value))
+
+		def compare_timestamp(document):
+			v = parse_timestamp(get_variable(document))
+			return v is not None and op(v, timestamp)
+		return compare_timestamp
@@ -1,6 +1,9 @@
-from .for_state import For, set_ext_arns, get_ext_arn, get_ext_arn_keys
+from .for_state import For, set_ext_arns, get_ext_arn, get_ext_arn_keys, get_ext_parameters
 from .limited_parallel_state import LimitedParallel
+from .rate_limited_parallel_state import RateLimitedParallel
+from .branched_parallel_state import BranchedParallel
 from .branch_retry_parallel import BranchRetryParallel
 from .task_with_finally import TaskWithFinally
 from .parallel_with_finally import ParallelWithFinally 
+from .hedged_task import HedgedTask
 
@@ -1,5 +1,6 @@
 from ..pass_state import Pass 
 from ..parallel_state import Parallel
+from ..task_state import Task
 from .parallel_with_finally import ParallelWithFinally
 from ..state_base import StateBase
 from ..retrier import Retrier
@@ -15,6 +16,10 @@ class BranchRetryParallel(ParallelWithFinally):
 
 	Output is returned as a ``list`` of the outputs from each branch, as with ``ParallelWithFinally``.
 
+	Each branch is retried by wrapping it in its own ``Parallel``, other than branches that do not need one: a ``Pass`` 
+	state that cannot fail is not wrapped, and the retries of a branch that is a single ``Task`` or ``Parallel`` (without 
+	its own ``Retrier`` or ``Catcher``) are declared on that state directly.
+
 	:param Name: [Required] The name of the state within the branch of the state machine
 	:type Name: str
 	:param Comment: [Optional] A comment describing the intent of this pass state
@@ -87,10 +92,31 @@ class BranchRetryParallel(ParallelWithFinally):
 		self.set_branch_retry_list(BranchRetryList)
 
 	def _get_underlying_state_no_retry_catch(self, state_name):
+		def cannot_fail(b):
+			# A Pass state that returns its input or a Result in its entirety has no failure to retry
+			return type(b) is Pass and not b.get_next_state() and b.get_input_path() == "$" and \
+				b.get_output_path() == "$" and b.get_result_path() == "$"
+
+		def accepts_retriers(b):
+			# A branch that is a single Task or Parallel is retried identically by its own Retriers,
+			# provided it has none already, and no Catchers that would handle an error first
+			return type(b) in (Task, Parallel) and not b.get_next_state() and \
+				not b.get_retry_list() and not b.get_catcher_list()
+
 		branch_list = []
 		if self.get_branch_retry_list() and len(self.get_branch_retry_list()) > 0:
-			# Wrap each branch in its own retrying Parallel		
+			# Wrap each branch in its own retrying Parallel, unless the branch can be retried without one
 			for b in self.get_branch_list():
+				if cannot_fail(b):
+					branch_list.append(b)
+					continue
+
+				if accepts_retriers(b):
+					retrying_state = b.clone()
+					retrying_state.set_retry_list(RetryList=self.get_branch_retry_list())
+					branch_list.append(retrying_state)
+					continue
+
 				final_state = Pass(
 					Name="{}-Finalizer-{}".format(self.get_name(), b.get_name()),
 					Comment="Unpacking of Parallel results from executing '{}'".format(b.get_name()),
@@ -213,9 +239,9 @@ class BranchRetryParallel(ParallelWithFinally):
 			c.set_branch_retry_list(BranchRetryList=[ r.clone() for r in self.get_branch_retry_list() ])
 
 		if self.get_next_state():
-			c.set_next_state(NextState=self.get_next_state.clone(NameFormatString))	
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
-		if self.get_finally_state():
-			c.set_finally_state(FinallyState=self.get_finally_state().clone(NameFormatString))
+		if self.get_finally_branch():
+			c.set_finally_branch(FinallyState=self.get_finally_branch().clone(NameFormatString))
 
 		return c
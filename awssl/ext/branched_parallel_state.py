@@ -0,0 +1,438 @@
+from ..pass_state import Pass
+from ..task_state import Task
+from ..parallel_state import Parallel
+from ..retrier import Retrier
+from ..state_retry_catch import StateRetryCatch
+
+class BranchedParallel(StateRetryCatch):
+	"""
+	Branched Parallel executes a separate state machine (the branch) as a number of child executions, and waits for them as a group.
+
+	The child executions are launched through the BranchActivity deployed by the awssl CloudFormation script, whose Lambda functions
+	start each execution and complete the corresponding ``Task`` with the output of the execution once it has finished.  Each child
+	execution has its own execution history and payload limits, so very large numbers of iterations can be sharded across child
+	executions, rather than unrolled into a single state machine.
+
+	The ``Iterations`` are divided into shards of ``ShardSize``, and one child execution is started per shard.  Each child execution receives
+	the Input, with the details of its shard injected at ``IteratorPath``::
+
+		{ "Shard": k, "From": k * ShardSize, "To": min((k + 1) * ShardSize, Iterations) }
+
+	so that the branch can process the iterations in the range [``From``, ``To``).
+
+	Branch executions have optional ``Retrier`` lists, which allow individual child executions to be retried.  In addition, the state also
+	supports retries and catches, but this will result in all the child executions being re-executed.
+
+	Either:
+
+	* ``EndState`` is ``True`` and ``NextState`` must be ``None``
+	* ``EndState`` is ``False`` and ``NextState`` must be a valid instance of a class derived from ``StateBase``.
+
+	Output is returned as a ``list`` of the outputs from each child execution.
+
+	:param Name: [Required] The name of the state within the branch of the state machine
+	:type Name: str
+	:param Comment: [Optional] A comment describing the intent of this pass state
+	:type Comment: str
+	:param InputPath: [Optional] Filter on the Input information to be passed to the Pass state.  Default is "$", signifying that all the Input information will be provided
+	:type InputPath: str
+	:param OutputPath: [Optional] Filter on the Output information to be returned from the Pass state.  Default is "$", signifying that all the result information will be provided
+	:type OutputPath: str
+	:param EndState: [Optional] Flag indicating if this state terminates a branch of the state machine.  Defaults to ``False``
+	:type EndState: bool
+	:param NextState: [Optional] Next state to be invoked within this branch.  Must not be ``None`` unless ``EndState`` is ``True``
+	:type NextState: instance of class derived from ``StateBase``
+	:param ResultPath: [Optional] JSONPath indicating where results should be added to the Input.  Defaults to "$", indicating results replace the Input entirely.
+	:type ResultPath: str
+	:param RetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause all the child executions to be retried
+	:type: RetryList: list of ``Retrier``
+	:param CatcherList: [Optional] ``list`` of ``Catcher`` instances corresponding to error states that can be caught and handled by further states being executed in the ``StateMachine``.
+	:type: CatcherList: list of ``Catcher``
+	:param ActivityArn: [Required] The Arn of the BranchActivity, through which the child executions are launched
+	:type: ActivityArn: str
+	:param BranchArn: [Required] The Arn of the state machine to be executed by each child execution
+	:type: BranchArn: str
+	:param BranchRetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause a child execution to be retried
+	:type BranchRetryList: list of ``Retrier``
+	:param: Iterations: [Required] The total number of iterations to be processed by the child executions.  Must be larger than zero
+	:type: Iterations: int
+	:param: ShardSize: [Optional] The number of iterations processed by each child execution.  Must be larger than zero.  Default is 1
+	:type: ShardSize: int
+	:param: IteratorPath: [Required] The JSONPath in which to inject the shard details into the Input passed to each child execution
+	:type: IteratorPath: str
+	:param: TimeoutSeconds: [Optional] The number of seconds in which each child execution should complete
+	:type: TimeoutSeconds: int
+	:param: HeartbeatSeconds: [Optional] The number of seconds between the heartbeats sent while each child execution is running.  Default is 300, so that a lost child execution fails the Task promptly
+	:type: HeartbeatSeconds: int
+
+	"""
+
+	def __init__(self, Name=None, Comment="", InputPath="$", OutputPath="$", NextState=None, EndState=None,
+					ResultPath="$", RetryList=None, CatcherList=None,
+					ActivityArn=None, BranchArn=None, BranchRetryList=None,
+					Iterations=0, ShardSize=1, IteratorPath="$.iteration",
+					TimeoutSeconds=99999999, HeartbeatSeconds=300):
+		"""
+		Initializer Branched Parallel executes a separate state machine as a number of child executions, and waits for them as a group.
+
+		:param Name: [Required] The name of the state within the branch of the state machine
+		:type Name: str
+		:param Comment: [Optional] A comment describing the intent of this pass state
+		:type Comment: str
+		:param InputPath: [Optional] Filter on the Input information to be passed to the Pass state.  Default is "$", signifying that all the Input information will be provided
+		:type InputPath: str
+		:param OutputPath: [Optional] Filter on the Output information to be returned from the Pass state.  Default is "$", signifying that all the result information will be provided
+		:type OutputPath: str
+		:param EndState: [Optional] Flag indicating if this state terminates a branch of the state machine.  Defaults to ``False``
+		:type EndState: bool
+		:param NextState: [Optional] Next state to be invoked within this branch.  Must not be ``None`` unless ``EndState`` is ``True``
+		:type NextState: instance of class derived from ``StateBase``
+		:param ResultPath: [Optional] JSONPath indicating where results should be added to the Input.  Defaults to "$", indicating results replace the Input entirely.
+		:type ResultPath: str
+		:param RetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause all the child executions to be retried
+		:type: RetryList: list of ``Retrier``
+		:param CatcherList: [Optional] ``list`` of ``Catcher`` instances corresponding to error states that can be caught and handled by further states being executed in the ``StateMachine``.
+		:type: CatcherList: list of ``Catcher``
+		:param ActivityArn: [Required] The Arn of the BranchActivity, through which the child executions are launched
+		:type: ActivityArn: str
+		:param BranchArn: [Required] The Arn of the state machine to be executed by each child execution
+		:type: BranchArn: str
+		:param BranchRetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause a child execution to be retried
+		:type BranchRetryList: list of ``Retrier``
+		:param: Iterations: [Required] The total number of iterations to be processed by the child executions.  Must be larger than zero
+		:type: Iterations: int
+		:param: ShardSize: [Optional] The number of iterations processed by each child execution.  Must be larger than zero.  Default is 1
+		:type: ShardSize: int
+		:param: IteratorPath: [Required] The JSONPath in which to inject the shard details into the Input passed to each child execution
+		:type: IteratorPath: str
+		:param: TimeoutSeconds: [Optional] The number of seconds in which each child execution should complete
+		:type: TimeoutSeconds: int
+		:param: HeartbeatSeconds: [Optional] The number of seconds between the heartbeats sent while each child execution is running.  Default is 300, so that a lost child execution fails the Task promptly
+		:type: HeartbeatSeconds: int
+
+		"""
+		super(BranchedParallel, self).__init__(Name=Name, Type="Ext", Comment=Comment,
+			InputPath=InputPath, OutputPath=OutputPath, NextState=NextState, EndState=EndState,
+			ResultPath=ResultPath, RetryList=RetryList, CatcherList=CatcherList)
+		self._activity_arn = None
+		self._branch_arn = None
+		self._bp_branch_retry_list = None
+		self._iterations = 0
+		self._shard_size = 1
+		self._iterator_path = None
+		self._timeout_seconds = None
+		self._heartbeat_seconds = None
+		self.set_activity_arn(ActivityArn)
+		self.set_branch_arn(BranchArn)
+		self.set_branch_retry_list(BranchRetryList)
+		self.set_iterations(Iterations)
+		self.set_shard_size(ShardSize)
+		self.set_iterator_path(IteratorPath)
+		self.set_timeout_seconds(TimeoutSeconds)
+		self.set_heartbeat_seconds(HeartbeatSeconds)
+
+	def get_shards(self):
+		"""
+		Returns the shard details injected into the Input of each child execution.
+
+		:returns: ``list`` of dict -- The shard details, in the order of the child executions
+		"""
+		size = self.get_shard_size()
+		return [ { "Shard": k, "From": start, "To": min(start + size, self.get_iterations()) }
+					for (k, start) in enumerate(range(0, self.get_iterations(), size)) ]
+
+	def _bp_build(self):
+		"""
+		Declares a Parallel with a branch per child execution, each completed by the BranchActivity
+		"""
+		parameters = {
+			"BranchArn": self.get_branch_arn(),
+			"BranchInput.$": "$"
+		}
+		if self.get_heartbeat_seconds():
+			# Allows the launcher to schedule heartbeats for the child execution
+			parameters["HeartbeatSeconds"] = self.get_heartbeat_seconds()
+
+		branch_list = []
+		for shard in self.get_shards():
+			execution = Task(
+				Name="{}-Execution-{}".format(self.get_name(), shard["Shard"]),
+				ResourceArn=self.get_activity_arn(),
+				TimeoutSeconds=self.get_timeout_seconds(),
+				HeartbeatSeconds=self.get_heartbeat_seconds(),
+				RetryList=self.get_branch_retry_list(),
+				Parameters=dict(parameters),
+				EndState=True)
+
+			branch_list.append(Pass(
+				Name="{}-Shard-{}".format(self.get_name(), shard["Shard"]),
+				ResultAsJSON=shard,
+				ResultPath=self.get_iterator_path(),
+				EndState=False,
+				NextState=execution))
+
+		return Parallel(
+			Name=self.get_name(),
+			Comment=self.get_comment() or "Waits for the child executions of the branch state machine",
+			InputPath=self.get_input_path(),
+			OutputPath=self.get_output_path(),
+			ResultPath=self.get_result_path(),
+			EndState=self.get_end_state(),
+			NextState=self.get_next_state(),
+			BranchList=branch_list,
+			RetryList=self.get_retry_list(),
+			CatcherList=self.get_catcher_list())
+
+	def get_activity_arn(self):
+		"""
+		Returns the Arn of the BranchActivity, through which the child executions are launched
+
+		:returns: str -- The Arn of the BranchActivity
+		"""
+		return self._activity_arn
+
+	def set_activity_arn(self, ActivityArn=None):
+		"""
+		Sets the Arn of the BranchActivity, through which the child executions are launched.  This is the ``BranchActivityArn``
+		output of the awssl CloudFormation script.
+
+		:param ActivityArn: [Required] The Arn of the BranchActivity
+		:type: ActivityArn: str
+		"""
+		if not ActivityArn:
+			raise Exception("ActivityArn must be specified for BranchedParallel state (step '{}')".format(self.get_name()))
+		if not isinstance(ActivityArn, str):
+			raise Exception("ActivityArn must be a string for BranchedParallel state (step '{}')".format(self.get_name()))
+		self._activity_arn = ActivityArn
+
+	def get_branch_arn(self):
+		"""
+		Returns the Arn of the state machine executed by each child execution
+
+		:returns: str -- The Arn of the branch state machine
+		"""
+		return self._branch_arn
+
+	def set_branch_arn(self, BranchArn=None):
+		"""
+		Sets the Arn of the state machine executed by each child execution
+
+		:param BranchArn: [Required] The Arn of the branch state machine
+		:type: BranchArn: str
+		"""
+		if not BranchArn:
+			raise Exception("BranchArn must be specified for BranchedParallel state (step '{}')".format(self.get_name()))
+		if not isinstance(BranchArn, str):
+			raise Exception("BranchArn must be a string for BranchedParallel state (step '{}')".format(self.get_name()))
+		self._branch_arn = BranchArn
+
+	def get_branch_retry_list(self):
+		"""
+		Returns the list of ``Retrier`` instances that will be applied separately to each child execution
+
+		:returns: ``list`` of ``Retrier`` instances
+		"""
+		return self._bp_branch_retry_list
+
+	def set_branch_retry_list(self, BranchRetryList=None):
+		"""
+		Sets the list of ``Retrier`` instance to be applied to each of the child executions in the ``BranchedParallel``.
+
+		If none are specified, then ``BranchedParallel`` will retry at the state level (if ``Retrier`` are specified)
+
+		:param BranchRetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that can be retried for each child execution
+		:type: BranchRetryList: list of ``StateBase``
+
+		"""
+		if not BranchRetryList:
+			self._bp_branch_retry_list = None
+			return
+
+		if not isinstance(BranchRetryList, list):
+			raise Exception("BranchRetryList must contain a list of Retrier instances (step '{}')".format(self.get_name()))
+		if len(BranchRetryList) == 0:
+			raise Exception("BranchRetryList must contain a non-empty list of Retrier instances (step '{}')".format(self.get_name()))
+		for o in BranchRetryList:
+			if not isinstance(o, Retrier):
+				raise Exception("BranchRetryList must contain only instances of Retrier - found '{}' (step '{}')".format(type(o), self.get_name()))
+		self._bp_branch_retry_list = [ r for r in BranchRetryList ]
+
+	def get_iterations(self):
+		"""
+		Returns the total number of iterations processed by the child executions
+
+		:returns: int -- The number of iterations
+		"""
+		return self._iterations
+
+	def set_iterations(self, Iterations=0):
+		"""
+		Sets the total number of iterations processed by the child executions, which must be greater than zero
+
+		:param: Iterations: [Required] The total number of iterations.  Must be larger than zero
+		:type: Iterations: int
+		"""
+		if not isinstance(Iterations, int):
+			raise Exception("Iterations must be an int (step '{}')".format(self.get_name()))
+		if Iterations < 1:
+			raise Exception("Iterations must be greater than zero (step '{}')".format(self.get_name()))
+		self._iterations = Iterations
+
+	def get_shard_size(self):
+		"""
+		Returns the number of iterations processed by each child execution
+
+		:returns: int -- The shard size
+		"""
+		return self._shard_size
+
+	def set_shard_size(self, ShardSize=1):
+		"""
+		Sets the number of iterations processed by each child execution.  The last child execution processes any remainder.  Default is 1.
+
+		:param: ShardSize: [Optional] The shard size.  Must be larger than zero
+		:type: ShardSize: int
+		"""
+		if not isinstance(ShardSize, int):
+			raise Exception("ShardSize must be an int (step '{}')".format(self.get_name()))
+		if ShardSize < 1:
+			raise Exception("ShardSize must be greater than zero (step '{}')".format(self.get_name()))
+		self._shard_size = ShardSize
+
+	def get_iterator_path(self):
+		"""
+		Returns the injection JSONPath to be used to add the shard details into the Input for a child execution
+
+		:returns: str -- The JSONPath for shard injection
+		"""
+		return self._iterator_path
+
+	def set_iterator_path(self, IteratorPath="$.iteration"):
+		"""
+		Sets the injection JSONPath to use to add the shard details into the Input for a child execution
+
+		:param: IteratorPath: [Required] The JSONPath in which to inject the shard details into the Input passed to each child execution
+		:type: IteratorPath: str
+		"""
+		self._iterator_path = IteratorPath
+
+	def get_timeout_seconds(self):
+		"""
+		Returns the timeout seconds for each child execution, afterwhich a ``States.Timeout`` error is raised.
+
+		:returns: int -- The timeout seconds for each child execution.
+		"""
+		return self._timeout_seconds
+
+	def set_timeout_seconds(self, TimeoutSeconds=99999999):
+		"""
+		Sets the timeout seconds for each child execution, afterwhich a ``States.Timeout`` error is raised.
+
+		If specified, must not be less than zero seconds.  Default value is ``99999999``.
+
+		:param: TimeoutSeconds: [Optional] The number of seconds in which each child execution should complete
+		:type: TimeoutSeconds: int
+		"""
+		if TimeoutSeconds:
+			if not isinstance(TimeoutSeconds, int):
+				raise Exception("TimeoutSeconds must be an integer if specified for BranchedParallel (step '{}')".format(self.get_name()))
+			if TimeoutSeconds < 1:
+				raise Exception("TimeoutSeconds must be greater than zero if specified for BranchedParallel (step '{}')".format(self.get_name()))
+		self._timeout_seconds = TimeoutSeconds
+
+	def get_heartbeat_seconds(self):
+		"""
+		Returns the heartbeat interval for each child execution.  If more than two heartbeats are missed then the child execution's
+		``Task`` will fail with a ``States.Timeout`` error.
+
+		:returns: int -- The heartbeat seconds for each child execution.
+		"""
+		return self._heartbeat_seconds
+
+	def set_heartbeat_seconds(self, HeartbeatSeconds=300):
+		"""
+		Sets the heartbeat interval for each child execution.  Heartbeats are sent by the awssl Lambda functions while the child
+		execution is running, so a missed heartbeat indicates those functions have stopped monitoring the child execution.
+
+		If specified, must not be less than zero seconds.  Default value is ``300``: the heartbeats are sent at half this interval,
+		so a child execution that was never launched, or is no longer monitored, fails its ``Task`` within five minutes, rather
+		than only when ``TimeoutSeconds`` expires.
+
+		:param: HeartbeatSeconds: [Optional] The number of seconds between heartbeats
+		:type: HeartbeatSeconds: int
+		"""
+		if HeartbeatSeconds:
+			if not isinstance(HeartbeatSeconds, int):
+				raise Exception("HeartbeatSeconds must be an integer if specified for BranchedParallel (step '{}')".format(self.get_name()))
+			if HeartbeatSeconds < 1:
+				raise Exception("HeartbeatSeconds must be greater than zero if specified for BranchedParallel (step '{}')".format(self.get_name()))
+		self._heartbeat_seconds = HeartbeatSeconds
+
+	def validate(self):
+		"""
+		Validates this instance is correctly specified.
+
+		Raises ``Exception`` with details of the error, if the state is incorrectly defined.
+
+		"""
+		super(BranchedParallel, self).validate()
+		self._bp_build().validate()
+
+	def to_json(self):
+		"""
+		Returns the JSON representation of this instance.
+
+		:returns: dict -- The JSON representation
+
+		"""
+		return self._bp_build().to_json()
+
+	def _get_expanded_state(self):
+		# Here we are building a branch "on the fly", so do not call super()
+		return self._bp_build()
+
+	def clone(self, NameFormatString="{}"):
+		"""
+		Returns a clone of this instance, with the clone named per the NameFormatString, to avoid state name clashes.
+
+		If this instance is not an end state, then the next state will also be cloned, to establish a complete clone
+		of the branch form this instance onwards.
+
+		:param NameFormatString: [Required] The naming template to be applied to generate the name of the new instance.
+		:type NameFormatString: str
+
+		:returns: ``BranchedParallel`` -- A new instance of this instance and any other instances in its branch.
+		"""
+		if not NameFormatString:
+			raise Exception("NameFormatString must not be None (step '{}')".format(self.get_name()))
+		if not isinstance(NameFormatString, str):
+			raise Exception("NameFormatString must be a str (step '{}')".format(self.get_name()))
+
+		c = BranchedParallel(
+			Name=NameFormatString.format(self.get_name()),
+			Comment=self.get_comment(),
+			InputPath=self.get_input_path(),
+			OutputPath=self.get_output_path(),
+			EndState=self.get_end_state(),
+			ResultPath=self.get_result_path(),
+			ActivityArn=self.get_activity_arn(),
+			BranchArn=self.get_branch_arn(),
+			Iterations=self.get_iterations(),
+			ShardSize=self.get_shard_size(),
+			IteratorPath=self.get_iterator_path(),
+			TimeoutSeconds=self.get_timeout_seconds(),
+			HeartbeatSeconds=self.get_heartbeat_seconds())
+
+		if self.get_branch_retry_list():
+			c.set_branch_retry_list(BranchRetryList=[ r.clone() for r in self.get_branch_retry_list() ])
+
+		if self.get_retry_list():
+			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
+
+		if self.get_catcher_list():
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
+
+		if self.get_next_state():
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))
+
+		return c
@@ -1,6 +1,13 @@
 from ..pass_state import Pass 
 from ..task_state import Task 
 from ..parallel_state import Parallel
+from ..wait_state import Wait
+from ..choice_state import Choice
+from ..comparison import Comparison
+from ..choice_rule import ChoiceRule
+from ..not_choice_rule import NotChoiceRule
+from ..and_choice_rule import AndChoiceRule
+from ..or_choice_rule import OrChoiceRule
 from ..state_base import StateBase
 from ..retrier import Retrier
 from .branch_retry_parallel import BranchRetryParallel
@@ -12,16 +19,38 @@ _CONSOLIDATOR = "ForConsolidator"
 _FINALIZER = "ForFinalizer"
 _FINALIZER_PARALLEL_ITERATION = "ForFinalizerParallelIterations"
 _LIMITED_PARALLEL_CONSOLIDATOR = "LimitedParallelConsolidator"
+_DISPATCHER = "Dispatcher"
+_HEDGED_TASK_COMPLETED = "HedgedTaskCompleted"
+_HEDGED_TASK_RESULT = "HedgedTaskResult"
+_CHECKPOINT_INITIALIZER = "ForCheckpointInitializer"
+_CHECKPOINT_CONSOLIDATOR = "ForCheckpointConsolidator"
+_CHECKPOINT_FINALIZER = "ForCheckpointFinalizer"
+_DEFAULT_CHECKPOINT_KEY_PATH = "$$.Execution.Id"
+# The resume Choice has a rule per cycle, so checkpointed loops are limited to keep it (and its evaluation) small
+_MAX_CHECKPOINT_CYCLES = 1000
+_CODECS = [ "zlib" ]
+_ext_codec = {}
 
 def set_ext_arns(ForInitializer=None, ForExtractor=None, ForConsolidator=None, 
 				ForFinalizer=None, ForFinalizerParallelIterations=None,
-				LimitedParallelConsolidator=None):
+				LimitedParallelConsolidator=None, Dispatcher=None, Codec=None,
+				HedgedTaskCompleted=None, HedgedTaskResult=None):
 	"""
 	Initialises the ``awssl.ext`` package, so that the correct Lambda functions are used in the ``ext`` states.
 
 	The functions are available in the github repo both as individual lambdas or combined in a CloudFormation script for easy deployment.
 
-	All the Arns must be specified or this function will generate an Exception.
+	Either all the individual Arns must be specified, or the Arn of the ``Dispatcher`` Lambda function, which performs all the 
+	operations, or this function will generate an Exception.  If ``Dispatcher`` is specified, then every ``ext`` state ``Task`` 
+	invokes it, passing the name of the operation as a parameter, so that warm Lambda containers are shared by all the operations.
+
+	The ``Dispatcher`` can also be asked to compress the iteration results that it passes between states, by specifying ``Codec``.  
+	The results are then held as a zlib compressed, base64 encoded blob until the ``For`` or ``LimitedParallel`` completes, so that 
+	more results fit within the Step Functions payload limit.  The output of the ``ext`` states is unchanged.
+
+	``HedgedTaskCompleted`` and ``HedgedTaskResult`` are only required by the ``HedgedTask`` state, and may be omitted otherwise.
+
+	A ``For`` state with ``Checkpoint`` set requires the ``Dispatcher``, which saves the checkpoints.
 	
 	:param ForInitializer: The Arn of the ForInitializer Lambda function, used by the ``For`` state
 	:type ForInitializer: str
@@ -35,6 +64,14 @@ def set_ext_arns(ForInitializer=None, ForExtractor=None, ForConsolidator=None,
 	:type ForFinalizerParallelIterations: str
 	:param LimitedParallelConsolidator: The Arn of the LimitedParallelConsolidator Lambda function, used by the ``LimitedParallel`` state
 	:type LimitedParallelConsolidator: str
+	:param Dispatcher: The Arn of the ExtDispatcher Lambda function, used in place of all the other functions
+	:type Dispatcher: str
+	:param Codec: [Optional] The compression applied by the ``Dispatcher`` to the iteration results.  Must be ``None`` or "zlib"
+	:type Codec: str
+	:param HedgedTaskCompleted: [Optional] The Arn of the HedgedTaskCompleted Lambda function, used by the ``HedgedTask`` state
+	:type HedgedTaskCompleted: str
+	:param HedgedTaskResult: [Optional] The Arn of the HedgedTaskResult Lambda function, used by the ``HedgedTask`` state
+	:type HedgedTaskResult: str
 
 	"""
 	def apply_arg(val, val_name):
@@ -42,27 +79,96 @@ def set_ext_arns(ForInitializer=None, ForExtractor=None, ForConsolidator=None,
 			raise Exception("set_ext_arns: {} must not be None".format(val_name))
 		if not isinstance(val, str):
 			raise Exception("set_ext_arns: {} must be a str".format(val_name))
-		_ext_arns[val_name] = val
+		arns[val_name] = val
+
+	if Codec is not None:
+		if Codec not in _CODECS:
+			raise Exception("set_ext_arns: Codec must be one of {}".format(_CODECS))
+		if Dispatcher is None:
+			raise Exception("set_ext_arns: Codec requires the Dispatcher")
+
+	arns = {}
+	if Dispatcher is not None:
+		apply_arg(Dispatcher, _DISPATCHER)
 
 	for v, n in [(ForInitializer, _INITIALIZER), (ForExtractor, _EXTRACTOR), 
 				(ForConsolidator, _CONSOLIDATOR), (ForFinalizer, _FINALIZER), 
 				(ForFinalizerParallelIterations, _FINALIZER_PARALLEL_ITERATION),
 				(LimitedParallelConsolidator, _LIMITED_PARALLEL_CONSOLIDATOR) ]:
-		apply_arg(v, n)
+		if v is not None or Dispatcher is None:
+			apply_arg(v, n)
+
+	for v, n in [(HedgedTaskCompleted, _HEDGED_TASK_COMPLETED), (HedgedTaskResult, _HEDGED_TASK_RESULT) ]:
+		if v is not None:
+			apply_arg(v, n)
+
+	_ext_arns.clear()
+	_ext_arns.update(arns)
+	_ext_codec.clear()
+	if Codec is not None:
+		_ext_codec["Codec"] = Codec
 
 def get_ext_arn(key):
 	"""
 	Returns the value of the Arn associated with the specified key.
 
+	If the ``Dispatcher`` has been specified, then its Arn is returned for all the keys.
+
 	:param key: The key of the Lambda function whose Arn is required
 	:type key: str
 	:returns: str
 	"""
-	arn = _ext_arns.get(key, "")
+	arn = _ext_arns.get(_DISPATCHER, "") or _ext_arns.get(key, "")
 	if not arn:
 		raise Exception("get_ext_arn: Invalid key ({})".format(key))
 	return arn
 
+def get_ext_parameters(key, Encode=True):
+	"""
+	Returns the ``Parameters`` to be passed by a ``Task`` invoking the Lambda function associated with the specified key.
+	This is ``None`` unless the ``Dispatcher`` has been specified, when the Input is passed together with the name of the operation, 
+	and the ``Codec`` to be applied to its results if one has been specified.
+
+	:param key: The key of the Lambda function being invoked
+	:type key: str
+	:param Encode: [Optional] Whether the results should be encoded with the ``Codec``.  Default is ``True``
+	:type Encode: bool
+	:returns: dict
+	"""
+	if not _ext_arns.get(_DISPATCHER, ""):
+		return None
+	parameters = { "Operation": key, "Input.$": "$" }
+	if Encode and _ext_codec:
+		parameters["Codec"] = _ext_codec["Codec"]
+	return parameters
+
+def _ext_task(Name, Key, EndState=False, NextState=None, Encode=True):
+	"""
+	Returns a ``Task`` invoking the Lambda function associated with the specified key
+	"""
+	return Task(
+		Name=Name,
+		EndState=EndState,
+		NextState=NextState,
+		ResourceArn=get_ext_arn(Key),
+		Parameters=get_ext_parameters(Key, Encode=Encode))
+
+def _build_condition(Condition, Prefix="$", NextState=None):
+	"""
+	Returns a new Choice Rule equivalent to the Condition, with each ``Variable`` relocated beneath the Prefix path
+	"""
+	def relocate(comparison):
+		return Comparison(
+			Variable=Prefix + comparison.get_variable()[1:],
+			Comparator=comparison.get_comparator(),
+			Value=comparison.get_value())
+
+	if isinstance(Condition, Comparison):
+		return ChoiceRule(Comparison=relocate(Condition), NextState=NextState)
+	if isinstance(Condition, (ChoiceRule, NotChoiceRule)):
+		return type(Condition)(Comparison=relocate(Condition.get_comparison()), NextState=NextState)
+	return type(Condition)(ComparisonList=[ relocate(c) for c in Condition.get_comparison_list() ], NextState=NextState)
+
 def get_ext_arn_keys():
 	"""
 	Returns the list of keys against which Arns are defined.
@@ -79,8 +185,21 @@ class For(Parallel):
 
 	The same branch is repeatedly executed, with the iterator value injected into the Input data at the location specified by ``IteratorPath``.
 
+	If ``BreakCondition`` is specified, then it is evaluated against the output of each iteration of a sequential ``For`` loop, and if it 
+	passes then the remaining iterations are skipped, with the output of the ``For`` being the list of the outputs of the iterations so far.
+
+	If ``ChunkSize`` is specified, then each execution of the branch is instead passed a list of up to ``ChunkSize`` consecutive iterator values, 
+	so that branches able to process a batch amortise the cost of each iteration across the batch.  The output of the ``For`` is then a list with 
+	the output of each batch.
+
 	The state supports both retry and catch, so that errors can be handled at the state level.  If retries are specified, then all the iterations
-	will be re-executed.
+	will be re-executed, unless ``Checkpoint`` is ``True``.
+
+	If ``Checkpoint`` is ``True``, then a sequential ``For`` loop saves the outputs of the completed iterations after each iteration, and a retry 
+	or a later execution with the same checkpoint key resumes from the first iteration not completed.  The key is taken from ``CheckpointKeyPath``, 
+	defaulting to the execution id, and the checkpoint is deleted when the loop completes.  Requires the ``Dispatcher`` (see ``set_ext_arns``), 
+	which saves the checkpoints to the store configured in its environment.  The loop resumes via a ``Choice`` state with a rule per cycle, so 
+	the definition grows linearly with the number of cycles, which is limited to 1000 (with ``ChunkSize``, each cycle is a batch of iterations).
 
 	Either:
 
@@ -119,12 +238,21 @@ class For(Parallel):
 	:type IteratorPath: str
 	:param ParallelIteration: [Optional] Whether the ``For`` branches can be run concurrently or must be executed sequentially.  Default is sequential.
 	:type ParallelIteration: bool
+	:param ChunkSize: [Optional] The number of consecutive iterator values passed to each execution of the branch.  Default is ``None``, when each execution receives a single iterator value
+	:type ChunkSize: int
+	:param BreakCondition: [Optional] The condition, evaluated against the output of each iteration, which ends the loop early.  ``Variable`` paths are relative to the iteration output
+	:type BreakCondition: ``Comparison``, ``ChoiceRule``, ``NotChoiceRule``, ``AndChoiceRule`` or ``OrChoiceRule``
+	:param Checkpoint: [Optional] Whether the outputs of completed iterations are saved, so that a retried or resumed sequential loop skips them.  Default is ``False``
+	:type Checkpoint: bool
+	:param CheckpointKeyPath: [Optional] The JSONPath of the key identifying the checkpoint, within the Input data or the context object.  Default is "$$.Execution.Id"
+	:type CheckpointKeyPath: str
 
 	"""
 
 	def __init__(self, Name=None, Comment="", InputPath="$", OutputPath="$", NextState=None, EndState=None, 
 					ResultPath="$", RetryList=None, CatcherList=None, BranchState=None, BranchRetryList=None, 
-					From=0, To=0, Step=1, IteratorPath="$.iteration", ParallelIteration=False):
+					From=0, To=0, Step=1, IteratorPath="$.iteration", ParallelIteration=False, ChunkSize=None, BreakCondition=None,
+					Checkpoint=False, CheckpointKeyPath=None):
 		"""
 		Initializer for the ``For`` class
 
@@ -160,8 +288,16 @@ class For(Parallel):
 		:type IteratorPath: str
 		:param ParallelIteration: [Optional] Whether the ``For`` branches can be run concurrently or must be executed sequentially.  Default is sequential.
 		:type ParallelIteration: bool
+		:param ChunkSize: [Optional] The number of consecutive iterator values passed to each execution of the branch.  Default is ``None``, when each execution receives a single iterator value
+		:type ChunkSize: int
+		:param BreakCondition: [Optional] The condition, evaluated against the output of each iteration, which ends the loop early.  ``Variable`` paths are relative to the iteration output
+		:type BreakCondition: ``Comparison``, ``ChoiceRule``, ``NotChoiceRule``, ``AndChoiceRule`` or ``OrChoiceRule``
+		:param Checkpoint: [Optional] Whether the outputs of completed iterations are saved, so that a retried or resumed sequential loop skips them.  Default is ``False``
+		:type Checkpoint: bool
+		:param CheckpointKeyPath: [Optional] The JSONPath of the key identifying the checkpoint, within the Input data or the context object.  Default is "$$.Execution.Id"
+		:type CheckpointKeyPath: str
 
-		"""		
+		"""
 		super(For, self).__init__(Name=Name, Comment=Comment, 
 			InputPath=InputPath, OutputPath=OutputPath, NextState=NextState, EndState=EndState, 
 			ResultPath=ResultPath, RetryList=RetryList, CatcherList=CatcherList, BranchList=None)
@@ -172,6 +308,11 @@ class For(Parallel):
 		self._iterator_path = None
 		self._parallel_iteration = False
 		self._f_branch_retry_list = None
+		self._chunk_size = None
+		self._break_condition = None
+		self._iteration_delays = None
+		self._checkpoint = False
+		self._checkpoint_key_path = None
 		self.set_from(From)
 		self.set_to(To)
 		self.set_step(Step)
@@ -179,6 +320,10 @@ class For(Parallel):
 		self.set_branch_state(BranchState)
 		self.set_parallel_iteration(ParallelIteration)
 		self.set_branch_retry_list(BranchRetryList)
+		self.set_chunk_size(ChunkSize)
+		self.set_break_condition(BreakCondition)
+		self.set_checkpoint(Checkpoint)
+		self.set_checkpoint_key_path(CheckpointKeyPath)
 
 	def _build_for_loop(self):
 		"""
@@ -187,10 +332,9 @@ class For(Parallel):
 
 		def build_iteration(state_name, cycle, iter_path, iter_value):
 
-			consolidator = Task(
+			consolidator = _ext_task(
 				Name="{}-Consolidator-{}".format(state_name, cycle),
-				EndState=False,
-				ResourceArn=get_ext_arn(_CONSOLIDATOR))
+				Key=_CHECKPOINT_CONSOLIDATOR if self.get_checkpoint() else _CONSOLIDATOR)
 
 			injector = Pass(
 				Name="{}-PassTask-{}".format(state_name, cycle),
@@ -201,11 +345,10 @@ class For(Parallel):
 				EndState=False,
 				NextState=self.get_branch_state().clone("{}-{}-{}".format(state_name, "{}", cycle)))
 
-			extractor = Task(
+			extractor = _ext_task(
 				Name="{}-Extractor-{}".format(state_name, cycle),
-				EndState=False,
-				NextState=injector,
-				ResourceArn=get_ext_arn(_EXTRACTOR))
+				Key=_EXTRACTOR,
+				NextState=injector)
 
 			input_passer = Pass(
 				Name="{}-PassInput-{}".format(state_name, cycle),
@@ -230,30 +373,79 @@ class For(Parallel):
 		iter_values = range(self.get_from(), self.get_to(), self.get_step())
 
 		if len(iter_values) > 0:
-			finalizer = Task(
+			finalizer = _ext_task(
 				Name="{}-Finalizer".format(self.get_name()),
-				ResourceArn=get_ext_arn(_FINALIZER),
+				Key=_FINALIZER,
 				EndState=True)
 
-			initializer = Task(
+			initializer = _ext_task(
 					Name="{}-Initializer".format(self.get_name()),
-					ResourceArn=get_ext_arn(_INITIALIZER),
-					EndState=False)
+					Key=_INITIALIZER)
+
+			if self.get_chunk_size():
+				# Each branch execution processes a batch of consecutive iterator values
+				size = self.get_chunk_size()
+				iter_values = [ list(iter_values[i:i+size]) for i in range(0, len(iter_values), size) ]
 
 			cycles = []
 			for iter_value in iter_values:
 				cycles.append(build_iteration(self.get_name(), len(cycles), self.get_iterator_path(), iter_value))
 
+			if self.get_parallel_iteration() and self.get_break_condition():
+				raise Exception("BreakCondition requires sequential iteration (step '{}')".format(self.get_name()))
+
+			if self.get_checkpoint():
+				if self.get_parallel_iteration():
+					raise Exception("Checkpoint requires sequential iteration (step '{}')".format(self.get_name()))
+				if not _ext_arns.get(_DISPATCHER, ""):
+					raise Exception("Checkpoint requires the Dispatcher (step '{}')".format(self.get_name()))
+				if len(cycles) > _MAX_CHECKPOINT_CYCLES:
+					raise Exception("Checkpoint supports at most {} cycles - use ChunkSize to reduce them (step '{}')".format(_MAX_CHECKPOINT_CYCLES, self.get_name()))
+
 			if not self.get_parallel_iteration():
 				# Looping will be sequential
 
 				for i in range(1, len(cycles)):
 					cycles[i-1]["Consolidator"].set_next_state(cycles[i]["Parallel"])
 
+				if self.get_break_condition() and len(cycles) > 1:
+					# Each iteration's output is tested before consolidation, with all breaks sharing one consolidator
+					breaker = _ext_task(
+						Name="{}-BreakConsolidator".format(self.get_name()),
+						Key=_CONSOLIDATOR,
+						NextState=finalizer)
+
+					for i in range(0, len(cycles)-1):
+						cycles[i]["Parallel"].set_next_state(Choice(
+							Name="{}-Break-{}".format(self.get_name(), i),
+							ChoiceList=[ _build_condition(self.get_break_condition(), Prefix="$.[1]", NextState=breaker) ],
+							Default=cycles[i]["Consolidator"]))
+
 				cycles[len(cycles)-1]["Consolidator"].set_next_state(finalizer)
 
 				initializer.set_next_state(cycles[0]["Parallel"])
 
+				if self.get_checkpoint():
+					# The initializer loads the outputs of the iterations already completed, and the third element of
+					# its output is their number, from which the loop resumes
+					parameters = get_ext_parameters(_CHECKPOINT_INITIALIZER)
+					del parameters["Input.$"]
+					parameters["Input"] = { "Input.$": "$", "Name": self.get_name(), "Key.$": self.get_checkpoint_key_path() }
+					initializer.set_resource_arn(ResourceArn=get_ext_arn(_CHECKPOINT_INITIALIZER))
+					initializer.set_parameters(Parameters=parameters)
+					finalizer.set_resource_arn(ResourceArn=get_ext_arn(_CHECKPOINT_FINALIZER))
+					finalizer.set_parameters(Parameters=get_ext_parameters(_CHECKPOINT_FINALIZER))
+
+					resume_rules = []
+					for i in range(1, len(cycles)+1):
+						resume_rules.append(ChoiceRule(
+							Comparison=Comparison(Variable="$.[2]", Comparator="NumericEquals", Value=i),
+							NextState=cycles[i]["Parallel"] if i < len(cycles) else finalizer))
+					initializer.set_next_state(Choice(
+						Name="{}-Resume".format(self.get_name()),
+						ChoiceList=resume_rules,
+						Default=cycles[0]["Parallel"]))
+
 			else:
 				# Looping will be concurrent - assumes all looping is independent
 
@@ -262,6 +454,16 @@ class For(Parallel):
 					branch_list.append(cycle["Parallel"])
 					cycle["Consolidator"].set_end_state(True)
 
+				if self._iteration_delays:
+					# Branch starts are paced, by delaying each branch
+					for i in range(0, len(branch_list)):
+						if self._iteration_delays[i] > 0:
+							branch_list[i] = Wait(
+								Name="{}-Delay-{}".format(self.get_name(), i),
+								WaitForSeconds=self._iteration_delays[i],
+								EndState=False,
+								NextState=branch_list[i])
+
 				parallel = Parallel(
 					Name="{}-Looper".format(self.get_name()),
 					EndState=False,
@@ -270,6 +472,7 @@ class For(Parallel):
 
 				initializer.set_next_state(parallel)
 				finalizer.set_resource_arn(ResourceArn=get_ext_arn(_FINALIZER_PARALLEL_ITERATION))
+				finalizer.set_parameters(Parameters=get_ext_parameters(_FINALIZER_PARALLEL_ITERATION))
 
 			branch_start_state = initializer
 
@@ -421,6 +624,101 @@ class For(Parallel):
 		"""
 		self._parallel_iteration = ParallelIteration
 
+	def get_chunk_size(self):
+		"""
+		Returns the number of consecutive iterator values passed to each execution of the branch, or ``None`` if each execution 
+		receives a single iterator value.
+
+		:returns: int
+		"""
+		return self._chunk_size
+
+	def set_chunk_size(self, ChunkSize=None):
+		"""
+		Sets the number of consecutive iterator values passed to each execution of the branch.  The values are injected at ``IteratorPath`` 
+		as a list, the last of which may be shorter than ``ChunkSize``.  Default is ``None``, when each execution receives a single iterator value.
+
+		:param ChunkSize: [Optional] The number of iterator values in each batch.  Must be a positive integer if specified
+		:type ChunkSize: int
+		"""
+		if ChunkSize is not None:
+			if not isinstance(ChunkSize, int):
+				raise Exception("ChunkSize must be an int (step '{}')".format(self.get_name()))
+			if ChunkSize < 1:
+				raise Exception("ChunkSize must be a positive int (step '{}')".format(self.get_name()))
+		self._chunk_size = ChunkSize
+
+	def get_break_condition(self):
+		"""
+		Returns the condition which ends the ``For`` loop early, or ``None`` if all the iterations are always executed.
+		A ``Comparison`` is returned as the equivalent ``ChoiceRule``.
+
+		:returns: ``ChoiceRule``, ``NotChoiceRule``, ``AndChoiceRule`` or ``OrChoiceRule``
+		"""
+		return self._break_condition
+
+	def set_break_condition(self, BreakCondition=None):
+		"""
+		Sets the condition which ends the ``For`` loop early.  The condition is evaluated against the output of each iteration, 
+		so ``Variable`` paths are relative to that output, and the ``NextState`` of a Choice Rule is ignored.  If the condition passes, 
+		the remaining iterations are skipped.  Only supported when the ``For`` loop is sequential.
+
+		:param BreakCondition: [Optional] The condition to be tested after each iteration
+		:type BreakCondition: ``Comparison``, ``ChoiceRule``, ``NotChoiceRule``, ``AndChoiceRule`` or ``OrChoiceRule``
+		"""
+		if BreakCondition is not None:
+			if not isinstance(BreakCondition, (Comparison, ChoiceRule, NotChoiceRule, AndChoiceRule, OrChoiceRule)):
+				raise Exception("BreakCondition must be a Comparison or Choice Rule (step '{}')".format(self.get_name()))
+			BreakCondition = _build_condition(BreakCondition)
+		self._break_condition = BreakCondition
+
+	def get_checkpoint(self):
+		"""
+		Returns whether the outputs of completed iterations are saved, so that a retried or resumed sequential loop skips them.
+
+		:returns: bool
+		"""
+		return self._checkpoint
+
+	def set_checkpoint(self, Checkpoint=False):
+		"""
+		Sets whether the outputs of completed iterations are saved after each iteration, so that a retried or resumed sequential loop 
+		starts from the first iteration not completed.  Requires the ``Dispatcher``, and is only supported when the ``For`` loop is sequential.
+
+		:param Checkpoint: [Optional] Whether the loop is checkpointed.  Default is ``False``
+		:type Checkpoint: bool
+		"""
+		if not isinstance(Checkpoint, bool):
+			raise Exception("Checkpoint must be a bool (step '{}')".format(self.get_name()))
+		self._checkpoint = Checkpoint
+
+	def get_checkpoint_key_path(self):
+		"""
+		Returns the JSONPath of the key identifying the checkpoint.
+
+		:returns: str
+		"""
+		return self._checkpoint_key_path
+
+	def set_checkpoint_key_path(self, CheckpointKeyPath=None):
+		"""
+		Sets the JSONPath of the key identifying the checkpoint, which is evaluated against the Input data of the ``For``, or against 
+		the context object if it starts with "$$".  The key is combined with the name of the state, so executions with the same key 
+		share the checkpoints of each of their ``For`` states.  Default is ``None``, when the execution id is used.
+
+		:param CheckpointKeyPath: [Optional] The JSONPath of the checkpoint key
+		:type CheckpointKeyPath: str
+		"""
+		if CheckpointKeyPath is None:
+			CheckpointKeyPath = _DEFAULT_CHECKPOINT_KEY_PATH
+		if not isinstance(CheckpointKeyPath, str) or not CheckpointKeyPath.startswith("$"):
+			raise Exception("CheckpointKeyPath must be a JSONPath str (step '{}')".format(self.get_name()))
+		self._checkpoint_key_path = CheckpointKeyPath
+
+	def _set_iteration_delays(self, Delays=None):
+		# The number of seconds each concurrent iteration waits before starting, used by RateLimitedParallel
+		self._iteration_delays = Delays
+
 	def validate(self):
 		"""
 		Validates this instance is correctly specified.
@@ -469,18 +767,25 @@ class For(Parallel):
 			To=self.get_to(),
 			Step=self.get_step(),
 			IteratorPath=self.get_iterator_path(),
-			ParallelIteration=self.get_parallel_iteration())
+			ParallelIteration=self.get_parallel_iteration(),
+			ChunkSize=self.get_chunk_size(),
+			BreakCondition=self.get_break_condition(),
+			Checkpoint=self.get_checkpoint(),
+			CheckpointKeyPath=self.get_checkpoint_key_path())
 
 		if self.get_branch_state():
 			c.set_branch_state(BranchState=self.get_branch_state().clone(NameFormatString))
 
+		if self.get_branch_retry_list():
+			c.set_branch_retry_list(BranchRetryList=[ r.clone() for r in self.get_branch_retry_list() ])
+
 		if self.get_retry_list():
 			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
 
 		if self.get_catcher_list():
-			c.set_catcher_list(CatcherList=[ c.clone(NameFormatString) for c in self.get_catcher_list() ])
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
 
 		if self.get_next_state():
-			c.set_next_state(NextState=self.get_next_state.clone(NameFormatString))	
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
 		return c
@@ -0,0 +1,369 @@
+from ..pass_state import Pass
+from ..task_state import Task
+from ..wait_state import Wait
+from ..fail_state import Fail
+from ..parallel_state import Parallel
+from ..catcher import Catcher
+from ..state_retry_catch import StateRetryCatch
+from .for_state import _ext_task, _HEDGED_TASK_COMPLETED, _HEDGED_TASK_RESULT
+
+# Raised by the HedgedTaskCompleted Lambda function, carrying the winning result in the error Cause
+_COMPLETED_ERROR = "HedgedTaskCompleted"
+
+class HedgedTask(StateRetryCatch):
+	"""
+	The ``HedgedTask`` state invokes an AWS Lambda function or ``Activity``, and if it has not completed within ``HedgeDelaySeconds``,
+	starts a duplicate invocation of the same resource with the same input, repeating for each of the ``Hedges``.  The result of the
+	first invocation to succeed is returned, so that slow invocations (such as cold starts) do not determine the latency of the state.
+
+	Each invocation runs in its own branch of a ``Parallel``.  The first successful invocation is passed to the HedgedTaskCompleted
+	Lambda function, which raises a ``HedgedTaskCompleted`` error carrying the result, so that Step Functions stops the other branches.
+	The error is caught, and the HedgedTaskResult Lambda function recovers the result.  An invocation that fails does not stop the
+	other invocations - if they all fail, the state fails with ``HedgedTask.AllAttemptsFailed``, which may be retried or caught.
+
+	The resource must be idempotent, as the same input may be processed by up to 1 + ``Hedges`` invocations.  Invocations that have
+	already started are not cancelled when another invocation wins - their results are simply discarded.  Invocations whose delay
+	has not yet elapsed are never started.  As the result passes through the error Cause, it must not exceed 32,768 characters.
+
+	Either:
+
+	* ``EndState`` is ``True`` and ``NextState`` must be ``None``
+	* ``EndState`` is ``False`` and ``NextState`` must be a valid instance of a class derived from ``StateBase``.
+
+	:param Name: [Required] The name of the state within the branch of the state machine
+	:type Name: str
+	:param Comment: [Optional] A comment describing the intent of this pass state
+	:type Comment: str
+	:param InputPath: [Optional] Filter on the Input information to be passed to the Pass state.  Default is "$", signifying that all the Input information will be provided
+	:type InputPath: str
+	:param OutputPath: [Optional] Filter on the Output information to be returned from the Pass state.  Default is "$", signifying that all the result information will be provided
+	:type OutputPath: str
+	:param EndState: [Optional] Flag indicating if this state terminates a branch of the state machine.  Defaults to ``False``
+	:type EndState: bool
+	:param NextState: [Optional] Next state to be invoked within this branch.  Must not be ``None`` unless ``EndState`` is ``True``
+	:type NextState: instance of class derived from ``StateBase``
+	:param ResultPath: [Optional] JSONPath indicating where results should be added to the Input.  Defaults to "$", indicating results replace the Input entirely.
+	:type ResultPath: str
+	:param RetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause all the invocations to be retried
+	:type: RetryList: list of ``Retrier``
+	:param CatcherList: [Optional] ``list`` of ``Catcher`` instances corresponding to error states that can be caught and handled by further states being executed in the ``StateMachine``.
+	:type: CatcherList: list of ``Catcher``
+	:param ResourceArn: [Required] The Arn for the ``Lambda`` function or ``Activity`` that the ``HedgedTask`` should invoke
+	:type: ResourceArn: str
+	:param: TimeoutSeconds: [Optional] The number of seconds in which each invocation should complete
+	:type: TimeoutSeconds: int
+	:param: HeartbeatSeconds: [Optional]  The number of seconds between heartbeats from an ``Activity``, to indicate it is still running
+	:type: HeartbeatSeconds: int
+	:param: HedgeDelaySeconds: [Optional] The number of seconds between the start of each invocation.  Must be larger than zero.  Default is 1
+	:type: HedgeDelaySeconds: int
+	:param: Hedges: [Optional] The number of duplicate invocations that may be started.  Must be larger than zero.  Default is 1
+	:type: Hedges: int
+
+	"""
+
+	def __init__(self, Name=None, Comment="", InputPath="$", OutputPath="$", NextState=None, EndState=None,
+					ResultPath="$", RetryList=None, CatcherList=None,
+					ResourceArn=None, TimeoutSeconds=99999999, HeartbeatSeconds=99999999,
+					HedgeDelaySeconds=1, Hedges=1):
+		"""
+		Initializer for the HedgedTask state
+
+		:param Name: [Required] The name of the state within the branch of the state machine
+		:type Name: str
+		:param Comment: [Optional] A comment describing the intent of this pass state
+		:type Comment: str
+		:param InputPath: [Optional] Filter on the Input information to be passed to the Pass state.  Default is "$", signifying that all the Input information will be provided
+		:type InputPath: str
+		:param OutputPath: [Optional] Filter on the Output information to be returned from the Pass state.  Default is "$", signifying that all the result information will be provided
+		:type OutputPath: str
+		:param EndState: [Optional] Flag indicating if this state terminates a branch of the state machine.  Defaults to ``False``
+		:type EndState: bool
+		:param NextState: [Optional] Next state to be invoked within this branch.  Must not be ``None`` unless ``EndState`` is ``True``
+		:type NextState: instance of class derived from ``StateBase``
+		:param ResultPath: [Optional] JSONPath indicating where results should be added to the Input.  Defaults to "$", indicating results replace the Input entirely.
+		:type ResultPath: str
+		:param RetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause all the invocations to be retried
+		:type: RetryList: list of ``Retrier``
+		:param CatcherList: [Optional] ``list`` of ``Catcher`` instances corresponding to error states that can be caught and handled by further states being executed in the ``StateMachine``.
+		:type: CatcherList: list of ``Catcher``
+		:param ResourceArn: [Required] The Arn for the ``Lambda`` function or ``Activity`` that the ``HedgedTask`` should invoke
+		:type: ResourceArn: str
+		:param: TimeoutSeconds: [Optional] The number of seconds in which each invocation should complete
+		:type: TimeoutSeconds: int
+		:param: HeartbeatSeconds: [Optional]  The number of seconds between heartbeats from an ``Activity``, to indicate it is still running
+		:type: HeartbeatSeconds: int
+		:param: HedgeDelaySeconds: [Optional] The number of seconds between the start of each invocation.  Must be larger than zero.  Default is 1
+		:type: HedgeDelaySeconds: int
+		:param: Hedges: [Optional] The number of duplicate invocations that may be started.  Must be larger than zero.  Default is 1
+		:type: Hedges: int
+
+		"""
+		super(HedgedTask, self).__init__(Name=Name, Type="Ext", Comment=Comment,
+			InputPath=InputPath, OutputPath=OutputPath, NextState=NextState, EndState=EndState,
+			ResultPath=ResultPath, RetryList=RetryList, CatcherList=CatcherList)
+		self._resource_arn = None
+		self._timeout_seconds = None
+		self._heartbeat_seconds = None
+		self._hedge_delay_seconds = 1
+		self._hedges = 1
+		self.set_resource_arn(ResourceArn)
+		self.set_timeout_seconds(TimeoutSeconds)
+		self.set_heartbeat_seconds(HeartbeatSeconds)
+		self.set_hedge_delay_seconds(HedgeDelaySeconds)
+		self.set_hedges(Hedges)
+
+	def _ht_build(self):
+		"""
+		Declares the Parallel of invocations, and the states that recover the winning result
+		"""
+
+		def create_attempt(attempt):
+			# The first successful invocation stops the other branches, by raising an error carrying its result
+			completed = _ext_task(
+				Name="{}-Completed-{}".format(self.get_name(), attempt),
+				Key=_HEDGED_TASK_COMPLETED,
+				EndState=True)
+
+			# A failed invocation ends its branch, leaving the other invocations running
+			failed = Pass(
+				Name="{}-Failed-{}".format(self.get_name(), attempt),
+				Comment="Discards the error, so that the other invocations continue",
+				ResultAsJSON={},
+				EndState=True)
+
+			task = Task(
+				Name="{}-Attempt-{}".format(self.get_name(), attempt),
+				ResourceArn=self.get_resource_arn(),
+				TimeoutSeconds=self.get_timeout_seconds(),
+				HeartbeatSeconds=self.get_heartbeat_seconds(),
+				CatcherList=[ Catcher(ErrorNameList=["States.ALL"], NextState=failed) ],
+				EndState=False,
+				NextState=completed)
+
+			if attempt == 0:
+				return task
+
+			return Wait(
+				Name="{}-Delay-{}".format(self.get_name(), attempt),
+				WaitForSeconds=attempt * self.get_hedge_delay_seconds(),
+				EndState=False,
+				NextState=task)
+
+		result = _ext_task(
+			Name="{}-Result".format(self.get_name()),
+			Key=_HEDGED_TASK_RESULT,
+			EndState=True,
+			Encode=False)
+
+		all_failed = Fail(
+			Name="{}-AllAttemptsFailed".format(self.get_name()),
+			ErrorName="HedgedTask.AllAttemptsFailed",
+			ErrorCause="No invocation of the resource succeeded")
+
+		attempts = Parallel(
+			Name="{}-Attempts".format(self.get_name()),
+			Comment="Runs the primary and hedged invocations, until one succeeds",
+			BranchList=[ create_attempt(attempt) for attempt in range(0, self.get_hedges() + 1) ],
+			CatcherList=[ Catcher(ErrorNameList=[_COMPLETED_ERROR], NextState=result) ],
+			EndState=False,
+			NextState=all_failed)
+
+		# Replaces the list of branch results with the winning result, at the ResultPath
+		result_path = self.get_result_path()
+		extractor = Pass(
+			Name="{}-Extractor".format(self.get_name()),
+			Comment="Extracts the result of the winning invocation",
+			InputPath="{}.[0]".format(result_path),
+			ResultPath=result_path,
+			OutputPath=self.get_output_path(),
+			EndState=self.get_end_state(),
+			NextState=self.get_next_state())
+
+		return Parallel(
+			Name=self.get_name(),
+			Comment=self.get_comment() or "Returns the result of the first invocation to succeed",
+			InputPath=self.get_input_path(),
+			ResultPath=result_path,
+			EndState=False,
+			NextState=extractor,
+			BranchList=[ attempts ],
+			RetryList=self.get_retry_list(),
+			CatcherList=self.get_catcher_list())
+
+	def validate(self):
+		"""
+		Validates this instance is correctly specified.
+
+		Raises ``Exception`` with details of the error, if the state is incorrectly defined.
+
+		"""
+		super(HedgedTask, self).validate()
+		self._ht_build().validate()
+
+	def to_json(self):
+		"""
+		Returns the JSON representation of this instance.
+
+		:returns: dict -- The JSON representation
+
+		"""
+		return self._ht_build().to_json()
+
+	def _get_expanded_state(self):
+		# Here we are building a branch "on the fly", so do not call super()
+		return self._ht_build()
+
+	def get_resource_arn(self):
+		"""
+		Returns the Arn of the Lambda or ``Activity`` that will be invoked by this ``HedgedTask``.
+
+		:returns: str -- The Arn of the resource to be invoked.
+		"""
+		return self._resource_arn
+
+	def set_resource_arn(self, ResourceArn=None):
+		"""
+		Sets the Arn of the Lambda of ``Activity`` to be invoked by this ``HedgedTask``.  Cannot be ``None`` and must be a valid Arn formatted string.
+
+		:param ResourceArn: [Required] The Arn for the ``Lambda`` function or ``Activity`` that the ``HedgedTask`` should invoke
+		:type: ResourceArn: str
+		"""
+		if not ResourceArn:
+			raise Exception("ResourceArn must be specified for HedgedTask state (step '{}')".format(self.get_name()))
+		if not isinstance(ResourceArn, str):
+			raise Exception("ResourceArn must be a string for HedgedTask state (step '{}')".format(self.get_name()))
+		self._resource_arn = ResourceArn
+
+	def get_timeout_seconds(self):
+		"""
+		Returns the timeout seconds for each invocation, afterwhich a ``States.Timeout`` error is raised.
+
+		:returns: int -- The timeout seconds for each invocation.
+		"""
+		return self._timeout_seconds
+
+	def set_timeout_seconds(self, TimeoutSeconds=99999999):
+		"""
+		Sets the timeout seconds for each invocation, afterwhich a ``States.Timeout`` error is raised.
+
+		If specified, must not be less than zero seconds.  Default value is ``99999999``.
+
+		:param: TimeoutSeconds: [Optional] The number of seconds in which each invocation should complete
+		:type: TimeoutSeconds: int
+		"""
+		if TimeoutSeconds:
+			if not isinstance(TimeoutSeconds, int):
+				raise Exception("TimeoutSeconds must be an integer if specified for HedgedTask (step '{}')".format(self.get_name()))
+			if TimeoutSeconds < 1:
+				raise Exception("TimeoutSeconds must be greater than zero if specified for HedgedTask (step '{}')".format(self.get_name()))
+		self._timeout_seconds = TimeoutSeconds
+
+	def get_heartbeat_seconds(self):
+		"""
+		Returns the heartbeat interval for each invocation.  If more than two heartbeats are missed then the invocation will
+		fail with a ``States.Timeout`` error.
+
+		:returns: int -- The heartbeat seconds for each invocation.
+		"""
+		return self._heartbeat_seconds
+
+	def set_heartbeat_seconds(self, HeartbeatSeconds=99999999):
+		"""
+		Sets the heartbeats seconds for each invocation.  If more than two heartbeats are missed then the invocation will
+		fail with a ``States.Timeout`` error.
+
+		If specified, must not be less than zero seconds.  Default value is ``99999999``.
+
+		:param: HeartbeatSeconds: [Optional]  The number of seconds between heartbeats from an ``Activity``, to indicate it is still running
+		:type: HeartbeatSeconds: int
+		"""
+		if HeartbeatSeconds:
+			if not isinstance(HeartbeatSeconds, int):
+				raise Exception("HeartbeatSeconds must be an integer if specified for HedgedTask (step '{}')".format(self.get_name()))
+			if HeartbeatSeconds < 1:
+				raise Exception("HeartbeatSeconds must be greater than zero if specified for HedgedTask (step '{}')".format(self.get_name()))
+		self._heartbeat_seconds = HeartbeatSeconds
+
+	def get_hedge_delay_seconds(self):
+		"""
+		Returns the number of seconds between the start of each invocation.
+
+		:returns: int -- The delay before each duplicate invocation
+		"""
+		return self._hedge_delay_seconds
+
+	def set_hedge_delay_seconds(self, HedgeDelaySeconds=1):
+		"""
+		Sets the number of seconds between the start of each invocation, which should be around the typical (e.g. 95th percentile)
+		latency of the resource, so that duplicates are only started for slow invocations.  Default is 1.
+
+		:param: HedgeDelaySeconds: [Optional] The number of seconds between the start of each invocation.  Must be larger than zero
+		:type: HedgeDelaySeconds: int
+		"""
+		if not isinstance(HedgeDelaySeconds, int):
+			raise Exception("HedgeDelaySeconds must be an int (step '{}')".format(self.get_name()))
+		if HedgeDelaySeconds < 1:
+			raise Exception("HedgeDelaySeconds must be greater than zero (step '{}')".format(self.get_name()))
+		self._hedge_delay_seconds = HedgeDelaySeconds
+
+	def get_hedges(self):
+		"""
+		Returns the number of duplicate invocations that may be started.
+
+		:returns: int -- The number of duplicate invocations
+		"""
+		return self._hedges
+
+	def set_hedges(self, Hedges=1):
+		"""
+		Sets the number of duplicate invocations that may be started, in addition to the primary invocation.  Default is 1.
+
+		:param: Hedges: [Optional] The number of duplicate invocations.  Must be larger than zero
+		:type: Hedges: int
+		"""
+		if not isinstance(Hedges, int):
+			raise Exception("Hedges must be an int (step '{}')".format(self.get_name()))
+		if Hedges < 1:
+			raise Exception("Hedges must be greater than zero (step '{}')".format(self.get_name()))
+		self._hedges = Hedges
+
+	def clone(self, NameFormatString="{}"):
+		"""
+		Returns a clone of this instance, with the clone named per the NameFormatString, to avoid state name clashes.
+
+		If this instance is not an end state, then the next state will also be cloned, to establish a complete clone
+		of the branch form this instance onwards.
+
+		:param NameFormatString: [Required] The naming template to be applied to generate the name of the new instance.
+		:type NameFormatString: str
+
+		:returns: ``HedgedTask`` -- A new instance of this instance and any other instances in its branch.
+		"""
+		if not NameFormatString:
+			raise Exception("NameFormatString must not be None (step '{}')".format(self.get_name()))
+		if not isinstance(NameFormatString, str):
+			raise Exception("NameFormatString must be a str (step '{}')".format(self.get_name()))
+
+		c = HedgedTask(
+			Name=NameFormatString.format(self.get_name()),
+			Comment=self.get_comment(),
+			InputPath=self.get_input_path(),
+			OutputPath=self.get_output_path(),
+			EndState=self.get_end_state(),
+			ResultPath=self.get_result_path(),
+			ResourceArn=self.get_resource_arn(),
+			TimeoutSeconds=self.get_timeout_seconds(),
+			HeartbeatSeconds=self.get_heartbeat_seconds(),
+			HedgeDelaySeconds=self.get_hedge_delay_seconds(),
+			Hedges=self.get_hedges())
+
+		if self.get_retry_list():
+			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
+
+		if self.get_catcher_list():
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
+
+		if self.get_next_state():
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))
+
+		return c
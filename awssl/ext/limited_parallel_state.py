@@ -4,7 +4,7 @@ from ..parallel_state import Parallel
 from ..retrier import Retrier
 from ..state_base import StateBase
 from ..state_retry_catch import StateRetryCatch
-from .for_state import For, get_ext_arn, _INITIALIZER, _LIMITED_PARALLEL_CONSOLIDATOR
+from .for_state import For, _ext_task, _INITIALIZER, _LIMITED_PARALLEL_CONSOLIDATOR
 
 class LimitedParallel(StateRetryCatch):
 	"""
@@ -139,17 +139,16 @@ class LimitedParallel(StateRetryCatch):
 
 			branch_list = [ inputs, existing_results, loop_inputs]
 
-			initializer_arn = get_ext_arn(_LIMITED_PARALLEL_CONSOLIDATOR)
+			initializer_key = _LIMITED_PARALLEL_CONSOLIDATOR
 			if cycle == 0:
-				initializer_arn = get_ext_arn(_INITIALIZER)
+				initializer_key = _INITIALIZER
 
 			cycle_state = Parallel(Name="{}-Parallel-{}".format(state_name, cycle), 
 									EndState=True,
 									BranchList=branch_list)
 
-			initializer = Task(Name="{}-Initializer-{}".format(state_name, cycle),
-							ResourceArn=initializer_arn,
-							EndState=False,
+			initializer = _ext_task(Name="{}-Initializer-{}".format(state_name, cycle),
+							Key=initializer_key,
 							NextState=cycle_state)
 
 			if prior_state:
@@ -182,10 +181,11 @@ class LimitedParallel(StateRetryCatch):
 						EndState=True,
 						OutputPath="$.[1]")
 
-		consolidator = Task(Name="{}-Consolidator".format(self.get_name()),
-						ResourceArn=get_ext_arn(_LIMITED_PARALLEL_CONSOLIDATOR),
-						EndState=False,
-						NextState=finalizer)
+		# The results are extracted by a Pass state, so must not be encoded
+		consolidator = _ext_task(Name="{}-Consolidator".format(self.get_name()),
+						Key=_LIMITED_PARALLEL_CONSOLIDATOR,
+						NextState=finalizer,
+						Encode=False)
 
 		prior_state.set_end_state(False)
 		prior_state.set_next_state(consolidator)
@@ -354,9 +354,9 @@ class LimitedParallel(StateRetryCatch):
 		"""
 		return self._lp_build().to_json()
 
-	def get_child_states(self):
+	def _get_expanded_state(self):
 		# Here we are building a branch "on the fly", so do not call super()
-		return self._lp_build().get_child_states()
+		return self._lp_build()
 
 	def clone(self, NameFormatString="{}"):
 		"""
@@ -383,22 +383,22 @@ class LimitedParallel(StateRetryCatch):
 			EndState=self.get_end_state(),
 			ResultPath=self.get_result_path(),
 			Iterations=self.get_iterations(),
-			MaxConcurrent=self.get_max_concurrent(),
+			MaxConcurrency=self.get_max_concurrency(),
 			IteratorPath=self.get_iterator_path())
 
 		if self.get_branch_state():
 			c.set_branch_state(BranchState=self.get_branch_state().clone(NameFormatString))
 
 		if self.get_branch_retry_list():
-			c.set_branch_retry_list(BranchRetryList=self.get_branch_retry_list())
+			c.set_branch_retry_list(BranchRetryList=[ r.clone() for r in self.get_branch_retry_list() ])
 
 		if self.get_retry_list():
 			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
 
 		if self.get_catcher_list():
-			c.set_catcher_list(CatcherList=[ c.clone(NameFormatString) for c in self.get_catcher_list() ])
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
 
 		if self.get_next_state():
-			c.set_next_state(NextState=self.get_next_state.clone(NameFormatString))	
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
 		return c
@@ -173,7 +173,7 @@ class ParallelWithFinally(StateRetryCatchFinally):
 		if self.get_next_state():
 			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
-		if self.get_finally_state():
-			c.set_finally_state(FinallyState=self.get_finally_state().clone(NameFormatString))			
+		if self.get_finally_branch():
+			c.set_finally_branch(FinallyState=self.get_finally_branch().clone(NameFormatString))			
 
 		return c
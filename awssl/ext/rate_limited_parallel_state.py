@@ -0,0 +1,367 @@
+import math
+from ..pass_state import Pass
+from ..parallel_state import Parallel
+from ..retrier import Retrier
+from ..state_base import StateBase
+from ..state_retry_catch import StateRetryCatch
+from .for_state import For
+
+class RateLimitedParallel(StateRetryCatch):
+	"""
+	Rate Limited Parallel executes the same branch ``Iterations`` times concurrently, but spaces the start of each branch execution so
+	that no more than ``Rate`` branches start per second, after an initial ``Burst``.  This avoids the bursts of requests, and the throttling
+	errors and retries that follow, when the branches call an API with a requests-per-second quota.
+
+	The pacing follows a token bucket, which holds ``Burst`` tokens and is refilled at ``Rate`` tokens per second.  The delay of each branch
+	is planned when the state is generated, and each delayed branch starts with a ``Wait`` state.  As ``Wait`` states are specified in whole
+	seconds, the delays are rounded up, so that the rate is never exceeded.
+
+	The value of the iterator is passed to each branch, so that ``Task``s in the branch can process appropriately.  The location of the
+	iterator is specified by ``IteratorPath``.
+
+	Branch executions have optional ``Retrier`` lists, which allow individual executions to be retried.  In addition, the state also
+	supports retries and catches, but this will result in all branches being re-executed.
+
+	Either:
+
+	* ``EndState`` is ``True`` and ``NextState`` must be ``None``
+	* ``EndState`` is ``False`` and ``NextState`` must be a valid instance of a class derived from ``StateBase``.
+
+	Output is returned as a ``list`` of the outputs from each branch.
+
+	:param Name: [Required] The name of the state within the branch of the state machine
+	:type Name: str
+	:param Comment: [Optional] A comment describing the intent of this pass state
+	:type Comment: str
+	:param InputPath: [Optional] Filter on the Input information to be passed to the Pass state.  Default is "$", signifying that all the Input information will be provided
+	:type InputPath: str
+	:param OutputPath: [Optional] Filter on the Output information to be returned from the Pass state.  Default is "$", signifying that all the result information will be provided
+	:type OutputPath: str
+	:param EndState: [Optional] Flag indicating if this state terminates a branch of the state machine.  Defaults to ``False``
+	:type EndState: bool
+	:param NextState: [Optional] Next state to be invoked within this branch.  Must not be ``None`` unless ``EndState`` is ``True``
+	:type NextState: instance of class derived from ``StateBase``
+	:param ResultPath: [Optional] JSONPath indicating where results should be added to the Input.  Defaults to "$", indicating results replace the Input entirely.
+	:type ResultPath: str
+	:param RetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause the entire set of branches to be retried
+	:type: RetryList: list of ``Retrier``
+	:param CatcherList: [Optional] ``list`` of ``Catcher`` instances corresponding to error states that can be caught and handled by further states being executed in the ``StateMachine``.
+	:type: CatcherList: list of ``Catcher``
+	:param BranchState: [Required] ``StateBase`` instance, providing the starting state for each branch to be run concurrently
+	:type: BranchState: ``StateBase``
+	:param BranchRetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause the branch execution to be retried.  This will occur until the number of retries has been exhausted for this execution, afterwhich state level ``Retrier`` will be triggered if specified
+	:type BranchRetryList: list of ``Retrier``
+	:param: Iterations: [Required] The total number of branches to be executed.  Must be larger than zero
+	:type: Iterations: int
+	:param: Rate: [Required] The maximum number of branch executions to be started per second, once the burst is exhausted.  Must be larger than zero
+	:type: Rate: int or float
+	:param: Burst: [Optional] The number of branch executions that can be started immediately.  Must be larger than zero.  Default is 1
+	:type: Burst: int
+	:param: IteratorPath: [Required] The JSONPath in which to inject the iterator value into the Input passed to the branch
+	:type: IteratorPath: str
+
+	"""
+
+	def __init__(self, Name=None, Comment="", InputPath="$", OutputPath="$", NextState=None, EndState=None,
+					ResultPath="$", RetryList=None, CatcherList=None,
+					BranchState=None, BranchRetryList=None,
+					Iterations=0, Rate=1, Burst=1, IteratorPath="$.iteration"):
+		"""
+		Initializer Rate Limited Parallel spaces the start of concurrent branch executions, so that no more than ``Rate`` branches start per second.
+
+		:param Name: [Required] The name of the state within the branch of the state machine
+		:type Name: str
+		:param Comment: [Optional] A comment describing the intent of this pass state
+		:type Comment: str
+		:param InputPath: [Optional] Filter on the Input information to be passed to the Pass state.  Default is "$", signifying that all the Input information will be provided
+		:type InputPath: str
+		:param OutputPath: [Optional] Filter on the Output information to be returned from the Pass state.  Default is "$", signifying that all the result information will be provided
+		:type OutputPath: str
+		:param EndState: [Optional] Flag indicating if this state terminates a branch of the state machine.  Defaults to ``False``
+		:type EndState: bool
+		:param NextState: [Optional] Next state to be invoked within this branch.  Must not be ``None`` unless ``EndState`` is ``True``
+		:type NextState: instance of class derived from ``StateBase``
+		:param ResultPath: [Optional] JSONPath indicating where results should be added to the Input.  Defaults to "$", indicating results replace the Input entirely.
+		:type ResultPath: str
+		:param RetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause the entire set of branches to be retried
+		:type: RetryList: list of ``Retrier``
+		:param CatcherList: [Optional] ``list`` of ``Catcher`` instances corresponding to error states that can be caught and handled by further states being executed in the ``StateMachine``.
+		:type: CatcherList: list of ``Catcher``
+		:param BranchState: [Required] ``StateBase`` instance, providing the starting state for each branch to be run concurrently
+		:type: BranchState: ``StateBase``
+		:param BranchRetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that cause the branch execution to be retried.  This will occur until the number of retries has been exhausted for this execution, afterwhich state level ``Retrier`` will be triggered if specified
+		:type BranchRetryList: list of ``Retrier``
+		:param: Iterations: [Required] The total number of branches to be executed.  Must be larger than zero
+		:type: Iterations: int
+		:param: Rate: [Required] The maximum number of branch executions to be started per second, once the burst is exhausted.  Must be larger than zero
+		:type: Rate: int or float
+		:param: Burst: [Optional] The number of branch executions that can be started immediately.  Must be larger than zero.  Default is 1
+		:type: Burst: int
+		:param: IteratorPath: [Required] The JSONPath in which to inject the iterator value into the Input passed to the branch
+		:type: IteratorPath: str
+
+		"""
+		super(RateLimitedParallel, self).__init__(Name=Name, Type="Ext", Comment=Comment,
+			InputPath=InputPath, OutputPath=OutputPath, NextState=NextState, EndState=EndState,
+			ResultPath=ResultPath, RetryList=RetryList, CatcherList=CatcherList)
+		self._branch_state = None
+		self._iterator_path = None
+		self._iterations = 0
+		self._rate = 1
+		self._burst = 1
+		self._rlp_branch_retry_list = None
+		self.set_branch_state(BranchState)
+		self.set_iterator_path(IteratorPath)
+		self.set_iterations(Iterations)
+		self.set_rate(Rate)
+		self.set_burst(Burst)
+		self.set_branch_retry_list(BranchRetryList)
+
+	def get_start_delays(self):
+		"""
+		Returns the planned number of seconds that each branch execution waits before starting.
+
+		The i-th branch execution (counting from zero) needs a token, which a bucket holding ``Burst`` tokens and refilled at ``Rate``
+		tokens per second provides after (i + 1 - ``Burst``) / ``Rate`` seconds, rounded up to whole seconds.
+
+		:returns: ``list`` of int -- The delay for each branch execution
+		"""
+		return [ max(0, int(math.ceil(float(i + 1 - self.get_burst()) / self.get_rate()))) for i in range(0, self.get_iterations()) ]
+
+	def _rlp_build(self):
+		"""
+		Declares the paced branches, within a Parallel that applies the state level settings
+		"""
+		for_state = For(
+			Name="{}-For".format(self.get_name()),
+			EndState=True,
+			From=0,
+			To=self.get_iterations(),
+			Step=1,
+			BranchState=self.get_branch_state(),
+			BranchRetryList=self.get_branch_retry_list(),
+			IteratorPath=self.get_iterator_path(),
+			ParallelIteration=True)
+		for_state._set_iteration_delays(self.get_start_delays())
+
+		# Replaces the list of branch results with the results of the For, at the ResultPath
+		extractor = Pass(
+			Name="{}-Extractor".format(self.get_name()),
+			Comment="Extracts the list of results from the branch executions",
+			InputPath="{}.[0]".format(self.get_result_path()),
+			ResultPath=self.get_result_path(),
+			OutputPath=self.get_output_path(),
+			EndState=self.get_end_state(),
+			NextState=self.get_next_state())
+
+		return Parallel(
+			Name=self.get_name(),
+			Comment="Processes the branches, with their starts paced by the Rate and Burst settings",
+			EndState=False,
+			NextState=extractor,
+			InputPath=self.get_input_path(),
+			ResultPath=self.get_result_path(),
+			BranchList=[ for_state ],
+			RetryList=self.get_retry_list(),
+			CatcherList=self.get_catcher_list())
+
+	def get_branch_state(self):
+		"""
+		Returns the initial state for the branch processing
+
+		:returns: ``StateBase`` -- The initial state of the branch
+		"""
+		return self._branch_state
+
+	def set_branch_state(self, BranchState=None):
+		"""
+		Set the initial state for the branch processing
+
+		:param BranchState: [Required] ``StateBase`` instance, providing the starting state for each branch to be run concurrently
+		:type: BranchState: ``StateBase``
+		"""
+		if BranchState and not isinstance(BranchState, StateBase):
+			raise Exception("BranchState must either be inherited from StateBase (step '{}')".format(self.get_name()))
+		self._branch_state = BranchState
+
+	def get_branch_retry_list(self):
+		"""
+		Returns the list of ``Retrier`` instances that will be applied separately to each branch execution, allowing failure
+		in one branch execution to be retried.
+
+		:returns: ``list`` of ``Retrier`` instances
+		"""
+		return self._rlp_branch_retry_list
+
+	def set_branch_retry_list(self, BranchRetryList=None):
+		"""
+		Sets the list of ``Retrier`` instance to be applied to each of the branch execution in the ``RateLimitedParallel``.
+
+		If none are specified, then ``RateLimitedParallel`` will retry at the state level (if ``Retrier`` are specified)
+
+		:param BranchRetryList: [Optional] ``list`` of ``Retrier`` instances corresponding to error states that can be retried for each branch execution
+		:type: BranchRetryList: list of ``StateBase``
+
+		"""
+		if not BranchRetryList:
+			self._rlp_branch_retry_list = None
+			return
+
+		if not isinstance(BranchRetryList, list):
+			raise Exception("BranchRetryList must contain a list of Retrier instances (step '{}')".format(self.get_name()))
+		if len(BranchRetryList) == 0:
+			raise Exception("BranchRetryList must contain a non-empty list of Retrier instances (step '{}')".format(self.get_name()))
+		for o in BranchRetryList:
+			if not isinstance(o, Retrier):
+				raise Exception("BranchRetryList must contain only instances of Retrier - found '{}' (step '{}')".format(type(o), self.get_name()))
+		self._rlp_branch_retry_list = [ r for r in BranchRetryList ]
+
+	def get_rate(self):
+		"""
+		Returns the maximum number of branch executions started per second, once the burst is exhausted
+
+		:returns: int or float -- The rate of branch starts
+		"""
+		return self._rate
+
+	def set_rate(self, Rate=1):
+		"""
+		Sets the maximum number of branch executions started per second, once the burst is exhausted.  This should be set to the
+		requests-per-second quota of the API called by the branch, divided by the number of calls made by each branch.
+
+		:param: Rate: [Required] The rate of branch starts.  Must be larger than zero
+		:type: Rate: int or float
+		"""
+		if not isinstance(Rate, (int, float)):
+			raise Exception("Rate must be either an int or a float (step '{}')".format(self.get_name()))
+		if Rate <= 0:
+			raise Exception("Rate must be greater than zero (step '{}')".format(self.get_name()))
+		self._rate = Rate
+
+	def get_burst(self):
+		"""
+		Returns the number of branch executions that can be started immediately
+
+		:returns: int -- The burst size
+		"""
+		return self._burst
+
+	def set_burst(self, Burst=1):
+		"""
+		Sets the number of branch executions that can be started immediately, before pacing at ``Rate`` applies.  Default is 1.
+
+		:param: Burst: [Optional] The burst size.  Must be larger than zero
+		:type: Burst: int
+		"""
+		if not isinstance(Burst, int):
+			raise Exception("Burst must be an int (step '{}')".format(self.get_name()))
+		if Burst < 1:
+			raise Exception("Burst must be greater than zero (step '{}')".format(self.get_name()))
+		self._burst = Burst
+
+	def get_iterator_path(self):
+		"""
+		Returns the injection JSONPath to be used to add the iterator value into the Input for a branch
+
+		:returns: str -- The JSONPath for iterator value injection
+		"""
+		return self._iterator_path
+
+	def set_iterator_path(self, IteratorPath="$.iteration"):
+		"""
+		Sets the injection JSONPath to use to add the iterator value into the Input for a branch
+
+		:param: IteratorPath: [Required] The JSONPath in which to inject the iterator value into the Input passed to the branch
+		:type: IteratorPath: str
+		"""
+		self._iterator_path = IteratorPath
+
+	def get_iterations(self):
+		"""
+		Returns the number of branch executions
+
+		:returns: int -- The number of branch executions
+		"""
+		return self._iterations
+
+	def set_iterations(self, Iterations=0):
+		"""
+		Sets the number of branch executions, which must be greater than zero
+
+		:param: Iterations: [Required] The total number of branches to be executed.  Must be larger than zero
+		:type: Iterations: int
+		"""
+		if not isinstance(Iterations, int):
+			raise Exception("Iterations must be an int (step '{}')".format(self.get_name()))
+		if Iterations < 1:
+			raise Exception("Iterations must be greater than zero (step '{}')".format(self.get_name()))
+		self._iterations = Iterations
+
+	def validate(self):
+		"""
+		Validates this instance is correctly specified.
+
+		Raises ``Exception`` with details of the error, if the state is incorrectly defined.
+
+		"""
+		super(RateLimitedParallel, self).validate()
+		self._rlp_build().validate()
+
+	def to_json(self):
+		"""
+		Returns the JSON representation of this instance.
+
+		:returns: dict -- The JSON representation
+
+		"""
+		return self._rlp_build().to_json()
+
+	def _get_expanded_state(self):
+		# Here we are building a branch "on the fly", so do not call super()
+		return self._rlp_build()
+
+	def clone(self, NameFormatString="{}"):
+		"""
+		Returns a clone of this instance, with the clone named per the NameFormatString, to avoid state name clashes.
+
+		If this instance is not an end state, then the next state will also be cloned, to establish a complete clone
+		of the branch form this instance onwards.
+
+		:param NameFormatString: [Required] The naming template to be applied to generate the name of the new instance.
+		:type NameFormatString: str
+
+		:returns: ``RateLimitedParallel`` -- A new instance of this instance and any other instances in its branch.
+		"""
+		if not NameFormatString:
+			raise Exception("NameFormatString must not be None (step '{}')".format(self.get_name()))
+		if not isinstance(NameFormatString, str):
+			raise Exception("NameFormatString must be a str (step '{}')".format(self.get_name()))
+
+		c = RateLimitedParallel(
+			Name=NameFormatString.format(self.get_name()),
+			Comment=self.get_comment(),
+			InputPath=self.get_input_path(),
+			OutputPath=self.get_output_path(),
+			EndState=self.get_end_state(),
+			ResultPath=self.get_result_path(),
+			Iterations=self.get_iterations(),
+			Rate=self.get_rate(),
+			Burst=self.get_burst(),
+			IteratorPath=self.get_iterator_path())
+
+		if self.get_branch_state():
+			c.set_branch_state(BranchState=self.get_branch_state().clone(NameFormatString))
+
+		if self.get_branch_retry_list():
+			c.set_branch_retry_list(BranchRetryList=[ r.clone() for r in self.get_branch_retry_list() ])
+
+		if self.get_retry_list():
+			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
+
+		if self.get_catcher_list():
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
+
+		if self.get_next_state():
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))
+
+		return c
@@ -3,6 +3,11 @@ from ..parallel_state import Parallel
 from ..pass_state import Pass
 from ..state_base import StateBase
 from ..catcher import Catcher
+from ..choice_state import Choice
+from ..choice_rule import ChoiceRule
+from ..comparison import Comparison
+
+_SUCCESS_ROUTE = "Success"
 
 class StateRetryCatchFinally(StateRetryCatch):
 	"""
@@ -10,6 +15,12 @@ class StateRetryCatchFinally(StateRetryCatch):
 	the next state after a catch.
 
 		TaskWithFinally, ParallelWithFinally
+
+	When there are several catchers, the successful completion and each catcher mark the payload with their route, and share
+	a single finally block, after which a ``Choice`` resumes the marked route.  The finally branch is therefore declared once,
+	however many catchers there are, at the cost of about four additional state transitions on every route (the route
+	marking ``Parallel`` and its two branches, and the ``Choice``) - which are billed, and add latency.  A single catcher
+	instead has its own copy of the finally branch, so that the successful completion is not routed.
 	"""
 
 	def __init__(self, Name=None, Comment="", InputPath="$", OutputPath="$", NextState=None, EndState=None, ResultPath="$", RetryList=None, CatcherList=None, FinallyState=None):
@@ -27,6 +38,14 @@ class StateRetryCatchFinally(StateRetryCatch):
 		# Should be implemented by concrete states
 		raise Exception("Concrete state not fully implemented (step '{}')".format(self.get_name()))
 
+	def _catcher_extractor(self, catcher, offset):
+		return Pass(
+			Name="{}-Extractor-Catcher-{}".format(self.get_name(), offset),
+			Comment="Ensures the original result from the state is passed to the supplied catcher, after the finally branch has completed",
+			OutputPath="$.[0]",
+			EndState=False,
+			NextState=catcher.get_next_state())
+
 	def _srcf_build(self):
 
 		if self._constructed_states:
@@ -88,34 +107,66 @@ class StateRetryCatchFinally(StateRetryCatch):
 				EndState=True,
 				NextState=False)
 
-			# Clone for each catcher
 			new_catcher_list = None
-			if self.get_catcher_list():
+			if self.get_catcher_list() and len(self.get_catcher_list()) > 1:
+				# The payload is marked with its route, so that all routes share the finally branch
+				finally_parallel.set_input_path(InputPath="$.[0]")
+
+				def mark_route(route):
+					return Parallel(
+						Name="{}-Route-{}".format(self.get_name(), route),
+						Comment="Marks the result with the route to be resumed after the finally branch has completed",
+						BranchList=[
+							Pass(Name="{}-Route-{}-Payload".format(self.get_name(), route), EndState=True),
+							Pass(Name="{}-Route-{}-Marker".format(self.get_name(), route), ResultAsJSON={ "Route": route }, EndState=True)],
+						EndState=False,
+						NextState=post_parallel)
+
+				choice_list = []
 				new_catcher_list = []
 				offset = 0
 				for catcher in self.get_catcher_list():
-					catcher_extractor = Pass(
-						Name="{}-Extractor-Catcher-{}".format(self.get_name(), offset),
-						Comment="Ensures the original result from the state is passed to the supplied catcher, after the finally branch has completed",
-						OutputPath="$.[0]",
-						EndState=False,
-						NextState=catcher.get_next_state())
-					catcher_parallel = post_parallel.clone("{}-Catcher-{}".format("{}", offset))
+					route = "Catcher-{}".format(offset)
+					catcher_extractor = self._catcher_extractor(catcher, offset)
+					choice_list.append(ChoiceRule(
+						Comparison=Comparison(Variable="$.[1].Route", Comparator="StringEquals", Value=route),
+						NextState=catcher_extractor))
+					new_catcher_list.append(Catcher(ErrorNameList=catcher.get_error_name_list(), NextState=mark_route(route)))
+					offset = offset + 1
+
+				router = Choice(
+					Name="{}-Router".format(self.get_name()),
+					Comment="Resumes the route marked before the finally branch",
+					InputPath="$.[0]",
+					ChoiceList=choice_list,
+					Default=extractor_pass)
+
+				post_parallel.set_comment(Comment="Parallel to manage finally, for all routes")
+				post_parallel.set_end_state(EndState=False)
+				post_parallel.set_next_state(NextState=router)
+
+				s.set_next_state(NextState=mark_route(_SUCCESS_ROUTE))
+
+			else:
+				if self.get_catcher_list():
+					# A single catcher has its own copy of the finally branch, avoiding the routing states
+					catcher = self.get_catcher_list()[0]
+					catcher_parallel = post_parallel.clone("{}-Catcher-0")
 					catcher_parallel.set_comment(Comment="Parallel to manage finally, before supplied catcher is executed")
 					catcher_parallel.set_end_state(False)
-					catcher_parallel.set_next_state(catcher_extractor)
-					new_catcher_list.append(Catcher(ErrorNameList=catcher.get_error_name_list(), NextState=catcher_parallel))
-					offset = offset + 1
+					catcher_parallel.set_next_state(self._catcher_extractor(catcher, 0))
+					new_catcher_list = [ Catcher(ErrorNameList=catcher.get_error_name_list(), NextState=catcher_parallel) ]
+
+				# Successful completion follows the finally branch directly
+				post_parallel.set_comment(Comment="Parallel to manage finally, for successful completion of state")
+				post_parallel.set_end_state(EndState=False)
+				post_parallel.set_next_state(NextState=extractor_pass)
 
-			# Now apply the normal next state
-			post_parallel.set_comment(Comment="Parallel to manage finally, for successful completion of state")
-			post_parallel.set_end_state(EndState=False)
-			post_parallel.set_next_state(NextState=extractor_pass)
+				s.set_next_state(NextState=post_parallel)
 
 			# Ensure the finally branch is executed
 			s.set_catcher_list(CatcherList=new_catcher_list)
 			s.set_end_state(EndState=False)
-			s.set_next_state(NextState=post_parallel)
 
 		else:
 			# No finally branch supplied
@@ -126,10 +177,10 @@ class StateRetryCatchFinally(StateRetryCatch):
 		self._constructed_states = s
 		return self._constructed_states
 
-	def get_child_states(self):
+	def _get_expanded_state(self):
 		# Builds a stand alone branch, so return that rather than self
 		self.validate()
-		return self._srcf_build().get_child_states()
+		return self._srcf_build()
 
 	def validate(self):
 		self._srcf_build().validate()
@@ -205,12 +205,12 @@ class TaskWithFinally(StateRetryCatchFinally):
 			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
 
 		if self.get_catcher_list():
-			c.set_catcher_list(CatcherList=[ c.clone(NameFormatString) for c in self.get_catcher_list() ])
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
 
 		if self.get_next_state():
-			c.set_next_state(NextState=self.get_next_state.clone(NameFormatString))	
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
-		if self.get_finally_state():
-			c.set_finally_state(FinallyState=self.get_finally_state().clone(NameFormatString))
+		if self.get_finally_branch():
+			c.set_finally_branch(FinallyState=self.get_finally_branch().clone(NameFormatString))
 
 		return c
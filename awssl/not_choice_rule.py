@@ -69,3 +69,17 @@ class NotChoiceRule(object):
 
 		return c
 
+	def _compile_predicate(self):
+		compare = self.get_comparison().compile()
+		return lambda document: not compare(document)
+
+	def compile(self):
+		"""
+		Returns a function that evaluates this Choice Rule against an input document.
+
+		:returns: function -- Accepts the input document, and returns the name of the next state if the rule passes, otherwise ``None``
+		"""
+		self.validate()
+		predicate = self._compile_predicate()
+		next_state_name = self.get_next_state().get_name()
+		return lambda document: next_state_name if predicate(document) else None
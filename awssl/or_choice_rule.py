@@ -71,9 +71,37 @@ class OrChoiceRule(object):
 		c = OrChoiceRule()
 
 		if self.get_comparison_list():
-			c.set_comparison_list(ComparisonList=[ c.clone() for c in self.get_comparison_list() ])
+			c.set_comparison_list(ComparisonList=[ comparison.clone() for comparison in self.get_comparison_list() ])
 
 		if self.get_next_state():
 			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))
 
 		return c
+
+	def _compile_predicate(self):
+		predicates = tuple([ comparison.compile() for comparison in self.get_comparison_list() ])
+		if len(predicates) == 1:
+			return predicates[0]
+		if len(predicates) == 2:
+			first, second = predicates
+			return lambda document: first(document) or second(document)
+
+		def compare_any(document):
+			for predicate in predicates:
+				if predicate(document):
+					return True
+			return False
+		return compare_any
+
+	def compile(self):
+		"""
+		Returns a function that evaluates this Choice Rule against an input document.
+
+		The function short-circuits, stopping at the first Comparison that determines the outcome.
+
+		:returns: function -- Accepts the input document, and returns the name of the next state if the rule passes, otherwise ``None``
+		"""
+		self.validate()
+		predicate = self._compile_predicate()
+		next_state_name = self.get_next_state().get_name()
+		return lambda document: next_state_name if predicate(document) else None
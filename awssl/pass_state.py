@@ -131,6 +131,6 @@ class Pass(StateResult):
 			ResultAsJSON=self.get_result())
 
 		if self.get_next_state():
-			c.set_next_state(NextState=self.get_next_state.clone(NameFormatString))	
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
 		return c
@@ -0,0 +1,116 @@
+import datetime
+import re
+
+_TOKEN_RE = re.compile(r"\.?([A-Za-z_][\w\-]*)|\.?\[(\d+)\]|\[\s*'([^']*)'\s*\]|\[\s*\"([^\"]*)\"\s*\]")
+_TIMESTAMP_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(\.\d+)?(Z|[+-]\d{2}:\d{2})$")
+
+def parse_reference_path(Path="$"):
+	"""
+	Parses a Reference Path (a JsonPath that identifies a single node, such as ``$.foo.bar[0]``) into
+	the list of keys and indexes to be applied, in order, to reach that node.
+
+	:param Path: [Required] The Reference Path to be parsed.  Must start with ``$``
+	:type Path: str
+	:returns: list -- ``str`` keys for objects and ``int`` indexes for arrays
+	"""
+	if not Path or not isinstance(Path, str):
+		raise Exception("Reference Path must be a non-empty string")
+	if not Path.startswith("$"):
+		raise Exception("Reference Path must start with '$' ({})".format(Path))
+
+	tokens = []
+	offset = 1
+	while offset < len(Path):
+		m = _TOKEN_RE.match(Path, offset)
+		if not m or m.end() == offset:
+			raise Exception("Unsupported Reference Path ({})".format(Path))
+		name, index, single_quoted, double_quoted = m.groups()
+		if index is not None:
+			tokens.append(int(index))
+		elif name is not None:
+			tokens.append(name)
+		elif single_quoted is not None:
+			tokens.append(single_quoted)
+		else:
+			tokens.append(double_quoted)
+		offset = m.end()
+	return tokens
+
+def compile_reference_path(Path="$"):
+	"""
+	Returns a function that resolves the Reference Path against a document.
+
+	The path is parsed once, so that repeated lookups only pay for the indexing itself.  If the
+	path does not exist in the document then ``Exception`` is raised, consistent with the
+	``States.Runtime`` error raised by AWS Step Functions.
+
+	:param Path: [Required] The Reference Path to be resolved
+	:type Path: str
+	:returns: function -- Accepts the document, and returns the value found at the path
+	"""
+	tokens = parse_reference_path(Path)
+
+	def missing(e):
+		return Exception("Path '{}' could not be found in the input ({})".format(Path, e))
+
+	if len(tokens) == 0:
+		return lambda document: document
+
+	if len(tokens) == 1:
+		t0 = tokens[0]
+		def get_1(document):
+			try:
+				return document[t0]
+			except (KeyError, IndexError, TypeError) as e:
+				raise missing(e)
+		return get_1
+
+	if len(tokens) == 2:
+		t0, t1 = tokens
+		def get_2(document):
+			try:
+				return document[t0][t1]
+			except (KeyError, IndexError, TypeError) as e:
+				raise missing(e)
+		return get_2
+
+	def get_n(document):
+		try:
+			for t in tokens:
+				document = document[t]
+			return document
+		except (KeyError, IndexError, TypeError) as e:
+			raise missing(e)
+	return get_n
+
+def parse_timestamp(Value):
+	"""
+	Parses a timestamp that conforms to the RFC3339 profile of ISO 8601, returning the equivalent
+	naive UTC ``datetime``, or ``None`` if the value is not a valid timestamp.
+
+	:param Value: [Required] The timestamp to be parsed, e.g. ``2016-03-14T01:59:00Z``
+	:type Value: str
+	:returns: ``datetime.datetime`` or ``None``
+	"""
+	try:
+		m = _TIMESTAMP_RE.match(Value)
+	except TypeError:
+		return None
+	if not m:
+		return None
+
+	year, month, day, hour, minute, second, fraction, zone = m.groups()
+	microsecond = 0
+	if fraction:
+		microsecond = int((fraction[1:] + "000000")[:6])
+	try:
+		dt = datetime.datetime(int(year), int(month), int(day), int(hour), int(minute), int(second), microsecond)
+	except ValueError:
+		return None
+	if zone != "Z":
+		offset = datetime.timedelta(hours=int(zone[1:3]), minutes=int(zone[4:6]))
+		if zone[0] == "+":
+			dt = dt - offset
+		else:
+			dt = dt + offset
+	return dt
@@ -174,12 +174,8 @@ class Retrier(object):
 
 		:returns: ``Retrier`` -- A new instance of this instance and any other instances in its branch.
 		"""
-		c = Retrier(
+		return Retrier(
+			ErrorNameList=[ n for n in self.get_error_name_list() ],
 			IntervalSeconds=self.get_interval_seconds(),
 			MaxAttempts=self.get_max_attempts(),
 			BackoffRate=self.get_backoff_rate())
-
-		if self.get_error_name_list():
-			c.set_error_name_list(ErrorNameList=[ n for n in self.get_error_name_list() ])
-
-		return c
@@ -48,6 +48,29 @@ class StateBase(object):
 			comment = Comment
 		self._comment = comment
 
+	def _get_expanded_state(self):
+		# States that generate other states return the start of the generated states
+		return self
+
+	def _get_successor_states(self):
+		# The states that may be executed immediately after this state, within the same branch
+		return []
+
 	def get_child_states(self):
-		return [self]
+		# Iterative walk, so that long chains of states (e.g. unrolled loops) do not exhaust the stack
+		states = []
+		visited = set()
+		pending = [self]
+		while pending:
+			state = pending.pop()
+			if id(state) in visited:
+				continue
+			visited.add(id(state))
+			expanded = state._get_expanded_state()
+			if expanded is not state:
+				pending.append(expanded)
+				continue
+			states.append(state)
+			pending.extend(reversed(state._get_successor_states()))
+		return states
 
@@ -99,13 +99,22 @@ class StateMachine(object):
 		self._asl_version = ASLVersion
 
 	def __str__(self):
+		return dumps(self.to_json(), sort_keys=True, indent=4)
+
+	def to_json(self):
+		"""
+		Returns the JSON representation of the state machine, after validating it.
+
+		:returns: dict -- The JSON representation
+
+		"""
 		self.validate()
 
 		j = self._branch.to_json()
 		j["Comment"] = self.get_comment()
 		j["Version"] = self.get_asl_version()
 
-		return dumps(j, sort_keys=True, indent=4)
+		return j
 
 	def validate(self):
 		"""
@@ -53,8 +53,8 @@ class StateNextEnd(StateInputOutput):
 		if self._end_state:
 			self._next_state = None
 
-	def get_child_states(self):
-		states = super(StateNextEnd, self).get_child_states()
-		if not self.get_end_state():
-			states = states + self.get_next_state().get_child_states()
+	def _get_successor_states(self):
+		states = super(StateNextEnd, self)._get_successor_states()
+		if not self.get_end_state() and self.get_next_state():
+			states = states + [self.get_next_state()]
 		return states
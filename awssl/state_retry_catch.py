@@ -17,11 +17,11 @@ class StateRetryCatch(StateResult):
 		self.set_retry_list(RetryList)
 		self.set_catcher_list(CatcherList)
 
-	def get_child_states(self):
-		states = super(StateRetryCatch, self).get_child_states()
+	def _get_successor_states(self):
+		states = super(StateRetryCatch, self)._get_successor_states()
 		if self.get_catcher_list() and len(self.get_catcher_list()) > 0:
 			for catcher in self.get_catcher_list():
-				states = states + catcher.get_next_state().get_child_states()
+				states = states + [catcher.get_next_state()]
 		return states
 
 	def validate(self):
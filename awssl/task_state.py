@@ -1,3 +1,4 @@
+from copy import deepcopy
 from .state_retry_catch import StateRetryCatch
 
 class Task(StateRetryCatch):
@@ -37,12 +38,14 @@ class Task(StateRetryCatch):
 	:type: TimeoutSeconds: int
 	:param: HeartbeatSeconds: [Optional]  The number of seconds between heartbeats from an ``Activity``, to indicate it is still running
 	:type: HeartbeatSeconds: int
+	:param: Parameters: [Optional] The JSON passed to the resource in place of the Input.  Keys ending in ``.$`` take their value from the Input, using the key's value as a JSONPath
+	:type: Parameters: dict
 
 	"""
 
 	def __init__(self, Name=None, Comment="", InputPath="$", OutputPath="$", NextState=None, EndState=None, 
 					ResultPath="$", RetryList=None, CatcherList=None,
-					ResourceArn=None, TimeoutSeconds=99999999, HeartbeatSeconds=99999999):
+					ResourceArn=None, TimeoutSeconds=99999999, HeartbeatSeconds=99999999, Parameters=None):
 		"""
 		Initializer for the Task state.
 
@@ -75,6 +78,8 @@ class Task(StateRetryCatch):
 		:type: TimeoutSeconds: int
 		:param: HeartbeatSeconds: [Optional]  The number of seconds between heartbeats from an ``Activity``, to indicate it is still running
 		:type: HeartbeatSeconds: int
+		:param: Parameters: [Optional] The JSON passed to the resource in place of the Input.  Keys ending in ``.$`` take their value from the Input, using the key's value as a JSONPath
+		:type: Parameters: dict
 
 		"""
 		super(Task, self).__init__(Name=Name, Type="Task", Comment=Comment, 
@@ -83,9 +88,11 @@ class Task(StateRetryCatch):
 		self._resource_arn = None
 		self._timeout_seconds = None
 		self._heartbeat_seconds = None
+		self._parameters = None
 		self.set_resource_arn(ResourceArn)
 		self.set_timeout_seconds(TimeoutSeconds)
 		self.set_heartbeat_seconds(HeartbeatSeconds)
+		self.set_parameters(Parameters)
 
 	def validate(self):
 		"""
@@ -109,6 +116,8 @@ class Task(StateRetryCatch):
 			j["TimeoutSeconds"] = self.get_timeout_seconds()
 		if self.get_heartbeat_seconds():
 			j["HeartbeatSeconds"] = self.get_heartbeat_seconds()
+		if self.get_parameters():
+			j["Parameters"] = self.get_parameters()
 		return j
 
 	def get_resource_arn(self):
@@ -182,6 +191,30 @@ class Task(StateRetryCatch):
 				raise Exception("HeartbeatSeconds must be greater than zero if specified for Task (step '{}')".format(self.get_name()))
 		self._heartbeat_seconds = HeartbeatSeconds
 
+	def get_parameters(self):
+		"""
+		Returns the JSON that will be passed to the resource in place of the Input, or ``None`` if the Input is passed.
+
+		:returns: dict -- The parameters for the state.
+		"""
+		return self._parameters
+
+	def set_parameters(self, Parameters=None):
+		"""
+		Sets the JSON that will be passed to the resource in place of the Input.  Keys ending in ``.$`` take their
+		value from the Input, using the key's value as a JSONPath.  Default value is ``None``, so that the Input is passed.
+
+		:param: Parameters: [Optional] The JSON passed to the resource in place of the Input
+		:type: Parameters: dict
+		"""
+		if Parameters is not None:
+			if not isinstance(Parameters, dict):
+				raise Exception("Parameters must be a dict if specified for Task (step '{}')".format(self.get_name()))
+			for k, v in Parameters.items():
+				if k.endswith(".$") and not isinstance(v, str):
+					raise Exception("Parameters key '{}' must have a JSONPath str value for Task (step '{}')".format(k, self.get_name()))
+		self._parameters = Parameters
+
 	def clone(self, NameFormatString="{}"):
 		"""
 		Returns a clone of this instance, with the clone named per the NameFormatString, to avoid state name clashes.
@@ -208,15 +241,16 @@ class Task(StateRetryCatch):
 			ResultPath=self.get_result_path(),
 			ResourceArn=self.get_resource_arn(),
 			TimeoutSeconds=self.get_timeout_seconds(),
-			HeartbeatSeconds=self.get_heartbeat_seconds())
+			HeartbeatSeconds=self.get_heartbeat_seconds(),
+			Parameters=deepcopy(self.get_parameters()))
 
 		if self.get_retry_list():
 			c.set_retry_list(RetryList=[ r.clone() for r in self.get_retry_list() ])
 
 		if self.get_catcher_list():
-			c.set_catcher_list(CatcherList=[ c.clone(NameFormatString) for c in self.get_catcher_list() ])
+			c.set_catcher_list(CatcherList=[ catcher.clone(NameFormatString) for catcher in self.get_catcher_list() ])
 
 		if self.get_next_state():
-			c.set_next_state(NextState=self.get_next_state.clone(NameFormatString))	
+			c.set_next_state(NextState=self.get_next_state().clone(NameFormatString))	
 
 		return c
@@ -0,0 +1,5 @@
+from .choice_batch import evaluate_choice_batch
+from .retry_simulator import simulate_retries
+from .history_estimator import estimate_history_events
+from .optimizer import optimize_state_machine
+from .partitioner import partition_state_machine
@@ -0,0 +1,161 @@
+import operator
+from ..choice_state import Choice
+from ..choice_rule import ChoiceRule
+from ..not_choice_rule import NotChoiceRule
+from ..and_choice_rule import AndChoiceRule
+from ..or_choice_rule import OrChoiceRule
+from ..comparison import _STRING_TYPES, _NUMERIC_TYPES, _OPERATORS
+from ..reference_path import parse_timestamp
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+def _require_numpy():
+	if np is None:
+		raise Exception("numpy must be installed to evaluate Choice states in batch")
+
+def _get_column(columns, variable):
+	column = columns.get(variable, None)
+	if column is None:
+		raise Exception("No column supplied for Variable '{}'".format(variable))
+	if isinstance(column, np.ndarray):
+		return column
+	# numpy would coerce a mixed-type sequence to a common type (e.g. 1 and "1" to strings, True to 1), changing the result
+	if len(set([ type(v) for v in column ])) > 1:
+		return np.array(column, dtype=object)
+	return np.asarray(column)
+
+def _object_mask(column, value_types, op, value, exclude_bool=False):
+	# Slow path for mixed-type columns: the type check must be applied element by element
+	def compare(v):
+		if exclude_bool and isinstance(v, bool):
+			return False
+		return isinstance(v, value_types) and op(v, value)
+	return np.frompyfunc(compare, 1, 1)(column).astype(bool)
+
+def _comparison_mask(comparison, columns):
+	comparator = comparison.get_comparator()
+	value = comparison.get_value()
+	column = _get_column(columns, comparison.get_variable())
+	kind = column.dtype.kind
+
+	if comparator.startswith("Numeric"):
+		op = _OPERATORS[comparator[len("Numeric"):]]
+		if kind in "iuf":
+			return op(column, value)
+		if kind == "O":
+			return _object_mask(column, _NUMERIC_TYPES, op, value, exclude_bool=True)
+		return np.zeros(column.shape, dtype=bool)
+
+	if comparator.startswith("String"):
+		op = _OPERATORS[comparator[len("String"):]]
+		if kind in "US":
+			return op(column, value)
+		if kind == "O":
+			return _object_mask(column, _STRING_TYPES, op, value)
+		return np.zeros(column.shape, dtype=bool)
+
+	if comparator.startswith("Boolean"):
+		if kind == "b":
+			return column == value
+		if kind == "O":
+			return _object_mask(column, (bool,), operator.eq, value)
+		return np.zeros(column.shape, dtype=bool)
+
+	op = _OPERATORS[comparator[len("Timestamp"):]]
+	timestamp = parse_timestamp(value)
+	if timestamp is None:
+		raise Exception("Invalid Timestamp Value provided for ChoiceRule (Comparator: {}, Value: {})".format(comparator, value))
+	if kind == "M":
+		return op(column, np.datetime64(timestamp))
+	if kind in "USO":
+		# Strings have to be parsed individually - supply datetime64 columns to stay vectorized
+		def compare(v):
+			t = parse_timestamp(v)
+			return t is not None and op(t, timestamp)
+		return np.frompyfunc(compare, 1, 1)(column).astype(bool)
+	return np.zeros(column.shape, dtype=bool)
+
+def _rule_mask(rule, columns):
+	if isinstance(rule, ChoiceRule):
+		return _comparison_mask(rule.get_comparison(), columns)
+	if isinstance(rule, NotChoiceRule):
+		return ~_comparison_mask(rule.get_comparison(), columns)
+	masks = [ _comparison_mask(c, columns) for c in rule.get_comparison_list() ]
+	if isinstance(rule, AndChoiceRule):
+		return np.logical_and.reduce(masks)
+	return np.logical_or.reduce(masks)
+
+def evaluate_choice_batch(ChoiceState=None, Columns=None, ReturnMasks=False):
+	"""
+	Evaluates the ``ChoiceList`` of a ``Choice`` state over a columnar set of inputs, using vectorized comparisons.
+
+	``Columns`` maps each ``Variable`` used in the Choice Rules to an array holding that value for every input.  Variables
+	are relative to the input after ``InputPath`` has been applied, as for the Choice state itself.  Each input is routed to
+	the first Choice Rule that passes, or to the ``Default`` state.
+
+	Columns of numeric, string, boolean and ``datetime64`` dtype are compared without any Python level iteration.  Object
+	columns are supported for mixed-type data, but are compared element by element.  As per the ASL specification, a value
+	that is not of the type expected by the Comparator does not match; missing values (``None``, ``NaN``) also do not match.
+
+	The result is a dict of the form::
+
+		{
+			"Counts": { "NextStateName": count, ... },
+			"NoMatch": count,
+			"Masks": { "NextStateName": bool array, ... }
+		}
+
+	where ``NoMatch`` counts inputs that would raise ``States.NoChoiceMatched`` (only possible if there is no ``Default``),
+	and ``Masks`` is only present if ``ReturnMasks`` is ``True``.
+
+	:param ChoiceState: [Required] The ``Choice`` state to be evaluated
+	:type ChoiceState: ``Choice``
+	:param Columns: [Required] The input data, as a mapping of ``Variable`` path to array of values
+	:type Columns: dict
+	:param ReturnMasks: [Optional] Whether to return a boolean mask per next state, as well as counts.  Default is ``False``
+	:type ReturnMasks: bool
+	:returns: dict
+	"""
+	_require_numpy()
+	if not isinstance(ChoiceState, Choice):
+		raise Exception("ChoiceState must be an instance of Choice")
+	if not Columns or not isinstance(Columns, dict):
+		raise Exception("Columns must be a non-empty dict of Variable to array of values")
+	ChoiceState.validate()
+
+	lengths = set([ len(c) for c in Columns.values() ])
+	if len(lengths) != 1:
+		raise Exception("All Columns must have the same length")
+	size = lengths.pop()
+
+	masks = {}
+	remaining = np.ones(size, dtype=bool)
+	for rule in ChoiceState.get_choice_list():
+		matched = _rule_mask(rule, Columns) & remaining
+		remaining &= ~matched
+		name = rule.get_next_state().get_name()
+		if name in masks:
+			masks[name] |= matched
+		else:
+			masks[name] = matched
+
+	no_match = 0
+	if ChoiceState.get_default():
+		name = ChoiceState.get_default().get_name()
+		if name in masks:
+			masks[name] |= remaining
+		else:
+			masks[name] = remaining
+	else:
+		no_match = int(np.count_nonzero(remaining))
+
+	result = {
+		"Counts": dict([ (name, int(np.count_nonzero(mask))) for name, mask in masks.items() ]),
+		"NoMatch": no_match
+	}
+	if ReturnMasks:
+		result["Masks"] = masks
+	return result
@@ -0,0 +1,75 @@
+from ..state_machine import StateMachine
+
+def get_definition(Definition=None):
+	"""
+	Returns the JSON representation of a state machine, accepting either a ``StateMachine`` or its JSON representation.
+
+	:param Definition: [Required] The state machine
+	:type Definition: ``StateMachine`` or dict
+	:returns: dict
+	"""
+	if isinstance(Definition, StateMachine):
+		return Definition.to_json()
+	if not isinstance(Definition, dict) or "StartAt" not in Definition or "States" not in Definition:
+		raise Exception("Definition must be a StateMachine, or the JSON representation of a state machine")
+	return Definition
+
+def get_transitions(State=None):
+	"""
+	Returns the names of all the states that can follow the supplied state (as JSON) within its branch, in the order of
+	``Choices``, ``Default``, ``Next`` and then ``Catch``.
+
+	:param State: [Required] The JSON representation of a state
+	:type State: dict
+	:returns: list of str
+	"""
+	names = []
+	for choice in State.get("Choices", []):
+		names.append(choice["Next"])
+	if State.get("Default"):
+		names.append(State["Default"])
+	if State.get("Next"):
+		names.append(State["Next"])
+	for catcher in State.get("Catch", []):
+		names.append(catcher["Next"])
+	return names
+
+def get_predecessors(Branch=None):
+	"""
+	Returns a mapping of state name to the list of names of the states that transition to it, within the branch.
+
+	:param Branch: [Required] The JSON representation of a branch (or state machine)
+	:type Branch: dict
+	:returns: dict
+	"""
+	predecessors = dict([ (name, []) for name in Branch["States"] ])
+	for name, state in Branch["States"].items():
+		for next_name in get_transitions(state):
+			predecessors.setdefault(next_name, []).append(name)
+	return predecessors
+
+def order_states(Branch=None):
+	"""
+	Returns the names of the states reachable from ``StartAt`` within the branch, in topological order (i.e. each state
+	appears before the states it transitions to, other than where there are loops).
+
+	:param Branch: [Required] The JSON representation of a branch (or state machine)
+	:type Branch: dict
+	:returns: list of str
+	"""
+	states = Branch["States"]
+	visited = set([Branch["StartAt"]])
+	post_order = []
+	stack = [ (Branch["StartAt"], iter(get_transitions(states[Branch["StartAt"]]))) ]
+	while stack:
+		name, transitions = stack[-1]
+		for next_name in transitions:
+			if next_name not in visited and next_name in states:
+				visited.add(next_name)
+				stack.append((next_name, iter(get_transitions(states[next_name]))))
+				break
+		else:
+			stack.pop()
+			post_order.append(name)
+	post_order.reverse()
+	return post_order
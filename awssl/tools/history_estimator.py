@@ -0,0 +1,265 @@
+from ..state_machine import StateMachine
+from .graph import get_definition, get_transitions, order_states
+
+HISTORY_EVENT_LIMIT = 25000
+
+# History events recorded for a state that completes at the first attempt
+_STATE_EVENTS = {
+	"Pass": 2,		# PassStateEntered, PassStateExited
+	"Wait": 2,		# WaitStateEntered, WaitStateExited
+	"Choice": 2,	# ChoiceStateEntered, ChoiceStateExited
+	"Succeed": 2,	# SucceedStateEntered, SucceedStateExited
+	"Fail": 1,		# FailStateEntered
+	"Task": 5,		# TaskStateEntered, (LambdaFunction|Activity)Scheduled, Started, Succeeded, TaskStateExited
+	"Parallel": 4	# ParallelStateEntered, ParallelStateStarted, ParallelStateSucceeded, ParallelStateExited
+}
+
+# Additional history events recorded for each failed attempt of a state
+_FAILED_ATTEMPT_EVENTS = {
+	"Task": 3,		# (LambdaFunction|Activity)Scheduled, Started, Failed
+	"Parallel": 2	# ParallelStateStarted, ParallelStateFailed
+}
+
+# ExecutionStarted, and ExecutionSucceeded or ExecutionFailed
+_EXECUTION_EVENTS = 2
+
+class _Estimator(object):
+
+	def __init__(self, failure_probability):
+		self._p = failure_probability
+		self._totals = {}
+		self.loops = False
+		self.expected_breakdown = {}
+		self.worst_breakdown = {}
+
+	def _retries(self, state):
+		return sum([ r.get("MaxAttempts", 3) for r in state.get("Retry", []) ])
+
+	def _expected_failed_attempts(self, state):
+		return sum([ self._p ** k for k in range(1, self._retries(state) + 1) ])
+
+	def _own(self, state):
+		# Events of the state itself, excluding any nested branches, as (expected, worst)
+		state_type = state["Type"]
+		events = _STATE_EVENTS.get(state_type, 2)
+		failed = _FAILED_ATTEMPT_EVENTS.get(state_type, 0)
+		return (events + failed * self._expected_failed_attempts(state), events + failed * self._retries(state))
+
+	def _attempts(self, state):
+		# Number of times any nested branches run, as (expected, worst)
+		return (1 + self._expected_failed_attempts(state), 1 + self._retries(state))
+
+	def _successors(self, state):
+		# Next states, as (name, expected weight).  Next is only taken when the final attempt succeeds
+		successors = []
+		choices = [ c["Next"] for c in state.get("Choices", []) ]
+		if state.get("Default"):
+			choices.append(state["Default"])
+		for name in choices:
+			successors.append((name, 1.0 / len(choices)))
+		failure = self._p ** (self._retries(state) + 1) if state["Type"] == "Task" else 0.0
+		if state.get("Next"):
+			successors.append((state["Next"], 1.0 - failure))
+		for catcher in state.get("Catch", []):
+			successors.append((catcher["Next"], failure / len(state["Catch"])))
+		return successors
+
+	def total(self, branch, name, stack=None):
+		"""
+		Returns (expected, worst) events from entering the named state until the branch completes
+		"""
+		key = (id(branch), name)
+		if key in self._totals:
+			return self._totals[key]
+		stack = stack or set()
+		if key in stack:
+			# Loops cannot be bounded statically, so each loop is counted once
+			self.loops = True
+			return (0, 0)
+		stack.add(key)
+
+		state = branch["States"][name]
+		expected, worst = self._own(state)
+		expected_attempts, worst_attempts = self._attempts(state)
+		for nested in state.get("Branches", []):
+			nested_expected, nested_worst = self.total(nested, nested["StartAt"])
+			expected += expected_attempts * nested_expected
+			worst += worst_attempts * nested_worst
+
+		successor_worst = 0
+		for next_name, weight in self._successors(state):
+			next_expected, next_worst = self.total(branch, next_name, stack)
+			expected += weight * next_expected
+			successor_worst = max(successor_worst, next_worst)
+		worst += successor_worst
+
+		stack.discard(key)
+		self._totals[key] = (expected, worst)
+		return self._totals[key]
+
+	def attribute_expected(self, branch, weight):
+		# The probability of reaching each state is accumulated in topological order, so each state is visited once
+		# however many paths merge into it.  Transitions back to an earlier state (loops) are counted once
+		order = order_states(branch)
+		position = dict([ (name, i) for i, name in enumerate(order) ])
+		weights = { branch["StartAt"]: weight }
+		for name in order:
+			w = weights.get(name, 0.0)
+			if w == 0:
+				continue
+			state = branch["States"][name]
+			self.expected_breakdown[name] = self.expected_breakdown.get(name, 0) + w * self._own(state)[0]
+			for nested in state.get("Branches", []):
+				self.attribute_expected(nested, w * self._attempts(state)[0])
+			for next_name, next_weight in self._successors(state):
+				if position.get(next_name, -1) > position[name]:
+					weights[next_name] = weights.get(next_name, 0.0) + w * next_weight
+
+	def attribute_worst(self, branch, name, weight, visited=None):
+		visited = visited or set()
+		if name in visited:
+			return
+		visited.add(name)
+
+		state = branch["States"][name]
+		worst_attempts = self._attempts(state)[1]
+		self.worst_breakdown[name] = self.worst_breakdown.get(name, 0) + weight * self._own(state)[1]
+		for nested in state.get("Branches", []):
+			self.attribute_worst(nested, nested["StartAt"], weight * worst_attempts)
+
+		# Follow the successor with the largest worst case
+		candidates = [ (self.total(branch, n)[1], n) for n in get_transitions(state) ]
+		if candidates:
+			self.attribute_worst(branch, max(candidates)[1], weight, visited)
+
+def _find_ext_states(state, found):
+	# Walks the declared (unexpanded) states, returning the ext states by name
+	if state is None or id(state) in found["_seen"]:
+		return
+	found["_seen"].add(id(state))
+	is_ext = type(state).__module__.startswith("awssl.ext")
+	if is_ext:
+		found[state.get_name()] = state
+
+	related = []
+	for getter in ["get_next_state", "get_default", "get_branch_state", "get_finally_branch"]:
+		if hasattr(state, getter):
+			related.append(getattr(state, getter)())
+	for getter in ["get_catcher_list", "get_choice_list", "get_branch_list"]:
+		if hasattr(state, getter) and getattr(state, getter)():
+			for o in getattr(state, getter)():
+				related.append(o if not hasattr(o, "get_start_state") else o.get_start_state())
+	if not is_ext:
+		# The branches of ext states are generated, so only the declared branches are walked
+		for o in getattr(state, "_branches", None) or []:
+			related.append(o.get_start_state())
+
+	for o in related:
+		if o is not None and not hasattr(o, "get_type"):
+			# Catchers and Choice Rules reference the state to be executed
+			o = o.get_next_state()
+		_find_ext_states(o, found)
+
+def _expansion(state):
+	if hasattr(state, "get_shards"):
+		# The iterations are processed by child executions, each with its own history
+		return len(state.get_shards())
+	if hasattr(state, "get_iterations"):
+		return state.get_iterations()
+	if hasattr(state, "get_from") and hasattr(state, "get_to"):
+		iterations = len(range(state.get_from(), state.get_to(), state.get_step()))
+		if getattr(state, "get_chunk_size", None) and state.get_chunk_size():
+			# Each branch execution processes a batch of iterator values
+			return -(-iterations // state.get_chunk_size())
+		return iterations
+	return 1
+
+def estimate_history_events(Definition=None, FailureProbability=0.0, Limit=HISTORY_EVENT_LIMIT, RiskFraction=0.8):
+	"""
+	Estimates the number of execution history events that an execution of the state machine will generate, so that
+	state machines at risk of exceeding the AWS Step Functions history limit (25,000 events) can be identified before deployment.
+
+	The estimate is made against the generated ASL, so that the unrolling of ``For`` and ``LimitedParallel`` is accounted for.
+
+	* The expected count assumes each ``Task`` attempt fails with ``FailureProbability`` (default zero), and that ``Choice`` states
+	  select each of their next states with equal likelihood.  A ``Task`` continues to its ``Next`` state only if an attempt succeeds;
+	  once its retries are exhausted it follows each of its ``Catcher`` states with equal likelihood, or the execution fails.
+	* The worst case count assumes every ``Retrier`` is exhausted before the final attempt, and follows whichever ``Choice`` or
+	  ``Catcher`` path generates the most events.
+
+	Loops (via ``Choice`` states) cannot be bounded statically, so each loop is counted once and ``Loops`` is set in the result.
+
+	If a ``StateMachine`` is supplied, the events are also attributed to each of its ``ext`` states (by state name), so that the
+	largest contributor can be identified.
+
+	The result is a dict of the form::
+
+		{
+			"Expected": float,
+			"WorstCase": int,
+			"Limit": int,
+			"AtRisk": bool,
+			"Loops": bool,
+			"ExtStates": [ { "Name": str, "Type": str, "Expansion": int, "Expected": float, "WorstCase": int }, ... ],
+			"LargestContributor": str
+		}
+
+	where ``AtRisk`` is ``True`` if the worst case reaches ``RiskFraction`` of the ``Limit``, and ``ExtStates`` is ordered by
+	decreasing worst case contribution.
+
+	:param Definition: [Required] The state machine to be analysed
+	:type Definition: ``StateMachine`` or dict
+	:param FailureProbability: [Optional] The probability that any ``Task`` attempt fails.  Default is 0.0
+	:type FailureProbability: float
+	:param Limit: [Optional] The maximum number of history events for an execution.  Default is 25000
+	:type Limit: int
+	:param RiskFraction: [Optional] The fraction of the ``Limit`` at which the state machine is flagged as at risk.  Default is 0.8
+	:type RiskFraction: float
+	:returns: dict
+	"""
+	if not isinstance(FailureProbability, (int, float)) or FailureProbability < 0 or FailureProbability >= 1:
+		raise Exception("FailureProbability must be a float in the range [0, 1)")
+
+	definition = get_definition(Definition)
+	estimator = _Estimator(float(FailureProbability))
+	expected, worst = estimator.total(definition, definition["StartAt"])
+	estimator.attribute_expected(definition, 1.0)
+	estimator.attribute_worst(definition, definition["StartAt"], 1)
+
+	ext_states = []
+	if isinstance(Definition, StateMachine):
+		found = { "_seen": set() }
+		_find_ext_states(Definition.get_start_state(), found)
+		del found["_seen"]
+
+		def owner(name):
+			owners = [ n for n in found if name == n or name.startswith(n + "-") ]
+			return max(owners, key=len) if owners else None
+
+		contributions = dict([ (n, [0.0, 0]) for n in found ])
+		for breakdown, index in [(estimator.expected_breakdown, 0), (estimator.worst_breakdown, 1)]:
+			for name, events in breakdown.items():
+				o = owner(name)
+				if o:
+					contributions[o][index] += events
+
+		for name, (ext_expected, ext_worst) in contributions.items():
+			ext_states.append({
+				"Name": name,
+				"Type": type(found[name]).__name__,
+				"Expansion": _expansion(found[name]),
+				"Expected": ext_expected,
+				"WorstCase": ext_worst
+			})
+		ext_states.sort(key=lambda e: (-e["WorstCase"], e["Name"]))
+
+	worst = worst + _EXECUTION_EVENTS
+	return {
+		"Expected": expected + _EXECUTION_EVENTS,
+		"WorstCase": worst,
+		"Limit": Limit,
+		"AtRisk": worst >= Limit * RiskFraction,
+		"Loops": estimator.loops,
+		"ExtStates": ext_states,
+		"LargestContributor": ext_states[0]["Name"] if ext_states else None
+	}
@@ -0,0 +1,224 @@
+import re
+from copy import deepcopy
+from .graph import get_definition, get_transitions, get_predecessors, order_states
+
+# States whose InputPath and OutputPath may absorb the filtering of an adjacent Pass state
+_FILTER_TYPES = [ "Task", "Pass", "Parallel", "Wait" ]
+_INPUT_FILTER_TYPES = _FILTER_TYPES + [ "Choice", "Succeed" ]
+
+# Keys that a Pass state may have and still be only a filter of its input
+_PATH_ONLY_KEYS = set([ "Type", "Comment", "InputPath", "OutputPath", "ResultPath", "Next", "End" ])
+
+# Reference paths that can be composed by concatenation, e.g. "$.a" then "$.[0]" is "$.a.[0]"
+_SIMPLE_PATH = re.compile(r"^\$(\.[A-Za-z_][A-Za-z0-9_\-]*|\.?\[[0-9]+\])*$")
+
+def _compose(first, second):
+	"""
+	Returns the path equivalent to applying first and then second, or None if they cannot be composed
+	"""
+	if first == "$":
+		return second
+	if second == "$":
+		return first
+	if _SIMPLE_PATH.match(first) and _SIMPLE_PATH.match(second):
+		return first + second[1:]
+	return None
+
+def _get_filter(state):
+	"""
+	Returns the path equivalent to the state if it is a Pass state that only filters its input, otherwise None
+	"""
+	if state["Type"] != "Pass" or not set(state.keys()).issubset(_PATH_ONLY_KEYS):
+		return None
+	if state.get("ResultPath", "$") != "$":
+		return None
+	return _compose(state.get("InputPath", "$"), state.get("OutputPath", "$"))
+
+def _redirect(branch, old_name, new_name):
+	# Replaces all transitions to old_name within the branch
+	if branch["StartAt"] == old_name:
+		branch["StartAt"] = new_name
+	for state in branch["States"].values():
+		for choice in state.get("Choices", []):
+			if choice["Next"] == old_name:
+				choice["Next"] = new_name
+		if state.get("Default") == old_name:
+			state["Default"] = new_name
+		if state.get("Next") == old_name:
+			state["Next"] = new_name
+		for catcher in state.get("Catch", []):
+			if catcher["Next"] == old_name:
+				catcher["Next"] = new_name
+
+def _only_next_referrers(branch, name, predecessors):
+	"""
+	Returns the states that transition to the named state, if they all do so only via Next and could end the branch instead
+	"""
+	if branch["StartAt"] == name:
+		return None
+	referrers = [ branch["States"][p] for p in set(predecessors.get(name, [])) ]
+	for state in referrers:
+		if state["Type"] not in _FILTER_TYPES or get_transitions(state).count(name) != 1 or state.get("Next") != name:
+			return None
+	return referrers
+
+def _end_at(state):
+	state.pop("Next", None)
+	state["End"] = True
+
+def _fuse_state(branch, name, path, predecessors):
+	"""
+	Attempts to remove the named path-only Pass state, returning True if it was removed
+	"""
+	states = branch["States"]
+	state = states[name]
+	next_name = state.get("Next")
+	next_state = states.get(next_name) if next_name else None
+
+	if next_state is not None and next_state["Type"] == "Fail":
+		# The input of a Fail state is discarded
+		_redirect(branch, name, next_name)
+		return True
+
+	if path == "$":
+		# Identity
+		if next_state is not None:
+			_redirect(branch, name, next_name)
+			return True
+		referrers = _only_next_referrers(branch, name, predecessors)
+		if referrers:
+			for referrer in referrers:
+				_end_at(referrer)
+			return True
+		return False
+
+	# Absorb into the OutputPath of the states that precede it
+	referrers = _only_next_referrers(branch, name, predecessors)
+	if referrers:
+		composed = [ _compose(r.get("OutputPath", "$"), path) for r in referrers ]
+		if None not in composed:
+			for referrer, output_path in zip(referrers, composed):
+				referrer["OutputPath"] = output_path
+				if next_state is None:
+					_end_at(referrer)
+				else:
+					referrer["Next"] = next_name
+			return True
+
+	# Absorb into the InputPath of the state that follows it, provided nothing else transitions to that state.  A Catcher
+	# places the error into the raw input of the state, so its ResultPath must also replace that input entirely
+	if next_state is not None and next_state["Type"] in _INPUT_FILTER_TYPES and next_state.get("ResultPath", "$") == "$" \
+			and all(c.get("ResultPath", "$") == "$" for c in next_state.get("Catch", [])) \
+			and set(predecessors.get(next_name, [])) == set([name]) and get_transitions(state).count(next_name) == 1:
+		input_path = _compose(path, next_state.get("InputPath", "$"))
+		if input_path is not None:
+			next_state["InputPath"] = input_path
+			_redirect(branch, name, next_name)
+			return True
+
+	return False
+
+def _fuse_branch(branch, fused):
+	for state in branch["States"].values():
+		for nested in state.get("Branches", []):
+			_fuse_branch(nested, fused)
+
+	changed = True
+	while changed:
+		changed = False
+		predecessors = get_predecessors(branch)
+		for name in order_states(branch):
+			path = _get_filter(branch["States"][name])
+			if path is not None and _fuse_state(branch, name, path, predecessors):
+				del branch["States"][name]
+				fused.append(name)
+				changed = True
+				break
+
+def _remove_unreachable(branch, unreachable):
+	reachable = set(order_states(branch))
+	for name in list(branch["States"].keys()):
+		if name not in reachable:
+			del branch["States"][name]
+			unreachable.append(name)
+	for state in branch["States"].values():
+		for nested in state.get("Branches", []):
+			_remove_unreachable(nested, unreachable)
+
+def _expected_transitions(branch, weight=1.0):
+	"""
+	Returns the expected number of states entered when the branch is executed, assuming no errors and that ``Choice``
+	states select each of their next states with equal likelihood.  Loops are counted once.
+	"""
+	order = order_states(branch)
+	position = dict([ (name, i) for i, name in enumerate(order) ])
+	weights = { branch["StartAt"]: weight }
+	total = 0.0
+	for name in order:
+		state = branch["States"][name]
+		w = weights.get(name, 0.0)
+		total += w
+		for nested in state.get("Branches", []):
+			total += _expected_transitions(nested, w)
+
+		choices = [ c["Next"] for c in state.get("Choices", []) ]
+		if state.get("Default"):
+			choices.append(state["Default"])
+		successors = [ (n, 1.0 / len(choices)) for n in choices ]
+		if state.get("Next"):
+			successors.append((state["Next"], 1.0))
+		for next_name, share in successors:
+			if position.get(next_name, -1) > position[name]:
+				weights[next_name] = weights.get(next_name, 0.0) + w * share
+	return total
+
+def optimize_state_machine(Definition=None):
+	"""
+	Reduces the number of state transitions (and so the cost) of executions of the state machine, by removing the ``Pass`` states
+	that only filter their input, such as those generated by the ``ext`` states, and any states that cannot be reached.
+
+	The optimization is applied to the generated ASL, which is not modified - a new definition is returned.  A ``Pass`` state whose
+	``InputPath`` and ``OutputPath`` are its only effect, and whose ``ResultPath`` is "$", is:
+
+	* removed if it is an identity, with the states that transition to it transitioning to its successor (or ending the branch)
+	* otherwise fused into the ``OutputPath`` of the states whose ``Next`` it is, if nothing else transitions to it
+	* otherwise fused into the ``InputPath`` of its successor, if nothing else transitions to the successor and the ``ResultPath`` of
+	  the successor, and of each of its ``Catchers``, is "$"
+	* removed if its successor is a ``Fail`` state, which discards its input
+
+	Paths are only combined where both are reference paths without wildcards or filters.  Note that a removed ``Pass`` state can no
+	longer raise ``States.Runtime`` for a path that does not exist in its input.
+
+	The result is a dict of the form::
+
+		{
+			"Definition": dict,
+			"FusedStates": [ str, ... ],
+			"UnreachableStates": [ str, ... ],
+			"Transitions": { "Before": float, "After": float, "Saved": float }
+		}
+
+	where ``Transitions`` are the expected number of states entered per execution, assuming no errors and that ``Choice`` states
+	select each of their next states with equal likelihood.
+
+	:param Definition: [Required] The state machine to be optimized
+	:type Definition: ``StateMachine`` or dict
+	:returns: dict
+	"""
+	original = get_definition(Definition)
+	definition = deepcopy(original)
+
+	fused = []
+	unreachable = []
+	_remove_unreachable(definition, unreachable)
+	_fuse_branch(definition, fused)
+	_remove_unreachable(definition, unreachable)
+
+	before = _expected_transitions(original)
+	after = _expected_transitions(definition)
+	return {
+		"Definition": definition,
+		"FusedStates": sorted(fused),
+		"UnreachableStates": sorted(unreachable),
+		"Transitions": { "Before": before, "After": after, "Saved": before - after }
+	}
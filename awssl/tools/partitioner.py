@@ -0,0 +1,322 @@
+import json
+import re
+from copy import deepcopy
+from .graph import get_definition, get_transitions, get_predecessors, order_states
+from .optimizer import _compose
+
+# Synchronous invocation of a child state machine, returning its output as JSON rather than as a string
+_START_EXECUTION_SYNC = "arn:aws:states:::states:startExecution.sync:2"
+
+# Maximum size of a state machine definition accepted by AWS Step Functions
+_MAX_DEFINITION_BYTES = 1048576
+
+# States that may be part of a sequence moved into a child, provided they only transition via Next
+_SEQUENCE_TYPES = [ "Task", "Pass", "Parallel", "Wait" ]
+
+_INVALID_NAME_CHARS = re.compile(r"[^A-Za-z0-9_\-]")
+_MAX_NAME_LENGTH = 80
+
+def _size(definition):
+	"""
+	Returns the size in bytes of the compact JSON of the definition
+	"""
+	return len(json.dumps(definition, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+
+def _count(branch):
+	"""
+	Returns the number of states in the branch, including those within the branches of its Parallel states
+	"""
+	return sum([ _state_count(state) for state in branch["States"].values() ])
+
+def _state_count(state):
+	return 1 + sum([ _count(nested) for nested in state.get("Branches", []) ])
+
+def _fits(size, count, max_bytes, max_states):
+	return size <= max_bytes and (max_states is None or count <= max_states)
+
+def _in_sequence(state):
+	"""
+	Returns True if the state can be moved into a child together with the states either side of it
+	"""
+	if state["Type"] not in _SEQUENCE_TYPES or state.get("Resource") == _START_EXECUTION_SYNC:
+		return False
+	return get_transitions(state) == ([ state["Next"] ] if "Next" in state else [])
+
+def _sequences(branch):
+	"""
+	Returns the longest runs of states within the branch that are entered only from the previous state in the run, and
+	that only transition to the next state in the run (or end the branch)
+	"""
+	states = branch["States"]
+	predecessors = get_predecessors(branch)
+
+	def follows(name):
+		previous = predecessors.get(name, [])
+		return name != branch["StartAt"] and len(previous) == 1 and _in_sequence(states[name]) and _in_sequence(states[previous[0]])
+
+	sequences = []
+	for name in order_states(branch):
+		if not _in_sequence(states[name]) or follows(name):
+			continue
+		sequence = [ name ]
+		while "Next" in states[sequence[-1]] and follows(states[sequence[-1]]["Next"]) and states[sequence[-1]]["Next"] not in sequence:
+			sequence.append(states[sequence[-1]]["Next"])
+		sequences.append(sequence)
+	return sequences
+
+def _candidates(branch, top_level):
+	"""
+	Returns (branch, names) for each Parallel state, and each sequence of at least two states, within the branch at any depth
+	that can be moved into a child state machine.  Any prefix of at least two states of a sequence may be moved.  Moving all
+	the states of the state machine itself is excluded.
+	"""
+	found = [ (branch, sequence) for sequence in _sequences(branch) if len(sequence) > 1 ]
+	if top_level:
+		found = [ (b, names[:len(branch["States"]) - 1]) for b, names in found ]
+		found = [ c for c in found if len(c[1]) > 1 ]
+	for name, state in branch["States"].items():
+		if state["Type"] == "Parallel" and not (top_level and len(branch["States"]) == 1):
+			found.append((branch, [ name ]))
+	for state in branch["States"].values():
+		for nested in state.get("Branches", []):
+			found.extend(_candidates(nested, False))
+	return found
+
+def _child_definition(branch, names):
+	"""
+	Returns the definition of a child state machine that performs the named states on its input
+	"""
+	states = branch["States"]
+	if len(names) == 1:
+		# The InputPath, ResultPath, OutputPath and Catch of the Parallel state are applied in the parent
+		child_state = deepcopy(states[names[0]])
+		for key in [ "InputPath", "OutputPath", "ResultPath", "Catch", "Next" ]:
+			child_state.pop(key, None)
+		child_state["End"] = True
+		definition = { "StartAt": names[0], "States": { names[0]: child_state } }
+	else:
+		definition = { "StartAt": names[0], "States": dict([ (name, deepcopy(states[name])) for name in names ]) }
+		last = definition["States"][names[-1]]
+		last.pop("Next", None)
+		last["End"] = True
+	return definition
+
+def _replacement(branch, names, arn):
+	"""
+	Returns the states that replace the named states, starting with a Task (which takes the name of the first state) that
+	starts the child state machine and waits for its output
+	"""
+	states = branch["States"]
+	task = {
+		"Type": "Task",
+		"Resource": _START_EXECUTION_SYNC,
+		"Parameters": { "StateMachineArn": arn, "Input.$": "$" },
+		"ResultSelector": { "Output.$": "$.Output" }
+	}
+	last = states[names[-1]]
+	end = { "Next": last["Next"] } if "Next" in last else { "End": True }
+
+	if len(names) > 1:
+		task["OutputPath"] = "$.Output"
+		task.update(end)
+		return [ (names[0], task) ]
+
+	state = states[names[0]]
+	result_path = state.get("ResultPath", "$")
+	output_path = state.get("OutputPath", "$")
+	for key in [ "Comment", "InputPath", "Catch" ]:
+		if key in state:
+			task[key] = deepcopy(state[key])
+
+	if result_path is None:
+		# The output of the child is discarded
+		task["ResultPath"] = None
+		task["OutputPath"] = output_path
+	elif result_path == "$" and _compose("$.Output", output_path) is not None:
+		task["OutputPath"] = _compose("$.Output", output_path)
+	else:
+		# Move the output of the child to the ResultPath of the original state, then apply its OutputPath
+		extractor_name = "{}-Output".format(names[0])
+		i = 1
+		while extractor_name in states:
+			extractor_name = "{}-Output-{}".format(names[0], i)
+			i += 1
+		task["ResultPath"] = result_path
+		task["Next"] = extractor_name
+		extractor = {
+			"Type": "Pass",
+			"InputPath": _compose(result_path, "$.Output"),
+			"ResultPath": result_path,
+			"OutputPath": output_path
+		}
+		extractor.update(end)
+		return [ (names[0], task), (extractor_name, extractor) ]
+
+	task.update(end)
+	return [ (names[0], task) ]
+
+def _entry_size(name, state):
+	"""
+	Returns the bytes that the state adds to the compact JSON of its branch, as "name":{...} and a separator
+	"""
+	return _size({ name: state }) - 1
+
+def _choose(machine, max_bytes, max_states, child_arn):
+	"""
+	Returns the states to move into a child, which are the smallest that bring both the state machine and the child within
+	the limits, otherwise the largest whose child is within the limits, and otherwise the largest.  Returns None if no move
+	would reduce the size of the state machine.  child_arn returns the ARN of the child, given the name of its first state.
+	"""
+	size = _size(machine)
+	count = _count(machine)
+	arns = {}
+	scored = []
+	for branch, names in _candidates(machine, True):
+		if names[0] not in arns:
+			arns[names[0]] = child_arn(names[0])
+		# Running totals over the prefixes of a sequence, rather than summing each prefix
+		moved_size = 0
+		moved_count = 0
+		for length in range(1, len(names) + 1):
+			state = branch["States"][names[length - 1]]
+			moved_size += _entry_size(names[length - 1], state)
+			moved_count += _state_count(state)
+			if length == 1 and len(names) > 1:
+				continue
+
+			# Only the first and last states of a sequence determine the states that replace it
+			replacement = _replacement(branch, [ names[0], names[length - 1] ] if length > 1 else names, arns[names[0]])
+			after_size = size - moved_size + sum([ _entry_size(name, state) for name, state in replacement ])
+			after_count = count - moved_count + len(replacement)
+			if after_size >= size and after_count >= count:
+				continue
+			# Estimated, since building every candidate child would be quadratic in the length of the sequences
+			child_size = moved_size + len(names[0]) + 32
+			scored.append((moved_size, moved_count, _fits(after_size, after_count, max_bytes, max_states),
+				_fits(child_size, moved_count, max_bytes, max_states), branch, names, length))
+
+	if not scored:
+		return None
+	both = [ s for s in scored if s[2] and s[3] ]
+	if both:
+		best = min(both, key=lambda s: (s[0], s[1]))
+	else:
+		child = [ s for s in scored if s[3] ]
+		best = max(child or scored, key=lambda s: (s[0], s[1]))
+	return best[4], best[5][:best[6]]
+
+def _child_name(name, machine_names):
+	name = _INVALID_NAME_CHARS.sub("_", name)[:_MAX_NAME_LENGTH]
+	candidate = name
+	i = 1
+	while candidate in machine_names:
+		suffix = "-{}".format(i)
+		candidate = name[:_MAX_NAME_LENGTH - len(suffix)] + suffix
+		i += 1
+	return candidate
+
+def partition_state_machine(Definition=None, MaxBytes=_MAX_DEFINITION_BYTES, MaxStates=None, Name="Main",
+		ArnFormat="arn:aws:states:REGION:ACCOUNT_ID:stateMachine:{}"):
+	"""
+	Splits a state machine whose definition exceeds the size or state count limits into a parent and child state machines.
+	Either a ``Parallel`` state (which includes each expanded ``ext`` state), or a sequence of states that are only entered
+	from the previous state and only transition via ``Next`` (such as the cycles of a sequential ``For``), is moved into a
+	child and replaced by a ``Task`` that starts the child with ``states:startExecution.sync:2``.  The child is executed
+	synchronously, and its output is returned to the parent as JSON.
+
+	The definition is not modified - new definitions are returned.  Until every definition is within the limits, the largest
+	that is not has states moved into a new child: the smallest states that bring both it and the child within the limits,
+	otherwise the largest that keep the child within the limits, so that few cross-machine hops are added.  A child that is
+	still too large is itself partitioned.  An Exception is raised if a definition cannot be brought within the limits.
+
+	A moved ``Parallel`` state keeps its ``Retry`` in the child, whilst its ``InputPath`` and ``Catch`` are applied by the
+	``Task``.  Where its ``ResultPath`` is not "$" or null, a ``Pass`` state named "<state name>-Output" follows the ``Task``
+	to place the output of the child.  States with a ``Catch`` are only moved within a ``Parallel``.  Errors raised within a
+	child are reported to the parent as ``States.TaskFailed``, so a ``Catch`` that names specific errors will not match them.
+
+	The result is a dict of the form::
+
+		{
+			"Definitions": { name: dict, ... },
+			"Manifest": {
+				"Root": str,
+				"DeploymentOrder": [ str, ... ],
+				"Hops": int,
+				"Limits": { "MaxBytes": int, "MaxStates": int },
+				"StateMachines": {
+					name: {
+						"Arn": str,
+						"Parent": str,
+						"States": [ str, ... ],
+						"Bytes": int,
+						"StateCount": int
+					},
+					...
+				}
+			}
+		}
+
+	where ``DeploymentOrder`` lists children before the state machines that invoke them, ``Hops`` is the number of child
+	state machines, ``Parent`` is the state machine that invokes the child, and ``States`` are the names of the states that
+	were moved into it (the first being the name of the ``Task`` that replaced them).  Both are None for the root.
+
+	:param Definition: [Required] The state machine to be partitioned
+	:type Definition: ``StateMachine`` or dict
+	:param MaxBytes: [Optional] The maximum size of each definition, as compact JSON.  Defaults to the AWS limit of 1 MB
+	:type MaxBytes: int
+	:param MaxStates: [Optional] The maximum number of states in each definition, including those within ``Parallel`` branches
+	:type MaxStates: int
+	:param Name: [Optional] The name of the root state machine, from which the names of the children are derived
+	:type Name: str
+	:param ArnFormat: [Optional] The format of the ARN of each state machine, with "{}" replaced by its name
+	:type ArnFormat: str
+	:returns: dict
+	"""
+	if not isinstance(MaxBytes, int) or MaxBytes < 1:
+		raise Exception("MaxBytes must be a positive integer")
+	if MaxStates is not None and (not isinstance(MaxStates, int) or MaxStates < 1):
+		raise Exception("MaxStates must be a positive integer")
+	if not Name or _INVALID_NAME_CHARS.search(Name) or len(Name) > _MAX_NAME_LENGTH:
+		raise Exception("Name must be 1 to {} alphanumeric, '-' or '_' characters".format(_MAX_NAME_LENGTH))
+	if "{}" not in ArnFormat:
+		raise Exception("ArnFormat must contain '{}'")
+
+	definitions = { Name: deepcopy(get_definition(Definition)) }
+	machines = { Name: { "Arn": ArnFormat.format(Name), "Parent": None, "States": None } }
+	order = [ Name ]
+
+	while True:
+		oversized = [ n for n in order if not _fits(_size(definitions[n]), _count(definitions[n]), MaxBytes, MaxStates) ]
+		if not oversized:
+			break
+		machine_name = max(oversized, key=lambda n: (_size(definitions[n]), _count(definitions[n])))
+		chosen = _choose(definitions[machine_name], MaxBytes, MaxStates,
+			lambda first: ArnFormat.format(_child_name("{}-{}".format(machine_name, first), definitions)))
+		if chosen is None:
+			raise Exception("State machine '{}' cannot be partitioned within the limits".format(machine_name))
+
+		branch, names = chosen
+		child_name = _child_name("{}-{}".format(machine_name, names[0]), definitions)
+		definitions[child_name] = _child_definition(branch, names)
+		machines[child_name] = { "Arn": ArnFormat.format(child_name), "Parent": machine_name, "States": names }
+		order.append(child_name)
+		replacement = _replacement(branch, names, machines[child_name]["Arn"])
+		for name in names:
+			del branch["States"][name]
+		for name, state in replacement:
+			branch["States"][name] = state
+
+	for name in order:
+		machines[name]["Bytes"] = _size(definitions[name])
+		machines[name]["StateCount"] = _count(definitions[name])
+
+	return {
+		"Definitions": definitions,
+		"Manifest": {
+			"Root": Name,
+			"DeploymentOrder": list(reversed(order)),
+			"Hops": len(order) - 1,
+			"Limits": { "MaxBytes": MaxBytes, "MaxStates": MaxStates },
+			"StateMachines": machines
+		}
+	}
@@ -0,0 +1,325 @@
+from .graph import get_definition, get_transitions, order_states
+
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+_ALL_ERRORS = "States.ALL"
+_TIMEOUT_ERROR = "States.Timeout"
+_LIMIT_ERROR = "States.SimulationLimit"
+_NO_ERROR = -1
+
+class _Simulation(object):
+	"""
+	Runs all the trials together, with each state applied to the vector of trials that reach it.
+	"""
+
+	def __init__(self, trials, failure_probabilities, latencies, choice_probabilities, random_state, max_transitions):
+		self._trials = trials
+		self._failure_probabilities = failure_probabilities
+		self._latencies = latencies
+		self._choice_probabilities = choice_probabilities
+		self._random = random_state
+		self._max_transitions = max_transitions
+		self._errors = []
+		self._error_codes = {}
+		self._orders = {}
+		self.transitions = np.zeros(trials, dtype=np.int64)
+		self.invocations = np.zeros(trials, dtype=np.int64)
+		self.resource_invocations = {}
+
+	def error_code(self, name):
+		if name not in self._error_codes:
+			self._error_codes[name] = len(self._errors)
+			self._errors.append(name)
+		return self._error_codes[name]
+
+	def error_name(self, code):
+		return self._errors[code]
+
+	def _matching_index(self, error, handlers):
+		# Returns, per trial, the index of the first handler whose ErrorEquals matches the error (or -1)
+		matched = np.full(self._trials, -1, dtype=np.int64)
+		for code in np.unique(error[error != _NO_ERROR]):
+			name = self.error_name(code)
+			for i, handler in enumerate(handlers):
+				if name in handler["ErrorEquals"] or _ALL_ERRORS in handler["ErrorEquals"]:
+					matched[error == code] = i
+					break
+		return matched
+
+	def _draw_latency(self, resource, mask):
+		spec = self._latencies.get(resource, 0.0)
+		count = int(np.count_nonzero(mask))
+		if callable(spec):
+			return np.asarray(spec(self._random, count), dtype=float)
+		return np.full(count, float(spec))
+
+	def _draw_errors(self, resource, mask):
+		count = int(np.count_nonzero(mask))
+		errors = np.full(count, _NO_ERROR, dtype=np.int64)
+		probabilities = self._failure_probabilities.get(resource, {})
+		if not probabilities:
+			return errors
+		draws = self._random.random_sample(count)
+		lower = 0.0
+		for name, p in sorted(probabilities.items()):
+			upper = lower + p
+			errors[(draws >= lower) & (draws < upper)] = self.error_code(name)
+			lower = upper
+		return errors
+
+	def _attempt_task(self, state, active, time):
+		resource = state["Resource"]
+		self.invocations[active] += 1
+		self.resource_invocations[resource] = self.resource_invocations.get(resource, 0) + int(np.count_nonzero(active))
+
+		latency = self._draw_latency(resource, active)
+		errors = self._draw_errors(resource, active)
+		timeout = state.get("TimeoutSeconds")
+		if timeout:
+			timed_out = latency > timeout
+			latency[timed_out] = timeout
+			errors[timed_out] = self.error_code(_TIMEOUT_ERROR)
+
+		error = np.full(self._trials, _NO_ERROR, dtype=np.int64)
+		error[active] = errors
+		end_time = time.copy()
+		end_time[active] += latency
+		return error, end_time
+
+	def _attempt_parallel(self, state, active, time):
+		error = np.full(self._trials, _NO_ERROR, dtype=np.int64)
+		success_time = time.copy()
+		failure_time = np.full(self._trials, np.inf)
+		for branch in state["Branches"]:
+			branch_error, branch_time = self.run_branch(branch, active, time)
+			failed = branch_error != _NO_ERROR
+			# The first branch to fail determines the error of the Parallel, and cancels the remaining branches
+			first = failed & ((error == _NO_ERROR) | (branch_time < failure_time))
+			error[first] = branch_error[first]
+			failure_time[failed] = np.minimum(failure_time[failed], branch_time[failed])
+			success_time = np.maximum(success_time, branch_time)
+		end_time = np.where(error != _NO_ERROR, failure_time, success_time)
+		return error, end_time
+
+	def _run_retry_catch(self, state, mask, time, attempt):
+		outcomes = []
+		retriers = state.get("Retry", [])
+		catchers = state.get("Catch", [])
+		retries = np.zeros((max(len(retriers), 1), self._trials), dtype=np.int64)
+		active = mask.copy()
+		time = time.copy()
+
+		while active.any():
+			error, time = attempt(active, time)
+			failed = active & (error != _NO_ERROR)
+
+			succeeded = active & ~failed
+			if succeeded.any():
+				outcomes.append((state.get("Next"), succeeded, time, None))
+
+			retrier_index = self._matching_index(np.where(failed, error, _NO_ERROR), retriers)
+			retrying = np.zeros(self._trials, dtype=bool)
+			for i, retrier in enumerate(retriers):
+				candidates = failed & (retrier_index == i) & (retries[i] < retrier.get("MaxAttempts", 3))
+				if candidates.any():
+					interval = retrier.get("IntervalSeconds", 1) * np.power(retrier.get("BackoffRate", 2.0), retries[i][candidates])
+					time[candidates] += interval
+					retries[i][candidates] += 1
+					retrying |= candidates
+
+			# Each retry is another transition into the state
+			self.transitions[retrying] += 1
+
+			exhausted = failed & ~retrying
+			if exhausted.any():
+				catcher_index = self._matching_index(np.where(exhausted, error, _NO_ERROR), catchers)
+				for i, catcher in enumerate(catchers):
+					caught = exhausted & (catcher_index == i)
+					if caught.any():
+						outcomes.append((catcher["Next"], caught, time, None))
+				uncaught = exhausted & (catcher_index == -1)
+				if uncaught.any():
+					outcomes.append((None, uncaught, time, error))
+
+			active = retrying
+
+		return outcomes
+
+	def _run_choice(self, name, state, mask, time):
+		next_names = []
+		for next_name in get_transitions(state):
+			if next_name not in next_names:
+				next_names.append(next_name)
+		weights = self._choice_probabilities.get(name, None)
+		if weights:
+			p = np.array([ float(weights.get(n, 0.0)) for n in next_names ])
+		else:
+			p = np.ones(len(next_names))
+		if p.sum() <= 0:
+			raise Exception("ChoiceProbabilities must include at least one next state of Choice '{}'".format(name))
+		p = p / p.sum()
+
+		selected = np.full(self._trials, -1, dtype=np.int64)
+		selected[mask] = self._random.choice(len(next_names), size=int(np.count_nonzero(mask)), p=p)
+		return [ (next_names[i], mask & (selected == i), time, None) for i in range(len(next_names)) ]
+
+	def _run_state(self, name, state, mask, time):
+		state_type = state["Type"]
+		if state_type == "Task":
+			return self._run_retry_catch(state, mask, time, lambda active, t: self._attempt_task(state, active, t))
+		if state_type == "Parallel":
+			return self._run_retry_catch(state, mask, time, lambda active, t: self._attempt_parallel(state, active, t))
+		if state_type == "Choice":
+			return self._run_choice(name, state, mask, time)
+		if state_type == "Fail":
+			error = np.full(self._trials, _NO_ERROR, dtype=np.int64)
+			error[mask] = self.error_code(state.get("Error") or "States.Fail")
+			return [ (None, mask, time, error) ]
+		if state_type == "Wait":
+			time = time.copy()
+			time[mask] += state.get("Seconds", 0)
+		return [ (state.get("Next"), mask, time, None) ]
+
+	def run_branch(self, branch, mask, time):
+		"""
+		Runs the trials identified by mask through the branch, starting at the supplied times.
+
+		Returns the error code per trial (-1 if successful) and the time at which each trial left the branch.
+		"""
+		key = id(branch)
+		if key not in self._orders:
+			self._orders[key] = dict([ (n, i) for i, n in enumerate(order_states(branch)) ])
+		order = self._orders[key]
+
+		error = np.full(self._trials, _NO_ERROR, dtype=np.int64)
+		end_time = time.copy()
+		frontier = { branch["StartAt"]: (mask.copy(), time.copy()) }
+
+		while frontier:
+			name = min(frontier, key=lambda n: order.get(n, len(order)))
+			m, t = frontier.pop(name)
+			if not m.any():
+				continue
+
+			self.transitions[m] += 1
+			over = m & (self.transitions > self._max_transitions)
+			if over.any():
+				error[over] = self.error_code(_LIMIT_ERROR)
+				end_time[over] = t[over]
+				m = m & ~over
+
+			for next_name, om, ot, oe in self._run_state(name, branch["States"][name], m, t):
+				if next_name:
+					if next_name in frontier:
+						fm, ft = frontier[next_name]
+						frontier[next_name] = (fm | om, np.where(om, ot, ft))
+					else:
+						frontier[next_name] = (om.copy(), ot.copy())
+				else:
+					end_time[om] = ot[om]
+					if oe is not None:
+						error[om] = oe[om]
+
+		return error, end_time
+
+def _summarise(values):
+	return {
+		"Mean": float(np.mean(values)),
+		"P50": float(np.percentile(values, 50)),
+		"P90": float(np.percentile(values, 90)),
+		"P99": float(np.percentile(values, 99)),
+		"Max": float(np.max(values))
+	}
+
+def simulate_retries(Definition=None, Trials=10000, FailureProbabilities=None, Latencies=None, ChoiceProbabilities=None, Seed=None, MaxTransitions=100000):
+	"""
+	Monte-Carlo simulation of executions of a state machine, to show how failures and the resulting retries inflate the number of
+	state transitions, Task invocations and the end-to-end execution time.
+
+	The simulation runs against the ASL generated for the state machine, so the ``Retry`` and ``Catch`` fields of every ``Task``
+	and ``Parallel`` are applied, including those generated by the ``ext`` states (such as the per-branch ``BranchRetryList``
+	wrappers of ``BranchRetryParallel`` and ``For``).  All trials are run together, vectorized with numpy.
+
+	``FailureProbabilities`` maps each ``Task`` resource Arn to the probability of each error name being raised on any attempt, e.g.::
+
+		{ "arn:aws:lambda:...:function:MyFunction": { "Lambda.ServiceException": 0.01, "MyError": 0.002 } }
+
+	``Latencies`` maps each resource Arn to either a constant latency in seconds, or a function accepting a
+	``numpy.random.RandomState`` and a count, and returning an array of latencies.  Resources not listed have zero latency.
+	If a ``Task`` declares ``TimeoutSeconds``, attempts exceeding it fail with ``States.Timeout``.
+
+	``Choice`` states cannot be evaluated without input data, so trials are routed by ``ChoiceProbabilities``, a mapping of
+	Choice state name to a dict of next state name to weight.  Choice states not listed route uniformly across their next states.
+	``Wait`` states only contribute their ``Seconds``.
+
+	For a failing ``Parallel``, the transitions of the cancelled branches are counted as if they had run to completion,
+	so transition counts are an upper bound in that case.
+
+	The result is a dict of the form::
+
+		{
+			"Transitions": array, "Invocations": array, "Duration": array, "Failed": array,
+			"Errors": { "ErrorName": count, ... },
+			"ResourceInvocations": { "ResourceArn": total, ... },
+			"Summary": { "Transitions": {...}, "Invocations": {...}, "Duration": {...}, "FailureRate": float }
+		}
+
+	where the arrays hold one value per trial, and each summary holds the mean, P50, P90, P99 and maximum.
+
+	:param Definition: [Required] The state machine to be simulated
+	:type Definition: ``StateMachine`` or dict
+	:param Trials: [Optional] The number of executions to simulate.  Default is 10000
+	:type Trials: int
+	:param FailureProbabilities: [Optional] Per resource Arn, the probability of each error per attempt
+	:type FailureProbabilities: dict
+	:param Latencies: [Optional] Per resource Arn, the latency distribution of an attempt
+	:type Latencies: dict
+	:param ChoiceProbabilities: [Optional] Per Choice state, the weight of each next state
+	:type ChoiceProbabilities: dict
+	:param Seed: [Optional] Seed for the random number generator, for repeatable results
+	:type Seed: int
+	:param MaxTransitions: [Optional] Trials exceeding this number of transitions are stopped, with error ``States.SimulationLimit``
+	:type MaxTransitions: int
+	:returns: dict
+	"""
+	if np is None:
+		raise Exception("numpy must be installed to simulate retries")
+	if not isinstance(Trials, int) or Trials < 1:
+		raise Exception("Trials must be an int greater than zero")
+	for resource, probabilities in (FailureProbabilities or {}).items():
+		if sum(probabilities.values()) > 1.0:
+			raise Exception("Failure probabilities must not sum to more than 1.0 (resource '{}')".format(resource))
+
+	definition = get_definition(Definition)
+	simulation = _Simulation(
+		trials=Trials,
+		failure_probabilities=FailureProbabilities or {},
+		latencies=Latencies or {},
+		choice_probabilities=ChoiceProbabilities or {},
+		random_state=np.random.RandomState(Seed),
+		max_transitions=MaxTransitions)
+
+	error, duration = simulation.run_branch(definition, np.ones(Trials, dtype=bool), np.zeros(Trials))
+
+	failed = error != _NO_ERROR
+	errors = {}
+	for code in np.unique(error[failed]):
+		errors[simulation.error_name(code)] = int(np.count_nonzero(error == code))
+
+	return {
+		"Transitions": simulation.transitions,
+		"Invocations": simulation.invocations,
+		"Duration": duration,
+		"Failed": failed,
+		"Errors": errors,
+		"ResourceInvocations": simulation.resource_invocations,
+		"Summary": {
+			"Transitions": _summarise(simulation.transitions),
+			"Invocations": _summarise(simulation.invocations),
+			"Duration": _summarise(duration),
+			"FailureRate": float(np.count_nonzero(failed)) / Trials
+		}
+	}
@@ -114,7 +114,7 @@ class Wait(StateNextEnd):
 		
 		"""
 		j = super(Wait, self).to_json()
-		for k, v in self._get_assigned_wait().viewitems():
+		for k, v in self._get_assigned_wait().items():
 			j[k] = v
 		return j
 
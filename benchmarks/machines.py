@@ -0,0 +1,117 @@
+import awssl
+import awssl.ext
+
+_ARN = "arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME"
+
+def register_benchmarks():
+	"""
+	Returns the list of synthetic state machines to be benchmarked.
+
+	Each item is of the form:
+
+	{
+		"Name": "Name of the benchmark",
+		"Func": "Function that constructs the StateMachine",
+		"Large": "True if only run when large benchmarks are requested"
+	}
+
+	"""
+	return [
+		{ "Name": "For-10", "Func": lambda: for_loop(10), "Large": False },
+		{ "Name": "For-1000", "Func": lambda: for_loop(1000), "Large": False },
+		{ "Name": "For-10000", "Func": lambda: for_loop(10000), "Large": True },
+		{ "Name": "For-100000", "Func": lambda: for_loop(100000), "Large": True },
+		{ "Name": "ParallelFor-1000", "Func": lambda: for_loop(1000, ParallelIteration=True), "Large": False },
+		{ "Name": "NestedLimitedParallel-50x10", "Func": lambda: nested_limited_parallel(50, 10), "Large": False },
+		{ "Name": "ChoiceTree-8", "Func": lambda: choice_tree(8), "Large": False },
+		{ "Name": "ChoiceTree-12", "Func": lambda: choice_tree(12), "Large": True },
+		{ "Name": "TaskWithFinally-50", "Func": lambda: task_with_finally(50), "Large": False }
+	]
+
+def _set_arns():
+	awssl.ext.set_ext_arns(
+		ForInitializer=_ARN,
+		ForExtractor=_ARN,
+		ForConsolidator=_ARN,
+		ForFinalizer=_ARN,
+		ForFinalizerParallelIterations=_ARN,
+		LimitedParallelConsolidator=_ARN)
+
+def _state_machine(start_state):
+	sm = awssl.StateMachine(Comment="Benchmark")
+	sm.set_start_state(start_state)
+	return sm
+
+def for_loop(iterations, ParallelIteration=False):
+	_set_arns()
+	task = awssl.Task(
+		Name="Work",
+		EndState=True,
+		ResourceArn=_ARN,
+		RetryList=[awssl.Retrier(ErrorNameList=["States.ALL"])])
+
+	s = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=iterations,
+		Step=1,
+		BranchState=task,
+		ParallelIteration=ParallelIteration)
+	return _state_machine(s)
+
+def nested_limited_parallel(outer, inner):
+	_set_arns()
+	task = awssl.Task(Name="Work", EndState=True, ResourceArn=_ARN)
+
+	inner_parallel = awssl.ext.LimitedParallel(
+		Name="Inner",
+		EndState=True,
+		Iterations=inner,
+		MaxConcurrency=max(1, inner // 2),
+		IteratorPath="$.inner",
+		BranchState=task)
+
+	outer_parallel = awssl.ext.LimitedParallel(
+		Name="Outer",
+		EndState=True,
+		Iterations=outer,
+		MaxConcurrency=max(1, outer // 5),
+		IteratorPath="$.outer",
+		BranchState=inner_parallel)
+	return _state_machine(outer_parallel)
+
+def choice_tree(depth):
+	counter = [0]
+
+	def build(level):
+		counter[0] = counter[0] + 1
+		name = "Node-{}".format(counter[0])
+		if level == depth:
+			return awssl.Pass(Name=name, EndState=True, ResultAsJSON={"Leaf": counter[0]})
+		return awssl.Choice(
+			Name=name,
+			ChoiceList=[
+				awssl.ChoiceRule(
+					Comparison=awssl.Comparison(Variable="$.level{}".format(level), Comparator="NumericLessThan", Value=0.5),
+					NextState=build(level + 1))
+			],
+			Default=build(level + 1))
+
+	return _state_machine(build(0))
+
+def task_with_finally(catchers):
+	catcher_list = [
+		awssl.Catcher(
+			ErrorNameList=["Error{}".format(i)],
+			NextState=awssl.Pass(Name="Handler{}".format(i), EndState=True))
+		for i in range(catchers) ]
+
+	s = awssl.ext.TaskWithFinally(
+		Name="Work",
+		EndState=True,
+		ResourceArn=_ARN,
+		RetryList=[awssl.Retrier(ErrorNameList=["States.ALL"])],
+		CatcherList=catcher_list,
+		FinallyState=awssl.Pass(Name="Finally", EndState=True))
+	return _state_machine(s)
@@ -0,0 +1,151 @@
+# Allow awssl and awssl.ext to be found by benchmarks
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import gc
+import json
+import timeit
+
+try:
+	import tracemalloc
+except ImportError:
+	tracemalloc = None
+
+import awssl
+from machines import register_benchmarks
+
+_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# The operations measured for each benchmark, each applied to a freshly constructed state machine.  The ext states are
+# only expanded when their JSON is generated, so Construct and Clone include generating the JSON of the result
+_OPERATIONS = [
+	("Construct", lambda sm: sm.to_json()),
+	("Validate", lambda sm: sm.validate()),
+	("ToJson", lambda sm: sm.to_json()),
+	("Clone", lambda sm: awssl.StateMachine(StartState=sm.get_start_state().clone("{}-Clone")).to_json()),
+	("Str", lambda sm: str(sm))
+]
+
+# Timings below this many seconds are dominated by noise, so differences smaller than this are never regressions
+_TIME_FLOOR = 0.005
+
+def measure(func, operation, repeat):
+	"""
+	Returns the best wall time (seconds) and the peak memory (bytes) of the operation, applied to the
+	state machine returned by func.  Construction is included in the measurement only for the Construct operation.
+	Memory is None where tracemalloc is unavailable (Python 2), as the process high-water mark rarely moves.
+	"""
+
+	def apply(sm):
+		if operation == "Construct":
+			sm = func()
+		_OPERATIONS_BY_NAME[operation](sm)
+
+	def run_once():
+		sm = None if operation == "Construct" else func()
+		start = timeit.default_timer()
+		apply(sm)
+		return timeit.default_timer() - start
+
+	def peak_memory():
+		# tracemalloc slows execution, so memory is measured separately from time
+		if not tracemalloc:
+			return None
+		sm = None if operation == "Construct" else func()
+		gc.collect()
+		tracemalloc.start()
+		try:
+			apply(sm)
+			return tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+
+	times = []
+	for _ in range(repeat):
+		gc.collect()
+		times.append(run_once())
+	return { "Time": min(times), "Memory": peak_memory() }
+
+_OPERATIONS_BY_NAME = dict(_OPERATIONS)
+
+def compare(results, baselines, threshold, time_floor=_TIME_FLOOR):
+	"""
+	Returns the list of measurements that have regressed beyond the threshold, relative to the baselines.
+	Timings that have grown by less than time_floor seconds are not regressions, however large the fraction.
+	"""
+	regressions = []
+	for name, operations in results.items():
+		for operation, measurements in operations.items():
+			baseline = baselines.get(name, {}).get(operation, None)
+			if not baseline:
+				continue
+			for metric in ["Time", "Memory"]:
+				old = baseline.get(metric, None)
+				new = measurements.get(metric, None)
+				if not old or new is None:
+					continue
+				if metric == "Time" and new - old < time_floor:
+					continue
+				if new > old * (1 + threshold):
+					regressions.append("{} {} {}: {:.4g} -> {:.4g} ({:+.0%})".format(name, operation, metric, old, new, float(new) / old - 1))
+	return regressions
+
+def run_benchmarks():
+	"""
+	Entry point to benchmark processing
+	"""
+	parser = argparse.ArgumentParser(description="Benchmarks the construction and generation of synthetic state machines")
+	parser.add_argument("--save", action="store_true", help="Save the results as the new baselines")
+	parser.add_argument("--large", action="store_true", help="Include the large benchmarks")
+	parser.add_argument("--threshold", type=float, default=0.25, help="Fractional regression allowed before failing (default 0.25)")
+	parser.add_argument("--repeat", type=int, default=5, help="Number of timed repetitions; the best is reported (default 5)")
+	parser.add_argument("--time-floor", type=float, default=_TIME_FLOOR, help="Seconds a timing must grow by to be a regression (default {})".format(_TIME_FLOOR))
+	parser.add_argument("--baselines", default=_BASELINES, help="Baselines file")
+	parser.add_argument("names", nargs="*", help="Only run the named benchmarks")
+	args = parser.parse_args()
+
+	benchmarks = [ b for b in register_benchmarks() if (args.large or not b["Large"]) and (not args.names or b["Name"] in args.names) ]
+
+	results = {}
+	print("Running benchmarks...")
+	for benchmark in benchmarks:
+		print("\t{}".format(benchmark["Name"]))
+		results[benchmark["Name"]] = {}
+		for operation, _ in _OPERATIONS:
+			m = measure(benchmark["Func"], operation, args.repeat)
+			results[benchmark["Name"]][operation] = m
+			memory = "n/a" if m["Memory"] is None else "{:.1f} KiB".format(m["Memory"] / 1024.0)
+			print("\t\t{:<10} {:>10.4f} s {:>14}".format(operation, m["Time"], memory))
+	print("Benchmarks completed.\n")
+
+	baselines = {}
+	if os.path.exists(args.baselines):
+		with open(args.baselines, "r") as f:
+			baselines = json.load(f)
+
+	if args.save:
+		baselines.update(results)
+		with open(args.baselines, "w") as f:
+			json.dump(baselines, f, sort_keys=True, indent=4)
+		print("Baselines saved to '{}'".format(args.baselines))
+		return 0
+
+	if not baselines:
+		print("No baselines found - run with --save to create them")
+		return 0
+
+	regressions = compare(results, baselines, args.threshold, args.time_floor)
+	if regressions:
+		print("Regressions beyond {:.0%}:".format(args.threshold))
+		for r in regressions:
+			print("\t{}".format(r))
+		return 1
+
+	print("No regressions beyond {:.0%}".format(args.threshold))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(run_benchmarks())
@@ -0,0 +1,178 @@
+"""
+Regenerates the inline code of the helper Lambdas in awssl_ext.cform from the sources in ../lambda.
+
+Inline (ZipFile) code is deployed as a single index.py, so the shared modules that a Lambda imports
+from ../lambda (e.g. aws_clients, active_execution_registry) are copied into the template ahead of
+the Lambda's own code, in dependency order.
+
+Values injected by the template (e.g. _S3_BUCKET, built with Fn::Join from a Ref) are kept: the last
+assignment to the same name in the source is replaced by the template's existing item.
+
+Usage:
+
+	python inline_lambdas.py           # rewrite awssl_ext.cform
+	python inline_lambdas.py --check   # exit code 1 if any inline Lambda differs from its source
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+_TEMPLATE = os.path.join(_DIRECTORY, "awssl_ext.cform")
+_LAMBDA_DIRECTORY = os.path.join(_DIRECTORY, "..", "lambda")
+
+# Template resource name, and the source of its inline code
+_LAMBDAS = [
+	("ForConsolidator", "for_consolidator.py"),
+	("ForInitializer", "for_initializer.py"),
+	("ForInputExtractor", "for_input_extractor.py"),
+	("ForFinalizer", "for_finalizer.py"),
+	("ForFinalizerParallel", "for_finalizer_parallel.py"),
+	("LimitedParallelConsolidator", "limited_parallel_consolidator.py"),
+	("HedgedTaskCompleted", "hedged_task_completed.py"),
+	("HedgedTaskResult", "hedged_task_result.py"),
+	("ExtDispatcher", "ext_dispatcher.py"),
+	("BranchSNSTriggerLambda", "launch_branched_state_machine.py"),
+	("BranchCloudWatchRuleLambda", "monitor_branch_activity.py"),
+	("BranchTaskCompletionCloudWatchRuleLambda", "monitor_for_branched_completion.py"),
+	("BranchExecutionStatusChangeLambda", "branched_execution_status_handler.py"),
+	("ValidateStateMachineExistsLambda", "validate_state_machine_existence.py"),
+	("PrepBranchActivityInputLambda", "list_dict_concatenator.py")
+]
+
+_LOCAL_IMPORT = re.compile(r"^from (\w+) import ")
+
+def _local_module(line):
+	match = _LOCAL_IMPORT.match(line)
+	if match and os.path.exists(os.path.join(_LAMBDA_DIRECTORY, match.group(1) + ".py")):
+		return match.group(1)
+	return None
+
+def _read_lines(module):
+	with open(os.path.join(_LAMBDA_DIRECTORY, module + ".py"), "r") as f:
+		return f.read().rstrip("\n").split("\n")
+
+def _dependencies(module, found):
+	# Depth first, so that each module follows the modules it imports
+	for line in _read_lines(module):
+		dependency = _local_module(line)
+		if dependency and dependency not in found:
+			_dependencies(dependency, found)
+			found.append(dependency)
+	return found
+
+def build_source(file_name):
+	"""
+	Returns the lines of the single file equivalent of the Lambda source
+	"""
+	module = os.path.splitext(file_name)[0]
+	lines = []
+	for dependency in _dependencies(module, []):
+		lines.append("# ---- {}.py ----".format(dependency))
+		lines.extend(l for l in _read_lines(dependency) if not _local_module(l))
+		lines.append("")
+	if lines:
+		lines.append("# ---- {}.py ----".format(module))
+	lines.extend(l for l in _read_lines(module) if not _local_module(l))
+	return lines
+
+def _skip_string(text, i):
+	# Returns the index of the closing quote of the JSON string starting at i
+	i += 1
+	while text[i] != '"':
+		i += 2 if text[i] == "\\" else 1
+	return i
+
+def _matching(text, i):
+	# Returns the index of the bracket closing the one at i
+	depth = 0
+	while True:
+		c = text[i]
+		if c == '"':
+			i = _skip_string(text, i)
+		elif c in "[{":
+			depth += 1
+		elif c in "]}":
+			depth -= 1
+			if depth == 0:
+				return i
+		i += 1
+
+def _find_code(text, resource):
+	# Returns the (start, end) of the list of lines joined to form the ZipFile of the resource
+	start = text.index('"{}": {{'.format(resource))
+	join = text.index('"Fn::Join"', text.index('"ZipFile"', start))
+	start = text.index("[", text.index('"\\n"', join))
+	return start, _matching(text, start)
+
+def _injected_items(body):
+	# Returns the template's Fn::Join items, with their indentation, by the name they assign
+	items = {}
+	i = 0
+	while i < len(body):
+		if body[i] == '"':
+			i = _skip_string(body, i)
+		elif body[i] == "{":
+			end = _matching(body, i)
+			name = re.search(r'"="\s*,\s*\[\s*"(\w+)"', body[i:end + 1])
+			if name:
+				items[name.group(1)] = body[body.rfind("\n", 0, i) + 1:end + 1]
+			i = end
+		i += 1
+	return items
+
+def _render(body, lines):
+	indent = re.search(r"\n(\s*)\S", body).group(1)
+	closing = body[body.rfind("\n") + 1:]
+	injected = _injected_items(body)
+	names = [ l.split("=")[0].strip() if "=" in l else None for l in lines ]
+
+	items = []
+	for i, line in enumerate(lines):
+		if names[i] in injected and names[i] not in names[i + 1:]:
+			items.append(injected[names[i]])
+		else:
+			items.append(indent + json.dumps(line))
+	return "\n" + ",\n".join(items) + "\n" + closing
+
+def inline_lambdas(text):
+	"""
+	Returns the template text with the inline code of each Lambda regenerated, and the names of the
+	resources that changed
+	"""
+	changed = []
+	for resource, file_name in _LAMBDAS:
+		start, end = _find_code(text, resource)
+		body = text[start + 1:end]
+		new_body = _render(body, build_source(file_name))
+		json.loads("[" + new_body + "]")
+		if new_body != body:
+			changed.append(resource)
+			text = text[:start + 1] + new_body + text[end:]
+	return text, changed
+
+def main():
+	parser = argparse.ArgumentParser(description="Regenerates the inline Lambda code of awssl_ext.cform from ../lambda")
+	parser.add_argument("--check", action="store_true", help="Only report the Lambdas that are out of date")
+	args = parser.parse_args()
+
+	with open(_TEMPLATE, "r") as f:
+		text = f.read()
+	text, changed = inline_lambdas(text)
+
+	if args.check:
+		for resource in changed:
+			print("{} is out of date".format(resource))
+		return 1 if changed else 0
+
+	if changed:
+		with open(_TEMPLATE, "w") as f:
+			f.write(text)
+	for resource in changed:
+		print("Updated {}".format(resource))
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
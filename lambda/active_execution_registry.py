@@ -0,0 +1,396 @@
+import heapq
+import os
+from abc import ABCMeta, abstractmethod
+from aws_clients import get_client
+from json import loads, dumps
+from multiprocessing.pool import ThreadPool
+from time import sleep, time
+
+# Registry of the branched executions launched by launch_branched_state_machine that are still in flight.
+#
+# Each record is the dict saved by the launcher (TaskToken, ActivityArn, InputData, Name, ExecutionArn),
+# plus NextCheck - the epoch time (seconds) at which the monitor should next look at the execution.
+# NextCheck is the earlier of NextHeartbeat and NextStatusCheck (see schedule_new and schedule_next).
+# Records are put and removed individually, and due() returns only the records whose NextCheck has
+# passed, so the cost of a monitor sweep depends on the work to be done rather than on the number of
+# executions in flight.
+
+_ACTIVE_PREFIX = "Active/"
+_DUE_PREFIX = "Due/"
+_DUE_INDEX_SHARD = "Active"
+
+# Bulk registration limits
+_S3_PUT_WORKERS = 16
+_DYNAMODB_BATCH_SIZE = 25
+_DYNAMODB_BATCH_ATTEMPTS = 5
+
+# Status checks start at the minimum interval and double while the execution is running
+_MIN_CHECK_INTERVAL = 5
+_MAX_CHECK_INTERVAL = 300
+
+# Heartbeats are sent at this fraction of the parent Task's HeartbeatSeconds.  If the launcher was
+# not told it, a heartbeat is sent on every monitor sweep (as the monitors always did before), so
+# that Tasks with a short HeartbeatSeconds are kept alive
+_HEARTBEAT_FRACTION = 0.5
+_SWEEP_INTERVAL = 5  # _SLEEP of monitor_for_branched_completion
+
+def _due_bucket(next_check):
+    # Zero padded, so that lexicographic (S3 listing) order is time order
+    return "{:015d}".format(int(next_check))
+
+# Abstract base class, declared so as to work under both Python 2 and 3
+_ABC = ABCMeta("_ABC", (object,), {})
+
+class ActiveExecutionRegistry(_ABC):
+
+    @abstractmethod
+    def put(self, record, previous=None):
+        """
+        Adds or replaces the record for record["ExecutionArn"].  NextCheck defaults to now.
+        previous is the record being replaced, if known
+        """
+
+    def put_many(self, records):
+        """
+        Adds or replaces each of the records, returning the list of (record, error) that could not be put
+        """
+        failures = []
+        for record in records:
+            try:
+                self.put(record)
+            except Exception as e:
+                failures.append((record, e))
+        return failures
+
+    def reschedule(self, record, next_check):
+        """
+        Sets the NextCheck of a record returned by the registry, returning the updated record
+        """
+        return self.put(dict(record, NextCheck=next_check), previous=record)
+
+    @abstractmethod
+    def get(self, execution_arn):
+        """
+        Returns the record for the execution, or None if it is not registered
+        """
+
+    @abstractmethod
+    def remove(self, record):
+        """
+        Removes the record, which must be as last put or returned by the registry
+        """
+
+    @abstractmethod
+    def due(self, now=None, limit=None):
+        """
+        Returns the records whose NextCheck is at or before now, earliest first
+        """
+
+    def archive(self, record):
+        """
+        Removes the record of a completed execution, retaining it where the backend supports it
+        """
+        self.remove(record)
+
+    @staticmethod
+    def _prepare(record):
+        if not record.get("ExecutionArn", None):
+            raise Exception("ExecutionArn not present in record")
+        record = dict(record)
+        record["NextCheck"] = float(record.get("NextCheck", None) or time())
+        return record
+
+class InMemoryRegistry(ActiveExecutionRegistry):
+    """
+    Registry held in process memory - for tests, and for single process use.
+
+    Records are indexed in one second buckets, so put and remove are O(1) and due() only
+    visits the buckets that have passed.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._buckets = {}
+        self._bucket_heap = []
+        self.archived = {}
+
+    def put(self, record, previous=None):
+        record = self._prepare(record)
+        self.remove(record)
+        self._records[record["ExecutionArn"]] = record
+        bucket = int(record["NextCheck"])
+        if bucket not in self._buckets:
+            self._buckets[bucket] = set()
+            heapq.heappush(self._bucket_heap, bucket)
+        self._buckets[bucket].add(record["ExecutionArn"])
+        return record
+
+    def get(self, execution_arn):
+        record = self._records.get(execution_arn, None)
+        return dict(record) if record else None
+
+    def remove(self, record):
+        existing = self._records.pop(record["ExecutionArn"], None)
+        if existing:
+            self._buckets.get(int(existing["NextCheck"]), set()).discard(existing["ExecutionArn"])
+
+    def due(self, now=None, limit=None):
+        now = time() if now is None else now
+        records = []
+        visited = []
+        # Buckets are popped earliest first until limit records are found.  Emptied buckets are dropped,
+        # and the others pushed back, as due() does not remove the records it returns
+        while self._bucket_heap and self._bucket_heap[0] <= now and not (limit and len(records) >= limit):
+            bucket = heapq.heappop(self._bucket_heap)
+            arns = self._buckets.get(bucket, None)
+            if not arns:
+                self._buckets.pop(bucket, None)
+                continue
+            visited.append(bucket)
+            records.extend(sorted(
+                (self._records[arn] for arn in arns if self._records[arn]["NextCheck"] <= now),
+                key=lambda r: r["NextCheck"]))
+        for bucket in visited:
+            heapq.heappush(self._bucket_heap, bucket)
+        return [ dict(r) for r in records[:limit] ]
+
+    def archive(self, record):
+        self.remove(record)
+        self.archived[record["ExecutionArn"]] = dict(record)
+
+class S3Registry(ActiveExecutionRegistry):
+    """
+    Registry held in S3.  The record is saved at Active/<ExecutionArn> (the format read by the
+    existing monitors), with a copy at Due/<NextCheck>/<ExecutionArn>.  Listing Due/ returns
+    keys in NextCheck order, so due() stops listing at the first record that is not yet due, and
+    only reads the records that are due.
+    """
+
+    def __init__(self, bucket, s3_client=None):
+        self._bucket = bucket
+        self._client = s3_client or get_client('s3')
+
+    def _active_key(self, execution_arn):
+        return "{}{}".format(_ACTIVE_PREFIX, execution_arn)
+
+    def _due_key(self, record):
+        return "{}{}/{}".format(_DUE_PREFIX, _due_bucket(record["NextCheck"]), record["ExecutionArn"])
+
+    def _put_object(self, key, record):
+        self._client.put_object(
+            Bucket=self._bucket,
+            Key=key,
+            Body=bytearray(dumps(record)),
+            ContentType="application/json")
+
+    def _delete_object(self, key):
+        try:
+            self._client.delete_object(Bucket=self._bucket, Key=key)
+        except Exception as e:
+            print("Error deleting {}: {}".format(key, e))
+
+    def put(self, record, previous=None):
+        record = self._prepare(record)
+        self._put_object(self._active_key(record["ExecutionArn"]), record)
+        self._put_object(self._due_key(record), record)
+        if previous and previous.get("NextCheck", None) is not None and self._due_key(previous) != self._due_key(record):
+            self._delete_object(self._due_key(previous))
+        return record
+
+    def put_many(self, records):
+        # S3 has no bulk put, so the objects are written concurrently
+        def put_record(record):
+            try:
+                self.put(record)
+                return None
+            except Exception as e:
+                return (record, e)
+
+        if len(records) < 2:
+            return [ f for f in map(put_record, records) if f ]
+        pool = ThreadPool(min(_S3_PUT_WORKERS, len(records)))
+        try:
+            return [ f for f in pool.map(put_record, records) if f ]
+        finally:
+            pool.close()
+
+    def get(self, execution_arn):
+        try:
+            resp = self._client.get_object(Bucket=self._bucket, Key=self._active_key(execution_arn))
+            return loads(resp["Body"].read())
+        except Exception as e:
+            print("No active execution record for {}: {}".format(execution_arn, e))
+            return None
+
+    def remove(self, record):
+        if record.get("NextCheck", None) is not None:
+            self._delete_object(self._due_key(record))
+        self._delete_object(self._active_key(record["ExecutionArn"]))
+
+    def archive(self, record):
+        archive_key = "Archive/{}".format(record["ExecutionArn"])
+        print("Archiving execution to {}".format(archive_key))
+        self._put_object(archive_key, record)
+        self.remove(record)
+
+    def due(self, now=None, limit=None):
+        now = time() if now is None else now
+        now_bucket = _due_bucket(now)
+        records = []
+        kwargs = { "Bucket": self._bucket, "Prefix": _DUE_PREFIX }
+        while True:
+            resp = self._client.list_objects_v2(**kwargs)
+            for key_info in resp.get("Contents", []):
+                if key_info["Key"][len(_DUE_PREFIX):].split("/")[0] > now_bucket or (limit and len(records) >= limit):
+                    return records
+                resp_object = self._client.get_object(Bucket=self._bucket, Key=key_info["Key"])
+                record = loads(resp_object["Body"].read())
+                if record["NextCheck"] <= now:
+                    records.append(record)
+            if not resp.get("IsTruncated", False):
+                return records
+            kwargs["ContinuationToken"] = resp["NextContinuationToken"]
+
+class DynamoDBRegistry(ActiveExecutionRegistry):
+    """
+    Registry held in a DynamoDB table with hash key ExecutionArn (S), and a global secondary
+    index (default name "NextCheck") with hash key Shard (S) and range key NextCheck (N).  The
+    record is held as JSON in the Record attribute.  due() is a single indexed query.
+    """
+
+    def __init__(self, table, dynamodb_client=None, index_name="NextCheck"):
+        self._table = table
+        self._index_name = index_name
+        self._client = dynamodb_client or get_client('dynamodb')
+
+    @staticmethod
+    def _item(record):
+        return {
+            "ExecutionArn": { "S": record["ExecutionArn"] },
+            "Shard": { "S": _DUE_INDEX_SHARD },
+            "NextCheck": { "N": repr(record["NextCheck"]) },
+            "Record": { "S": dumps(record) }
+        }
+
+    def put(self, record, previous=None):
+        record = self._prepare(record)
+        self._client.put_item(TableName=self._table, Item=self._item(record))
+        return record
+
+    def put_many(self, records):
+        # Written with batch_write_item, retrying any unprocessed items with backoff
+        failures = []
+        for i in range(0, len(records), _DYNAMODB_BATCH_SIZE):
+            batch = {}
+            for record in records[i:i + _DYNAMODB_BATCH_SIZE]:
+                try:
+                    batch[record["ExecutionArn"]] = (record, { "PutRequest": { "Item": self._item(self._prepare(record)) } })
+                except Exception as e:
+                    failures.append((record, e))
+
+            requests = [ request for (_, request) in batch.values() ]
+            attempt = 0
+            while requests:
+                try:
+                    resp = self._client.batch_write_item(RequestItems={ self._table: requests })
+                except Exception as e:
+                    failures.extend((batch[request["PutRequest"]["Item"]["ExecutionArn"]["S"]][0], e) for request in requests)
+                    break
+                requests = resp.get("UnprocessedItems", {}).get(self._table, [])
+                attempt += 1
+                if requests and attempt >= _DYNAMODB_BATCH_ATTEMPTS:
+                    failures.extend(
+                        (batch[request["PutRequest"]["Item"]["ExecutionArn"]["S"]][0], Exception("Unprocessed after {} attempts".format(attempt)))
+                        for request in requests)
+                    break
+                if requests:
+                    sleep(0.05 * (2 ** attempt))
+        return failures
+
+    def get(self, execution_arn):
+        resp = self._client.get_item(
+            TableName=self._table,
+            Key={ "ExecutionArn": { "S": execution_arn } },
+            ConsistentRead=True)
+        item = resp.get("Item", None)
+        return loads(item["Record"]["S"]) if item else None
+
+    def remove(self, record):
+        self._client.delete_item(
+            TableName=self._table,
+            Key={ "ExecutionArn": { "S": record["ExecutionArn"] } })
+
+    def due(self, now=None, limit=None):
+        now = time() if now is None else now
+        records = []
+        kwargs = {
+            "TableName": self._table,
+            "IndexName": self._index_name,
+            "KeyConditionExpression": "Shard = :shard AND NextCheck <= :now",
+            "ExpressionAttributeValues": { ":shard": { "S": _DUE_INDEX_SHARD }, ":now": { "N": repr(float(now)) } }
+        }
+        if limit:
+            kwargs["Limit"] = limit
+        while True:
+            resp = self._client.query(**kwargs)
+            records.extend(loads(item["Record"]["S"]) for item in resp.get("Items", []))
+            if "LastEvaluatedKey" not in resp or (limit and len(records) >= limit):
+                return records[:limit]
+            kwargs["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def schedule_new(record, now=None, heartbeat_seconds=None):
+    """
+    Sets the heartbeat and status check schedule of a newly launched execution
+    """
+    now = time() if now is None else now
+    if heartbeat_seconds:
+        record["HeartbeatInterval"] = max(_SWEEP_INTERVAL, heartbeat_seconds * _HEARTBEAT_FRACTION)
+    else:
+        record["HeartbeatInterval"] = _SWEEP_INTERVAL
+    record["CheckInterval"] = _MIN_CHECK_INTERVAL
+    record["NextHeartbeat"] = now + record["HeartbeatInterval"]
+    record["NextStatusCheck"] = now + record["CheckInterval"]
+    record["NextCheck"] = min(record["NextHeartbeat"], record["NextStatusCheck"])
+    return record
+
+def heartbeat_due(record, now):
+    return record.get("NextHeartbeat", 0) <= now
+
+def status_check_due(record, now):
+    return record.get("NextStatusCheck", 0) <= now
+
+def schedule_next(record, now, heartbeat_sent=False, status_checked=False):
+    """
+    Returns the updated schedule of a running execution, after its heartbeat and/or status check.
+    Status checks back off exponentially, as long running children are unlikely to be about to complete
+    """
+    record = dict(record)
+    record.setdefault("HeartbeatInterval", _SWEEP_INTERVAL)
+    record.setdefault("CheckInterval", _MIN_CHECK_INTERVAL)
+    if heartbeat_sent or "NextHeartbeat" not in record:
+        record["NextHeartbeat"] = now + record["HeartbeatInterval"]
+    if status_checked or "NextStatusCheck" not in record:
+        record["NextStatusCheck"] = now + record["CheckInterval"]
+        record["CheckInterval"] = min(_MAX_CHECK_INTERVAL, record["CheckInterval"] * 2)
+    record["NextCheck"] = min(record["NextHeartbeat"], record["NextStatusCheck"])
+    return record
+
+def create_registry(bucket=None, backend=None, table=None, s3_client=None, dynamodb_client=None):
+    """
+    Returns the registry selected by backend, defaulting to the ACTIVE_EXECUTION_REGISTRY environment
+    variable ("s3", "dynamodb" or "memory"), and then to S3.  The DynamoDB table defaults to the
+    ACTIVE_EXECUTION_TABLE environment variable.
+    """
+    backend = (backend or os.environ.get("ACTIVE_EXECUTION_REGISTRY", "s3")).lower()
+    if backend == "s3":
+        if not bucket:
+            raise Exception("A bucket is required for the S3 active execution registry")
+        return S3Registry(bucket, s3_client=s3_client)
+    if backend == "dynamodb":
+        table = table or os.environ.get("ACTIVE_EXECUTION_TABLE", None)
+        if not table:
+            raise Exception("A table is required for the DynamoDB active execution registry")
+        return DynamoDBRegistry(table, dynamodb_client=dynamodb_client)
+    if backend == "memory":
+        return InMemoryRegistry()
+    raise Exception("Unknown active execution registry backend '{}'".format(backend))
@@ -0,0 +1,63 @@
+import boto3
+from botocore.config import Config
+from threading import Lock
+
+# Clients shared by the helper Lambdas.  Creating a client resolves endpoints and credentials, and each
+# client owns its own connection pool, so clients are created once per container and reused across warm
+# invocations (and across threads - clients, unlike sessions, are thread safe).
+
+_MAX_POOL_CONNECTIONS = 16
+_MAX_ATTEMPTS = 5
+
+# Errors returned by SendTask* when the Task has already been completed (e.g. by another helper Lambda) or has timed out
+_TASK_CLOSED_ERRORS = ["TaskDoesNotExist", "TaskTimedOut", "InvalidToken"]
+
+_CLIENTS = {}
+_STUBS = {}
+_LOCK = Lock()
+
+def get_client(service, read_timeout=None, max_pool_connections=_MAX_POOL_CONNECTIONS):
+    """
+    Returns the cached client for the service and configuration, creating it on first use.
+    A client registered with set_client() is returned in preference
+    """
+    stub = _STUBS.get(service, None)
+    if stub is not None:
+        return stub
+
+    key = (service, read_timeout, max_pool_connections)
+    client = _CLIENTS.get(key, None)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(key, None)
+            if client is None:
+                options = { "max_pool_connections": max_pool_connections, "retries": { "max_attempts": _MAX_ATTEMPTS } }
+                if read_timeout:
+                    options["read_timeout"] = read_timeout
+                client = boto3.client(service, config=Config(**options))
+                _CLIENTS[key] = client
+    return client
+
+def set_client(service, client):
+    """
+    Registers the client to be returned for the service, whatever the configuration requested -
+    e.g. a client wrapped by botocore.stub.Stubber, for tests.  None removes the registration
+    """
+    if client is None:
+        _STUBS.pop(service, None)
+    else:
+        _STUBS[service] = client
+
+def task_closed(e):
+    """
+    Returns whether the exception raised by a SendTask* call shows that the Task is no longer open
+    """
+    return getattr(e, "response", {}).get("Error", {}).get("Code", None) in _TASK_CLOSED_ERRORS
+
+def reset_clients():
+    """
+    Discards all cached and registered clients
+    """
+    with _LOCK:
+        _CLIENTS.clear()
+        _STUBS.clear()
@@ -0,0 +1,87 @@
+from active_execution_registry import create_registry
+from aws_clients import get_client, task_closed
+from json import dumps
+
+_S3_BUCKET="k22-branchs3bucket-1kk5rhiq8zrid"
+
+_TERMINAL_STATUSES = ["SUCCEEDED", "FAILED", "TIMED_OUT", "ABORTED"]
+
+# Created on first use and reused by warm invocations.  Tests can supply their own registry
+# and client to process_event(), or register stub clients with aws_clients.set_client()
+_REGISTRY = None
+
+def get_clients():
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = create_registry(bucket=_S3_BUCKET)
+    return (_REGISTRY, get_client('stepfunctions'))
+
+def extract_event_details(event):
+    if event.get("detail-type", None) != "Step Functions Execution Status Change":
+        raise Exception("Event is not a Step Functions Execution Status Change")
+    detail = event.get("detail", None)
+    if not detail:
+        raise Exception("detail not present in event")
+    execution_arn = detail.get("executionArn", None)
+    if not execution_arn:
+        raise Exception("executionArn not present in event detail")
+    status = detail.get("status", None)
+    if not status:
+        raise Exception("status not present in event detail")
+    return (execution_arn, status, detail)
+
+def get_output(sf_client, execution_arn, detail):
+    # Large outputs are omitted from events, so fall back to the execution itself
+    if detail.get("output", None) is not None:
+        return detail["output"]
+    resp = sf_client.describe_execution(executionArn=execution_arn)
+    return resp.get("output", "")
+
+def complete_task(sf_client, execution_data, status, output, detail):
+    try:
+        if status == "SUCCEEDED":
+            print("\tBranch processing succesful")
+            sf_client.send_task_success(
+                taskToken=execution_data["TaskToken"],
+                output=output)
+        else:
+            cause = output or dumps({ "Status": status, "Error": detail.get("error", None), "Cause": detail.get("cause", None) })
+            print("\tBranch processing failed:\n\t{}".format(cause))
+            sf_client.send_task_failure(
+                taskToken=execution_data["TaskToken"],
+                error="Processing error",
+                cause=cause)
+    except Exception as e:
+        # The task may already have been completed by the poller, or timed out.  Any other error is raised, so
+        # that the record is kept for the event to be retried, or for the poller to complete the task
+        if not task_closed(e):
+            raise
+        print("Task already completed for {}: {}".format(execution_data["ExecutionArn"], e))
+
+def process_event(event, registry, sf_client):
+    (execution_arn, status, detail) = extract_event_details(event)
+    if status not in _TERMINAL_STATUSES:
+        return False
+
+    # Not a branched execution, already completed by the poller, or not yet registered by the launcher
+    # (in which case the poller will complete it)
+    execution_data = registry.get(execution_arn)
+    if execution_data is None:
+        return False
+
+    output = get_output(sf_client, execution_arn, detail)
+    complete_task(sf_client, execution_data, status, output, detail)
+
+    execution_data["Status"] = status
+    execution_data["Output"] = output
+    registry.archive(execution_data)
+    return True
+
+def lambda_handler(event, context):
+    try:
+        (registry, sf_client) = get_clients()
+        process_event(event, registry, sf_client)
+    except Exception as e:
+        # Raised so that EventBridge retries the event
+        print("Caught unexpected error during processing: {}".format(e))
+        raise
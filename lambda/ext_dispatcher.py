@@ -0,0 +1,243 @@
+import os
+import zlib
+from base64 import b64decode, b64encode
+from hashlib import sha256
+from json import dumps, loads
+
+# Iteration results may be passed between states as a compressed blob:
+#   { "Codec": "zlib", "Data": base64(zlib(json)) }
+# Every operation decodes blobs it receives, but results are only encoded if the
+# Codec is requested, and ForFinalizer / ForFinalizerParallelIterations always return plain JSON
+_CODECS = [ "zlib" ]
+
+def decode(value):
+    if isinstance(value, dict) and value.get("Codec", None) in _CODECS:
+        return loads(zlib.decompress(b64decode(value["Data"])).decode("utf-8"))
+    return value
+
+def encode(value, codec):
+    if not codec:
+        return value
+    data = zlib.compress(dumps(value, separators=(",", ":")).encode("utf-8"))
+    return { "Codec": codec, "Data": b64encode(data).decode("ascii") }
+
+def for_initializer(event, codec=None):
+    return [event, encode([], codec)]
+
+def for_input_extractor(event, codec=None):
+    """
+    Expects a list [ InputData, [...] ]
+    """
+    return event[0]
+
+def for_consolidator(event, codec=None):
+    """
+    Expects event in the form:
+        [ [I, [O1, O2, ... On-1], On ]
+
+    Returns:
+        [ I, [O1, O2, ... On ]
+
+    Any further elements of the first list (such as the checkpoint of a checkpointed For) are retained
+    """
+    results = decode(event[0][1])
+    results.append(event[1])
+    return [ event[0][0], encode(results, codec) ] + event[0][2:]
+
+def for_finalizer(event, codec=None):
+    """
+    Expects a two element list: [ Input, [...] ]
+
+    Returns the second element
+    """
+    return decode(event[1])
+
+def for_finalizer_parallel(event, codec=None):
+    """
+    Expects input of the form:
+
+        [ [ Input, [ O1 ] ], ... [ Input, [On ] ] ]
+
+    Returns: [ O1, ... On ]
+
+    """
+    return [ decode(e[1])[0] for e in event ]
+
+def limited_parallel_consolidator(event, codec=None):
+    """
+    Expecting: [ Input, [ O1, ..., On-1 ], [On, ... On+r ] ]
+
+    Returns: [ Input, [ O1, ... On+r ] ]
+    """
+    return [ event[0], encode(decode(event[1]) + decode(event[2]), codec) ]
+
+# The outputs of the completed iterations of a checkpointed For are saved after each iteration to the store
+# selected by the FOR_CHECKPOINT_STORE environment variable:
+#   "s3"    - objects in the FOR_CHECKPOINT_BUCKET bucket, beneath FOR_CHECKPOINT_PREFIX (default "Checkpoint/")
+#   "local" - files in the FOR_CHECKPOINT_DIRECTORY directory (default /tmp/awssl-checkpoints), a stand-in for
+#             testing, as the files only survive as long as the container
+# The default is "s3", which raises an error if FOR_CHECKPOINT_BUCKET is not set - "local" must be selected explicitly
+class S3CheckpointStore(object):
+
+    def __init__(self, bucket, prefix="Checkpoint/", s3_client=None):
+        if s3_client is None:
+            import boto3
+            s3_client = boto3.client("s3")
+        self._bucket = bucket
+        self._prefix = prefix
+        self._client = s3_client
+
+    def get(self, key):
+        try:
+            resp = self._client.get_object(Bucket=self._bucket, Key=self._prefix + key)
+        except self._client.exceptions.NoSuchKey:
+            return None
+        return loads(resp["Body"].read().decode("utf-8"))
+
+    def put(self, key, value):
+        self._client.put_object(
+            Bucket=self._bucket,
+            Key=self._prefix + key,
+            Body=dumps(value, separators=(",", ":")).encode("utf-8"),
+            ContentType="application/json")
+
+    def delete(self, key):
+        self._client.delete_object(Bucket=self._bucket, Key=self._prefix + key)
+
+class LocalCheckpointStore(object):
+
+    def __init__(self, directory="/tmp/awssl-checkpoints"):
+        self._directory = directory
+
+    def _path(self, key):
+        return os.path.join(self._directory, key)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "r") as f:
+                return loads(f.read())
+        except (IOError, OSError):
+            return None
+
+    def put(self, key, value):
+        if not os.path.isdir(self._directory):
+            os.makedirs(self._directory)
+        # Written then renamed, so that a partially written checkpoint is never read
+        path = self._path(key)
+        with open(path + ".tmp", "w") as f:
+            f.write(dumps(value, separators=(",", ":")))
+        os.rename(path + ".tmp", path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except (IOError, OSError):
+            pass
+
+def create_checkpoint_store(backend=None):
+    """
+    Returns the store selected by backend, defaulting to the FOR_CHECKPOINT_STORE environment variable, and then to S3.
+    The local store does not survive the container, so is only used if requested explicitly
+    """
+    bucket = os.environ.get("FOR_CHECKPOINT_BUCKET", None)
+    backend = (backend or os.environ.get("FOR_CHECKPOINT_STORE", "s3")).lower()
+    if backend == "s3":
+        if not bucket:
+            raise Exception("FOR_CHECKPOINT_BUCKET is required for the S3 checkpoint store (set FOR_CHECKPOINT_STORE=local to use local files)")
+        return S3CheckpointStore(bucket, prefix=os.environ.get("FOR_CHECKPOINT_PREFIX", "Checkpoint/"))
+    if backend == "local":
+        return LocalCheckpointStore(os.environ.get("FOR_CHECKPOINT_DIRECTORY", "/tmp/awssl-checkpoints"))
+    raise Exception("Unknown checkpoint store '{}'".format(backend))
+
+# Created on first use and reused by warm invocations.  Tests can assign their own store
+_CHECKPOINT_STORE = None
+
+def get_checkpoint_store():
+    global _CHECKPOINT_STORE
+    if _CHECKPOINT_STORE is None:
+        _CHECKPOINT_STORE = create_checkpoint_store()
+    return _CHECKPOINT_STORE
+
+def checkpoint_key(checkpoint):
+    # Keys may be any string (the default is the execution ARN), so are hashed to be safe as object or file names
+    return sha256(dumps([ checkpoint["Key"], checkpoint["Name"] ]).encode("utf-8")).hexdigest()
+
+def for_checkpoint_initializer(event, codec=None):
+    """
+    Expects: { "Input": I, "Name": Name, "Key": Key }
+
+    Returns: [ I, [ O1, ... Ok ], k, { "Name": Name, "Key": Key } ], where O1 ... Ok are the outputs of the
+    iterations already completed under the checkpoint key and the name of the For state
+    """
+    checkpoint = { "Name": event["Name"], "Key": event["Key"] }
+    results = get_checkpoint_store().get(checkpoint_key(checkpoint)) or []
+    return [ event["Input"], encode(results, codec), len(results), checkpoint ]
+
+def for_checkpoint_consolidator(event, codec=None):
+    """
+    Expects: [ [ I, [ O1, ... On-1 ], n-1, Checkpoint ], On ]
+
+    Returns: [ I, [ O1, ... On ], n, Checkpoint ], having saved [ O1, ... On ] to the checkpoint
+    """
+    checkpoint = event[0][3]
+    results = decode(event[0][1])
+    results.append(event[1])
+    get_checkpoint_store().put(checkpoint_key(checkpoint), results)
+    return [ event[0][0], encode(results, codec), len(results), checkpoint ]
+
+def for_checkpoint_finalizer(event, codec=None):
+    """
+    Expects: [ I, [ O1, ... On ], n, Checkpoint ]
+
+    Returns [ O1, ... On ], having deleted the checkpoint
+    """
+    get_checkpoint_store().delete(checkpoint_key(event[3]))
+    return decode(event[1])
+
+class HedgedTaskCompleted(Exception):
+    pass
+
+def hedged_task_completed(event, codec=None):
+    """
+    Raises HedgedTaskCompleted, with the result of the winning invocation as its message
+    """
+    raise HedgedTaskCompleted(dumps(decode(event)))
+
+def hedged_task_result(event, codec=None):
+    """
+    Expects: { "Error": "HedgedTaskCompleted", "Cause": Cause }
+
+    Returns the result carried by the error message within the Cause
+    """
+    return loads(loads(event["Cause"])["errorMessage"])
+
+# Keyed by the names used by awssl.ext.set_ext_arns
+_OPERATIONS = {
+    "ForInitializer": for_initializer,
+    "ForExtractor": for_input_extractor,
+    "ForConsolidator": for_consolidator,
+    "ForFinalizer": for_finalizer,
+    "ForFinalizerParallelIterations": for_finalizer_parallel,
+    "LimitedParallelConsolidator": limited_parallel_consolidator,
+    "HedgedTaskCompleted": hedged_task_completed,
+    "HedgedTaskResult": hedged_task_result,
+    "ForCheckpointInitializer": for_checkpoint_initializer,
+    "ForCheckpointConsolidator": for_checkpoint_consolidator,
+    "ForCheckpointFinalizer": for_checkpoint_finalizer
+}
+
+def lambda_handler(event, context):
+    """
+    Performs all the awssl.ext operations in one function, so that warm containers are shared between them.
+
+    Expects: { "Operation": Name, "Input": Input, "Codec": Codec }, where Codec is optional
+
+    Returns the result of the named operation on the Input
+    """
+    operation = _OPERATIONS.get(event.get("Operation", None), None)
+    if not operation:
+        raise Exception("Unknown operation: {}".format(event.get("Operation", None)))
+    codec = event.get("Codec", None)
+    if codec and codec not in _CODECS:
+        raise Exception("Unknown codec: {}".format(codec))
+    return operation(event["Input"], codec)
@@ -0,0 +1,12 @@
+from json import dumps
+
+class HedgedTaskCompleted(Exception):
+    pass
+
+def lambda_handler(event, context):
+    """
+    Expects the result of the first successful invocation of a HedgedTask
+
+    Raises HedgedTaskCompleted, with the result as its message, so that the other invocations are stopped
+    """
+    raise HedgedTaskCompleted(dumps(event))
@@ -0,0 +1,9 @@
+from json import loads
+
+def lambda_handler(event, context):
+    """
+    Expects the caught HedgedTaskCompleted error: { "Error": "HedgedTaskCompleted", "Cause": Cause }
+
+    Returns the result carried by the error message within the Cause
+    """
+    return loads(loads(event["Cause"])["errorMessage"])
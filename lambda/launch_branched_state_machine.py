@@ -1,11 +1,28 @@
-import boto3
+from active_execution_registry import create_registry, schedule_new
+from aws_clients import get_client, task_closed
 from json import loads, dumps
+from multiprocessing.pool import ThreadPool
 from uuid import uuid4
 
 _S3_BUCKET="1a1aaf8a-a15a-4b74-b2ba-817834541988"
 
-def extract_event_details(event):
-    message = event.get('Records', [{}])[0].get('Sns', {}).get('Message', None)
+# Maximum number of executions started concurrently
+_MAX_WORKERS = 16
+
+# Error reported to the parent Task when its execution cannot be launched, and the maximum length of its cause
+_LAUNCH_ERROR = "Launch error"
+_MAX_CAUSE_LENGTH = 32768
+
+_REGISTRY = None
+
+def get_registry():
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = create_registry(bucket=_S3_BUCKET)
+    return _REGISTRY
+
+def extract_record_details(record):
+    message = record.get('Sns', {}).get('Message', None)
     if message == None:
         raise Exception("Message does not exist in event")
     message = loads(message)
@@ -18,18 +35,20 @@ def extract_event_details(event):
     branch_arn = input_data.pop('BranchArn', None)
     if branch_arn == None:
         raise Exception("BranchArn not present in the provided InputData")
+    heartbeat_seconds = input_data.pop('HeartbeatSeconds', None)
+    # A Task using Parameters passes the execution input separately from the BranchArn
+    input_data = input_data.get('BranchInput', input_data)
     activity_arn = message.get('ActivityArn', None)
     if activity_arn == None:
         raise Exception("ActivityArn not present in event")
-    return (task_token, input_data, branch_arn, activity_arn)
+    return (task_token, input_data, branch_arn, activity_arn, heartbeat_seconds)
 
 def start_execution(branch_arn, input_data):
     print("Starting execution of {} with inputs {}".format(branch_arn, input_data))
     try:
         execution_name = str(uuid4())
         
-        client = boto3.client('stepfunctions')
-        resp = client.start_execution(
+        resp = get_client('stepfunctions').start_execution(
             stateMachineArn=branch_arn, 
             name=execution_name,
             input=dumps(input_data))
@@ -39,32 +58,93 @@ def start_execution(branch_arn, input_data):
     except Exception as e:
         raise Exception("Error starting Branch {}: {}".format(branch_arn, e))
 
-def save_s3_file(s3_file_content):
-    try:
-        key = "Active/{}".format(s3_file_content["ExecutionArn"])
-        print("Saving execution details to S3: {}:{}".format(_S3_BUCKET, key))
-        client = boto3.client('s3')
-        resp = client.put_object(
-            Bucket=_S3_BUCKET,
-            Key=key,
-            Body=bytearray(dumps(s3_file_content)),
-            ContentType="application/json")
-        print("Save successful")
-    except Exception as e:
-        raise Exception("Error saving execution details {}: {}".format(s3_file_content, e))
-
-def process_task(task_token, input_data, branch_arn, activity_arn):
+def launch_task(task_token, input_data, branch_arn, activity_arn, heartbeat_seconds=None):
     s3_file_content = { "TaskToken": task_token, "ActivityArn": activity_arn, "InputData": input_data }
     resp = start_execution(branch_arn, input_data)
     s3_file_content["Name"] = resp["Name"]
     s3_file_content["ExecutionArn"] = resp["ExecutionArn"]
-    save_s3_file(s3_file_content)
+    return schedule_new(s3_file_content, heartbeat_seconds=heartbeat_seconds)
+
+def record_task_token(record):
+    # The TaskToken of a record that could not be launched, if it has one
+    try:
+        return loads(record['Sns']['Message']).get('TaskToken', None)
+    except Exception:
+        return None
+
+def fail_task(task_token, cause):
+    """
+    Fails the parent Task, rather than leave it to wait for its HeartbeatSeconds or TimeoutSeconds to expire.
+    Returns whether the Task is no longer open
+    """
+    try:
+        get_client('stepfunctions').send_task_failure(taskToken=task_token, error=_LAUNCH_ERROR, cause=cause[:_MAX_CAUSE_LENGTH])
+        return True
+    except Exception as e:
+        if task_closed(e):
+            return True
+        print("Error failing task: {}".format(e))
+        return False
+
+def stop_execution(execution_arn, cause):
+    # An execution that could not be registered would not be monitored, so is stopped
+    try:
+        get_client('stepfunctions').stop_execution(executionArn=execution_arn, error=_LAUNCH_ERROR, cause=cause[:_MAX_CAUSE_LENGTH])
+    except Exception as e:
+        print("Error stopping execution {}: {}".format(execution_arn, e))
+
+def process_records(records):
+    """
+    Launches the executions requested by each of the records concurrently, then registers them in bulk.
+    Returns a result per record, in record order - either the ExecutionArn, or the Error.  The parent Task
+    of a record that fails is failed, and TaskFailed reports whether this succeeded
+    """
+    def launch_record(record):
+        try:
+            return launch_task(*extract_record_details(record))
+        except Exception as e:
+            return e
+
+    if len(records) < 2:
+        launched = [ launch_record(record) for record in records ]
+    else:
+        pool = ThreadPool(min(_MAX_WORKERS, len(records)))
+        try:
+            launched = pool.map(launch_record, records)
+        finally:
+            pool.close()
+
+    failures = {}
+    try:
+        registered = get_registry().put_many([ r for r in launched if not isinstance(r, Exception) ])
+        failures = dict((record["ExecutionArn"], error) for (record, error) in registered)
+    except Exception as e:
+        failures = dict((r["ExecutionArn"], e) for r in launched if not isinstance(r, Exception))
+
+    results = []
+    for (index, r) in enumerate(launched):
+        if isinstance(r, Exception):
+            task_token = record_task_token(records[index])
+            results.append({ "Index": index, "Error": str(r),
+                "TaskFailed": fail_task(task_token, str(r)) if task_token else False })
+        elif r["ExecutionArn"] in failures:
+            error = "Error saving execution details: {}".format(failures[r["ExecutionArn"]])
+            stop_execution(r["ExecutionArn"], error)
+            results.append({ "Index": index, "ExecutionArn": r["ExecutionArn"], "Error": error,
+                "TaskFailed": fail_task(r["TaskToken"], error) })
+        else:
+            results.append({ "Index": index, "ExecutionArn": r["ExecutionArn"] })
+    return results
 
 def lambda_handler(event, context):
     try:
         print("Processing event: {}".format(event))
-        (task_token, input_data, branch_arn, activity_arn) = extract_event_details(event)
-        process_task(task_token, input_data, branch_arn, activity_arn)
-        print("Processing completed")
+        results = process_records(event.get('Records', None) or [{}])
+        for result in results:
+            if "Error" in result:
+                print("Error processing record {}:\n\t{}".format(result["Index"], result["Error"]))
+        print("Processing completed: {} of {} records launched".format(
+            len([ r for r in results if "Error" not in r ]), len(results)))
+        return results
     except Exception as e:
         print("Unexpected error in processing:\n\t{}".format(e))
@@ -1,13 +1,24 @@
-import boto3
-from botocore.config import Config
+from aws_clients import get_client
 from datetime import datetime, timedelta
 from json import loads, dumps
+from threading import Thread
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
 
-_LAMBDA_TIMEOUT=180
+_LAMBDA_TIMEOUT=120
 _READ_TIMEOUT=65
 _POST_PROCESS_INTERVAL = 2
 
-_WORKER_NAME="B3"
+# Tasks are published by a dispatcher thread, so polling continues while publishes are in flight.
+# Tasks waiting together are published in batches within the SNS limits of 10 messages and 256 KB
+_PUBLISH_BATCH_SIZE = 10
+_PUBLISH_BATCH_BYTES = 256 * 1024
+_PUBLISH_ATTEMPTS = 3
+_STOP = None
+
+_WORKER_NAME="BranchActivityMonitor"
 _SNS_TOPIC_ARN="arn:aws:sns:eu-west-1:665796216255:Blah"
 
 def extract_event_details(event):
@@ -18,7 +29,7 @@ def extract_event_details(event):
 
 def get_task(activity_arn):
     try:
-        client = boto3.client('stepfunctions', config=Config(read_timeout=_READ_TIMEOUT))
+        client = get_client('stepfunctions', read_timeout=_READ_TIMEOUT)
         resp = client.get_activity_task(activityArn=activity_arn, workerName=_WORKER_NAME)
         task_token = resp.get('taskToken', '')
         if task_token:
@@ -28,32 +39,119 @@ def get_task(activity_arn):
     except Exception as e:
         raise Exception("Error checking Activity '{}' for pending tasks: {}".format(activity_arn, e))
 
-def dispatch_tasks(activity_arn, task_token, input_data):
+def encode_task(activity_arn, task_token, input_data):
+    # Encoded once - the message is published as is, rather than wrapped in a "default" structure
+    return dumps({ "ActivityArn": activity_arn, "TaskToken": task_token, "InputData": input_data })
+
+def fail_task(task_token, cause):
+    # The task cannot be dispatched, so fail it rather than leave the parent waiting for its timeout
     try:
-        client = boto3.client('sns')
-        resp = client.publish(
-            TopicArn=_SNS_TOPIC_ARN,
-            MessageStructure='json',
-            Message=dumps({"default": dumps({ "ActivityArn": activity_arn, "TaskToken": task_token, "InputData": input_data }) } ) )
-        print("Dispatched TaskToken '{}' to SNS Topic '{}'".format(task_token, _SNS_TOPIC_ARN))
+        get_client('stepfunctions').send_task_failure(taskToken=task_token, error="Dispatch error", cause=cause)
     except Exception as e:
-        raise Exception("Error dispatching task: {}".format(e))
+        print("Error failing undispatched TaskToken '{}': {}".format(task_token, e))
+
+def batch_tasks(tasks):
+    """
+    Splits the (task_token, message) pairs into batches within the PublishBatch limits
+    """
+    batches = [[]]
+    size = 0
+    for task in tasks:
+        # Messages are ASCII JSON, so characters are bytes
+        length = len(task[1])
+        if batches[-1] and (len(batches[-1]) == _PUBLISH_BATCH_SIZE or size + length > _PUBLISH_BATCH_BYTES):
+            batches.append([])
+            size = 0
+        batches[-1].append(task)
+        size += length
+    return batches
+
+def publish_batch(sns, tasks):
+    """
+    Publishes the tasks with a single PublishBatch, returning those that were not published
+    """
+    pending = dict((str(i), task) for (i, task) in enumerate(tasks))
+    for attempt in range(_PUBLISH_ATTEMPTS):
+        try:
+            resp = sns.publish_batch(
+                TopicArn=_SNS_TOPIC_ARN,
+                PublishBatchRequestEntries=[ { "Id": i, "Message": task[1] } for (i, task) in pending.items() ])
+        except Exception as e:
+            print("Error dispatching tasks: {}".format(e))
+            continue
+        for entry in resp.get("Successful", []):
+            print("Dispatched TaskToken '{}' to SNS Topic '{}'".format(pending.pop(entry["Id"])[0], _SNS_TOPIC_ARN))
+        for entry in resp.get("Failed", []):
+            print("Error dispatching TaskToken '{}': {}".format(pending[entry["Id"]][0], entry.get("Message", entry.get("Code"))))
+        break
+    return list(pending.values())
+
+def publish_task(sns, task):
+    """
+    Publishes a single task, returning whether it was published
+    """
+    for attempt in range(_PUBLISH_ATTEMPTS):
+        try:
+            sns.publish(TopicArn=_SNS_TOPIC_ARN, Message=task[1])
+            print("Dispatched TaskToken '{}' to SNS Topic '{}'".format(task[0], _SNS_TOPIC_ARN))
+            return True
+        except Exception as e:
+            print("Error dispatching TaskToken '{}': {}".format(task[0], e))
+    return False
+
+def dispatch_tasks(tasks):
+    """
+    Publishes the (task_token, message) pairs, returning the list of those that could not be published
+    """
+    sns = get_client('sns')
+    pending = tasks
+    # PublishBatch is missing from the boto3 bundled with older Lambda runtimes (including python2.7)
+    if hasattr(sns, "publish_batch"):
+        pending = []
+        for batch in batch_tasks(tasks):
+            pending.extend(publish_batch(sns, batch))
+    # Entries that PublishBatch could not publish are retried individually before their tasks are failed
+    return [ task for task in pending if not publish_task(sns, task) ]
+
+def run_dispatcher(queue):
+    stopping = False
+    while not stopping:
+        tasks = [ queue.get() ]
+        while len(tasks) < _PUBLISH_BATCH_SIZE:
+            try:
+                tasks.append(queue.get_nowait())
+            except Empty:
+                break
+        if _STOP in tasks:
+            stopping = True
+            tasks = [ task for task in tasks if task is not _STOP ]
+        if tasks:
+            for (task_token, _) in dispatch_tasks(tasks):
+                fail_task(task_token, "Unable to publish task to SNS Topic '{}'".format(_SNS_TOPIC_ARN))
 
 def process_tasks(activity_arn):
+    print("Starting to monitor for Branch tasks for {}".format(activity_arn))
     dend = datetime.now() + timedelta(0, _LAMBDA_TIMEOUT)
-    while True:
-        if datetime.now() + timedelta(0, _READ_TIMEOUT + _POST_PROCESS_INTERVAL) > dend:
-            break
-        (task_token, input_data) = get_task(activity_arn)
-        if task_token:
-            dispatch_tasks(activity_arn, task_token, input_data)
+    queue = Queue()
+    dispatcher = Thread(target=run_dispatcher, args=(queue,))
+    dispatcher.start()
+    try:
+        while True:
+            if datetime.now() + timedelta(0, _READ_TIMEOUT + _POST_PROCESS_INTERVAL) > dend:
+                print("Insufficient time left to long poll")
+                break
+            (task_token, input_data) = get_task(activity_arn)
+            if task_token:
+                queue.put((task_token, encode_task(activity_arn, task_token, input_data)))
+    finally:
+        # Tasks already picked up are dispatched before the invocation ends
+        queue.put(_STOP)
+        dispatcher.join()
+    print("Ending monitoring for Branch tasks")
 
 def lambda_handler(event, context):
-    class ActivityMonitorException(Exception):
-        pass
-    
     try:
         (activity_arn) = extract_event_details(event)
         process_tasks(activity_arn)
     except Exception as e:
-        raise ActivityMonitorException("Error processing: {}".format(e))
+        print("Unexpected error during processing:\n\t{}".format(e))
@@ -1,117 +1,119 @@
-import boto3
+from active_execution_registry import create_registry, heartbeat_due, status_check_due, schedule_next
+from aws_clients import get_client, task_closed
 from datetime import datetime, timedelta
-from json import loads, dumps
-from time import sleep
+from multiprocessing.pool import ThreadPool
+from time import sleep, time
 
 _SLEEP = 5
 _LAMBDA_TIMEOUT=60
+_MAX_WORKERS = 16
 _S3_BUCKET="k19-branchs3bucket-1bq0zgaso93zd"
 _S3_BUCKET="k22-branchs3bucket-1kk5rhiq8zrid"
 
+_REGISTRY = None
+
+def get_registry():
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = create_registry(bucket=_S3_BUCKET)
+    return _REGISTRY
+
 def get_active_executions():
-    active_keys = []
-    
     try:
         print("Retrieving active executions")
-        client = boto3.client('s3')
-        resp = client.list_objects_v2(
-            Bucket=_S3_BUCKET,
-            Prefix="Active/")
-        for key_info in resp.get("Contents", []):
-            active_keys.append(key_info["Key"])
-        while resp.get("IsTruncated", False):
-            resp = client.list_objects_v2(
-                Bucket=_S3_BUCKET,
-                Prefix="Active/",
-                ContinuationToken=resp["NextContinuationToken"])
-            for key_info in resp["Contents"]:
-                active_keys.append(key_info["Key"])
-        print("{} executions found".format(len(active_keys)))
+        records = get_registry().due(time())
+        print("{} executions due".format(len(records)))
+        return records
     except Exception as e:
         print("Error retrieving active tasks from {}: {}".format(_S3_BUCKET, e))
-    
-    return active_keys
+        return []
 
-def process_active_execution(key):
+def process_active_execution(execution_data):
+    key = execution_data["ExecutionArn"]
     try:
-        
-        # Load details of execution
-        s3_client = boto3.client('s3')
-        excution_data = {}
-        resp = {}
-        try:
-            resp = s3_client.get_object(
-                Bucket=_S3_BUCKET,
-                Key=key)
-            execution_data = loads(resp["Body"].read())
-        except Exception as e:
-            print("Caught error retrieving key {}: {}".format(key, e))
+        now = time()
+
+        # Send heartbeat, only as often as the parent Task's heartbeat window requires
+        heartbeat_sent = False
+        if heartbeat_due(execution_data, now):
+            try:
+                get_client('stepfunctions').send_task_heartbeat(taskToken=execution_data["TaskToken"])
+                heartbeat_sent = True
+            except Exception as e:
+                if task_closed(e):
+                    print("\t{}: Task already completed: {}".format(key, e))
+                    execution_data["Status"] = "TASK_CLOSED"
+                    get_registry().archive(execution_data)
+                    return
+                print("Caught heartbeat exception: {}".format(e))
+
+        # Check on StateMachine, backing off while it keeps running
+        status_checked = status_check_due(execution_data, now)
+        if status_checked:
+            resp = get_client('stepfunctions').describe_execution(executionArn=execution_data["ExecutionArn"])
+        if not status_checked or resp["status"] == "RUNNING":
+            get_registry().put(schedule_next(execution_data, now, heartbeat_sent, status_checked), previous=execution_data)
             return
-        
-        # Send heartbeat
-        sf_client = boto3.client('stepfunctions')
+
         try:
-            sf_client.send_task_heartbeat(taskToken=execution_data["TaskToken"])
+            if resp["status"] == "SUCCEEDED":
+                print("\t{}: Branch processing succesful".format(key))
+                get_client('stepfunctions').send_task_success(
+                    taskToken=execution_data["TaskToken"],
+                    output=resp["output"])
+            else:
+                print("\t{}: Branch processing failed:\n\t{}".format(key, resp.get("output")))
+                get_client('stepfunctions').send_task_failure(
+                    taskToken=execution_data["TaskToken"],
+                    error="Processing error",
+                    cause=resp.get("output", ""))
         except Exception as e:
-            print("Caught heartbeat exception: {}".format(e))
-            
-        # Check on StateMachine
-        resp = sf_client.describe_execution(executionArn=execution_data["ExecutionArn"])
-        if resp["status"] == "RUNNING":
-            print("\tStill running")
-            return
-        
-        if resp["status"] == "SUCCEEDED":
-            print("\tBranch processing succesful")
-            sf_client.send_task_success(
-                taskToken=execution_data["TaskToken"],
-                output=resp["output"])
-        else:
-            print("\tBranch processing failed:\n\t{}".format(resp["output"]))
-            sf_client.send_task_failure(
-                taskToken=execution_data["TaskToken"],
-                error="Processing error",
-                cause=resp["output"])
-        
+            # Completed concurrently by the status handler - archive rather than retry on every sweep
+            if not task_closed(e):
+                raise
+            print("\t{}: Task already completed: {}".format(key, e))
+
         execution_data["Status"] = resp["status"]
-        execution_data["Output"] = resp["output"]
-        
+        execution_data["Output"] = resp.get("output")
+
         # Move to archival
-        archive_key = "Archive/{}".format("/".join(key.split("/")[1:]))
-        print("Archiving execution to {}".format(archive_key))
-        s3_client.put_object(
-            Bucket=_S3_BUCKET,
-            Key=archive_key,
-            Body=bytearray(dumps(execution_data)),
-            ContentType="application/json")
-        
-        # Delete active key
-        try:
-            s3_client.delete_object(
-                Bucket=_S3_BUCKET,
-                Key=key)
-        except:
-            pass
+        get_registry().archive(execution_data)
 
     except Exception as e:
         print("Error processing key {}: {}".format(key, e))
 
+def sweep(pool, dend):
+    start = time()
+    records = get_active_executions()
+
+    def process_record(record):
+        # Executions not reached before the deadline are left for the next invocation
+        if datetime.now() + timedelta(0, 5) > dend:
+            return 0
+        process_active_execution(record)
+        return 1
+
+    processed = sum(pool.map(process_record, records))
+    print("Sweep processed {} of {} due executions in {:.2f}s".format(processed, len(records), time() - start))
+
 def process():
     print("Starting to monitor for execution completion")
     dend = datetime.now() + timedelta(0, _LAMBDA_TIMEOUT)
-    while True:
-        if datetime.now() + timedelta(0, 10) > dend:
-            print("Insufficient time for monitor cycle - exiting")
-            break
-        for key in get_active_executions():
-            print("Processing: {}".format(key))
-            process_active_execution(key)
-            print("Completed processing for: {}".format(key))
-        sleep(_SLEEP)
+    pool = ThreadPool(_MAX_WORKERS)
+    try:
+        while True:
+            if datetime.now() + timedelta(0, 10) > dend:
+                print("Insufficient time for monitor cycle - exiting")
+                break
+            sweep(pool, dend)
+            sleep(_SLEEP)
+    finally:
+        pool.close()
+        pool.join()
     print("Ending monitoring for execution completion")
 
 def lambda_handler(event, context):
     try:
         process()
     except Exception as e:
-        print("Caught unexpected error during processing: {}".format(e))
\ No newline at end of file
+        print("Caught unexpected error during processing: {}".format(e))
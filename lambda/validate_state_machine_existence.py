@@ -1,39 +1,69 @@
-import boto3
+from aws_clients import get_client
+from threading import Lock
+from time import time
 from uuid import uuid4
 
-_LIST_COUNT=250
+# Results of describe_state_machine are cached per container, so warm invocations launching
+# the same branch do not call Step Functions again.  State machines that do not exist are
+# cached for less time, as they may be about to be created
+_POSITIVE_TTL = 300
+_NEGATIVE_TTL = 30
+
+_CACHE = {}
+_CACHE_LOCK = Lock()
 
 def extract_event_details(event):
+    branch_arns = event.get('BranchArns', None)
+    if branch_arns is not None:
+        if not isinstance(branch_arns, list) or not branch_arns:
+            raise Exception("BranchArns must be a non-empty list")
+        return branch_arns
     branch_arn = event.get('BranchArn', None)
     if not branch_arn:
         raise Exception("BranchArn key does not exist in event")
-    return (branch_arn)
+    return [branch_arn]
+
+def _cached(branch_arn, now):
+    with _CACHE_LOCK:
+        entry = _CACHE.get(branch_arn, None)
+        if entry and entry[1] > now:
+            return entry[0]
+        return None
+
+def _cache(branch_arn, exists, now):
+    with _CACHE_LOCK:
+        _CACHE[branch_arn] = (exists, now + (_POSITIVE_TTL if exists else _NEGATIVE_TTL))
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
 
-def check_existence(branch_arn):
-    def find_in_list(arn_list, arn):
-        for item in arn_list:
-            if item.get('stateMachineArn', None) == arn:
-                return True
-        return False
+def state_machine_exists(branch_arn, now=None):
+    """
+    Returns whether the StateMachine exists, using a single describe_state_machine call
+    unless the answer is cached.  Errors other than non-existence are raised, and not cached
+    """
+    now = time() if now is None else now
+    exists = _cached(branch_arn, now)
+    if exists is not None:
+        return exists
 
     try:
-        client = boto3.client('stepfunctions')
-
-        resp = client.list_state_machines(maxResults=_LIST_COUNT)
-        if find_in_list(resp.get('stateMachines', []), branch_arn):
-            return
-
-        while resp.get('nextToken', None):
-            resp = client.list_state_machines(
-                maxResults=_LIST_COUNT,
-                nextToken=resp['nextToken'])
-            if find_in_list(resp.get('stateMachines', []), branch_arn):
-                return
-        
-        raise Exception("StateMachine not found")
-        
+        get_client('stepfunctions').describe_state_machine(stateMachineArn=branch_arn)
+        exists = True
     except Exception as e:
-        raise Exception("Unexpected error checking existence of {}: {}".format(branch_arn, e))
+        code = getattr(e, 'response', {}).get('Error', {}).get('Code', None)
+        if code not in ['StateMachineDoesNotExist', 'InvalidArn']:
+            raise Exception("Unexpected error checking existence of {}: {}".format(branch_arn, e))
+        exists = False
+
+    _cache(branch_arn, exists, now)
+    return exists
+
+def check_all_existence(branch_arns, now=None):
+    missing = [ arn for arn in sorted(set(branch_arns)) if not state_machine_exists(arn, now) ]
+    if missing:
+        raise Exception("StateMachines not found: {}".format(", ".join(missing)))
 
 def lambda_handler(event, context):
     class ValidateStateMachineException(Exception):
@@ -42,12 +72,14 @@ def lambda_handler(event, context):
     print("Processing started for event: {}".format(event))
     try:
         # Extract details from the event
-        (branch_arn) = extract_event_details(event)
+        branch_arns = extract_event_details(event)
         
-        # Validate the StateMachine exists
-        check_existence(branch_arn)
+        # Validate the StateMachines exist
+        check_all_existence(branch_arns)
         
-        # StateMachine exists - provide a unique id for this execution of it
+        # StateMachines exist - provide a unique id for each execution of them
+        if 'BranchArns' in event:
+            return { "ExecutionIds" : [ str(uuid4()) for _ in branch_arns ] }
         return { "ExecutionId" : str(uuid4()) }
     except Exception as e:
         raise ValidateStateMachineException("Error processing: {}".format(e))
@@ -1,7 +1,7 @@
 from distutils.core import setup
 setup(
   name = 'awssl',
-  packages = ['awssl', 'awssl.ext'], 
+  packages = ['awssl', 'awssl.ext', 'awssl.tools'], 
   version = '0.2',
   description = 'Classes to generate ASL for AWS Step Functions',
   author = 'Geoff Ford',
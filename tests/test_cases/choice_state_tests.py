@@ -0,0 +1,44 @@
+def register_tests():
+	return [
+		{
+			"Name": "CompiledChoice1",
+			"Func": compiled_choice1,	
+			"ResultFileName": "./test_results/choice/compiled_choice1.json"
+		}
+	]
+
+def compiled_choice1():
+	import awssl
+	from json import dumps
+
+	# Construct states
+	default = awssl.Fail(Name="Default", ErrorCause="No Matches!")
+	first = awssl.Pass(Name="First", EndState=True)
+	second = awssl.Pass(Name="Second", EndState=True)
+	third = awssl.Pass(Name="Third", EndState=True)
+
+	choice = awssl.Choice(
+		Name="ChoiceState",
+		ChoiceList=[
+			awssl.ChoiceRule(
+				Comparison=awssl.Comparison(Variable="$.foo", Comparator="NumericEquals", Value=1),
+				NextState=first),
+			awssl.AndChoiceRule(
+				ComparisonList=[
+					awssl.Comparison(Variable="$.bar", Comparator="StringEquals", Value="x"),
+					awssl.Comparison(Variable="$.when", Comparator="TimestampLessThan", Value="2017-01-01T00:00:00Z")],
+				NextState=second),
+			awssl.NotChoiceRule(
+				Comparison=awssl.Comparison(Variable="$.flags[1].on", Comparator="BooleanEquals", Value=True),
+				NextState=third)],
+		Default=default)
+
+	# Route a set of inputs through the compiled Choice
+	route = choice.compile()
+	inputs = [
+		{ "foo": 1 },
+		{ "foo": 2, "bar": "x", "when": "2016-12-31T23:00:00-02:00", "flags": [ {}, { "on": True } ] },
+		{ "foo": 2, "bar": "x", "when": "2016-12-31T23:00:00+02:00", "flags": [ {}, { "on": True } ] },
+		{ "foo": True, "bar": "y", "flags": [ {}, { "on": False } ] }
+	]
+	return dumps([ route(i) for i in inputs ])
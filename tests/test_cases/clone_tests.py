@@ -0,0 +1,111 @@
+def register_tests():
+	return [
+		{
+			"Name": "CloneTaskWithFinally",
+			"Func": clone_task_with_finally,	
+			"ResultFileName": "./test_results/clone/clone_task_with_finally.json"
+		},
+		{
+			"Name": "CloneTaskWithFinallyRouting",
+			"Func": clone_task_with_finally_routing,	
+			"ResultFileName": "./test_results/clone/clone_task_with_finally_routing.json"
+		},
+		{
+			"Name": "CloneLimitedParallel",
+			"Func": clone_limited_parallel,	
+			"ResultFileName": "./test_results/clone/clone_limited_parallel.json"
+		},
+		{
+			"Name": "LongForLoop",
+			"Func": long_for_loop,	
+			"ResultFileName": "./test_results/clone/long_for_loop.json"
+		}
+	]
+
+def _set_arns():
+	import awssl.ext
+
+	awssl.ext.set_ext_arns(
+		ForInitializer="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME", 
+		ForExtractor="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME", 
+		ForConsolidator="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME", 
+		ForFinalizer="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME",
+		ForFinalizerParallelIterations="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME",
+		LimitedParallelConsolidator="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME")
+
+def clone_task_with_finally():
+	import awssl
+	import awssl.ext
+
+	# Construct states
+	task = awssl.ext.TaskWithFinally(
+		Name="Task",
+		ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME",
+		RetryList=[awssl.Retrier(ErrorNameList=["States.Timeout"], MaxAttempts=2)],
+		CatcherList=[awssl.Catcher(ErrorNameList=["States.ALL"], NextState=awssl.Fail(Name="Failed", ErrorCause="Task failed"))],
+		FinallyState=awssl.Pass(Name="Finally", EndState=True),
+		EndState=False,
+		NextState=awssl.Succeed(Name="Done"))
+
+	# Construct state machine from the clone
+	return awssl.StateMachine(
+		Comment="A clone of a TaskWithFinally",
+		StartState=task.clone("{}-Clone"))
+
+def clone_task_with_finally_routing():
+	import awssl
+	import awssl.ext
+
+	# Construct states - with several catchers, all routes share the finally branch
+	task = awssl.ext.TaskWithFinally(
+		Name="Task",
+		ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME",
+		CatcherList=[
+			awssl.Catcher(ErrorNameList=["States.Timeout"], NextState=awssl.Fail(Name="TimedOut", ErrorCause="Task timed out")),
+			awssl.Catcher(ErrorNameList=["States.ALL"], NextState=awssl.Fail(Name="Failed", ErrorCause="Task failed"))],
+		FinallyState=awssl.Pass(Name="Finally", EndState=True),
+		EndState=False,
+		NextState=awssl.Succeed(Name="Done"))
+
+	# Construct state machine from the clone
+	return awssl.StateMachine(
+		Comment="A clone of a TaskWithFinally with several catchers",
+		StartState=task.clone("{}-Clone"))
+
+def clone_limited_parallel():
+	import awssl
+	import awssl.ext
+
+	_set_arns()
+
+	# Construct states
+	parallel = awssl.ext.LimitedParallel(
+		Name="LimitedParallel",
+		Iterations=3,
+		MaxConcurrency=2,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True, OutputPath="$.iteration.Iteration"),
+		BranchRetryList=[awssl.Retrier(ErrorNameList=["States.ALL"])],
+		EndState=False,
+		NextState=awssl.Succeed(Name="Done"))
+
+	# Construct state machine from the clone
+	return awssl.StateMachine(
+		Comment="A clone of a LimitedParallel",
+		StartState=parallel.clone("{}-Clone"))
+
+def long_for_loop():
+	import awssl
+	import awssl.ext
+
+	_set_arns()
+
+	# A sequential For generates a chain of states far longer than the recursion limit
+	s = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=2000,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True))
+
+	sm = awssl.StateMachine(Comment="A long For loop", StartState=s)
+	return len(sm.to_json()["States"]["For"]["Branches"][0]["States"])
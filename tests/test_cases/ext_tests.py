@@ -0,0 +1,231 @@
+def register_tests():
+	return [
+		{
+			"Name": "ForWithDispatcher",
+			"Func": for_with_dispatcher,	
+			"ResultFileName": "./test_results/ext/for_with_dispatcher.json"
+		},
+		{
+			"Name": "LimitedParallelWithDispatcher",
+			"Func": limited_parallel_with_dispatcher,	
+			"ResultFileName": "./test_results/ext/limited_parallel_with_dispatcher.json"
+		},
+		{
+			"Name": "LimitedParallelWithCodec",
+			"Func": limited_parallel_with_codec,	
+			"ResultFileName": "./test_results/ext/limited_parallel_with_codec.json"
+		},
+		{
+			"Name": "ForWithChunkSize",
+			"Func": for_with_chunk_size,	
+			"ResultFileName": "./test_results/ext/for_with_chunk_size.json"
+		},
+		{
+			"Name": "ForWithBreakCondition",
+			"Func": for_with_break_condition,	
+			"ResultFileName": "./test_results/ext/for_with_break_condition.json"
+		},
+		{
+			"Name": "HedgedTask",
+			"Func": hedged_task,	
+			"ResultFileName": "./test_results/ext/hedged_task.json"
+		},
+		{
+			"Name": "RateLimitedParallel",
+			"Func": rate_limited_parallel,	
+			"ResultFileName": "./test_results/ext/rate_limited_parallel.json"
+		},
+		{
+			"Name": "BranchedParallel",
+			"Func": branched_parallel,	
+			"ResultFileName": "./test_results/ext/branched_parallel.json"
+		},
+		{
+			"Name": "ForWithCheckpoint",
+			"Func": for_with_checkpoint,	
+			"ResultFileName": "./test_results/ext/for_with_checkpoint.json"
+		}
+	]
+
+def _set_dispatcher_arn(Codec=None):
+	import awssl.ext
+
+	awssl.ext.set_ext_arns(Dispatcher="arn:aws:lambda:REGION:ACCOUNT_ID:function:DISPATCHER_NAME", Codec=Codec)
+
+def for_with_dispatcher():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	s = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=2,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True, OutputPath="$.iteration.Iteration"),
+		ParallelIteration=True)
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A For loop using the dispatcher",
+		StartState=s)
+
+def limited_parallel_with_dispatcher():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	parallel = awssl.ext.LimitedParallel(
+		Name="LimitedParallel",
+		Iterations=3,
+		MaxConcurrency=2,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True, OutputPath="$.iteration.Iteration"),
+		EndState=True)
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A LimitedParallel using the dispatcher",
+		StartState=parallel)
+
+def limited_parallel_with_codec():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn(Codec="zlib")
+
+	# Construct states
+	parallel = awssl.ext.LimitedParallel(
+		Name="LimitedParallel",
+		Iterations=3,
+		MaxConcurrency=2,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True, OutputPath="$.iteration.Iteration"),
+		EndState=True)
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A LimitedParallel compressing its results",
+		StartState=parallel)
+
+def for_with_chunk_size():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	s = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=5,
+		ChunkSize=2,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True, OutputPath="$.iteration.Iteration"))
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A For loop passing batches of iterator values to each branch",
+		StartState=s)
+
+def for_with_break_condition():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	s = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=3,
+		BreakCondition=awssl.Comparison(Variable="$.Found", Comparator="BooleanEquals", Value=True),
+		BranchState=awssl.Task(Name="Search", EndState=True, ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:SEARCH_NAME"))
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A For loop that stops once the search has succeeded",
+		StartState=s)
+
+def hedged_task():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	s = awssl.ext.HedgedTask(
+		Name="Hedged",
+		EndState=True,
+		ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME",
+		ResultPath="$.result",
+		HedgeDelaySeconds=2,
+		Hedges=2)
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A Task whose invocation is duplicated if it is slow to complete",
+		StartState=s)
+
+def rate_limited_parallel():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	parallel = awssl.ext.RateLimitedParallel(
+		Name="RateLimitedParallel",
+		Iterations=5,
+		Rate=2,
+		Burst=2,
+		BranchState=awssl.Pass(Name="Dummy", EndState=True, OutputPath="$.iteration.Iteration"),
+		EndState=True)
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A RateLimitedParallel starting two branches per second",
+		StartState=parallel)
+
+def branched_parallel():
+	import awssl
+	import awssl.ext
+
+	# Construct states
+	parallel = awssl.ext.BranchedParallel(
+		Name="BranchedParallel",
+		ActivityArn="arn:aws:states:REGION:ACCOUNT_ID:activity:BRANCH_ACTIVITY_NAME",
+		BranchArn="arn:aws:states:REGION:ACCOUNT_ID:stateMachine:BRANCH_NAME",
+		Iterations=2500,
+		ShardSize=1000,
+		EndState=True)
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A BranchedParallel sharding iterations across child executions",
+		StartState=parallel)
+
+def for_with_checkpoint():
+	import awssl
+	import awssl.ext
+
+	_set_dispatcher_arn()
+
+	# Construct states
+	s = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=3,
+		Checkpoint=True,
+		CheckpointKeyPath="$.JobId",
+		RetryList=[awssl.Retrier(ErrorNameList=["States.ALL"], MaxAttempts=2)],
+		BranchState=awssl.Task(Name="Process", EndState=True, ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:PROCESS_NAME"))
+
+	# Construct state machine
+	return awssl.StateMachine(
+		Comment="A For loop that resumes from its last completed iteration when retried",
+		StartState=s)
\ No newline at end of file
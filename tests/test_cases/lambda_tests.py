@@ -0,0 +1,556 @@
+import os
+
+# The helper Lambdas are not part of the awssl package, so are imported from ../lambda
+_LAMBDA_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "lambda"))
+
+def register_tests():
+	return [
+		{
+			"Name": "MonitorTaskAlreadyCompleted",
+			"Func": monitor_task_already_completed,
+			"ResultFileName": "./test_results/lambda/monitor_task_already_completed.json"
+		},
+		{
+			"Name": "ActivityDispatch",
+			"Func": activity_dispatch,
+			"ResultFileName": "./test_results/lambda/activity_dispatch.json"
+		},
+		{
+			"Name": "StatusHandlerEvents",
+			"Func": status_handler_events,
+			"ResultFileName": "./test_results/lambda/status_handler_events.json"
+		},
+		{
+			"Name": "RegistryInMemory",
+			"Func": registry_in_memory,
+			"ResultFileName": "./test_results/lambda/registry_in_memory.json"
+		},
+		{
+			"Name": "RegistryS3",
+			"Func": registry_s3,
+			"ResultFileName": "./test_results/lambda/registry_s3.json"
+		},
+		{
+			"Name": "RegistryDynamoDB",
+			"Func": registry_dynamodb,
+			"ResultFileName": "./test_results/lambda/registry_dynamodb.json"
+		},
+		{
+			"Name": "RegistrySchedule",
+			"Func": registry_schedule,
+			"ResultFileName": "./test_results/lambda/registry_schedule.json"
+		},
+		{
+			"Name": "ValidateExistenceCache",
+			"Func": validate_existence_cache,
+			"ResultFileName": "./test_results/lambda/validate_existence_cache.json"
+		},
+		{
+			"Name": "LaunchRecordFailures",
+			"Func": launch_record_failures,
+			"ResultFileName": "./test_results/lambda/launch_record_failures.json"
+		}
+	]
+
+def _import_lambda(name):
+	import importlib
+	import sys
+
+	if _LAMBDA_DIRECTORY not in sys.path:
+		sys.path.insert(0, _LAMBDA_DIRECTORY)
+	return importlib.import_module(name)
+
+def monitor_task_already_completed():
+	import boto3
+	from botocore.stub import Stubber
+	from datetime import datetime
+	from json import dumps
+
+	aws_clients = _import_lambda("aws_clients")
+	registry_module = _import_lambda("active_execution_registry")
+	monitor = _import_lambda("monitor_for_branched_completion")
+
+	def record(name, heartbeat_due):
+		# Only the status check is due, unless the heartbeat is requested
+		return {
+			"ExecutionArn": "arn:aws:states:REGION:ACCOUNT_ID:execution:Child:{}".format(name),
+			"TaskToken": "Token-{}".format(name),
+			"Name": name,
+			"NextHeartbeat": 0 if heartbeat_due else 1e12,
+			"NextStatusCheck": 1e12 if heartbeat_due else 0,
+			"NextCheck": 0
+		}
+
+	def execution(r, status):
+		return {
+			"executionArn": r["ExecutionArn"],
+			"stateMachineArn": "arn:aws:states:REGION:ACCOUNT_ID:stateMachine:Child",
+			"status": status,
+			"startDate": datetime(2017, 1, 1),
+			"output": "{{\"Name\": \"{}\"}}".format(r["Name"])
+		}
+
+	succeeded = record("Succeeded", False)
+	failed = record("Failed", False)
+	heartbeat = record("Heartbeat", True)
+	throttled = record("Throttled", False)
+
+	client = boto3.client("stepfunctions", region_name="us-east-1")
+	stubber = Stubber(client)
+	# Completed by the status handler between describe_execution and send_task_success
+	stubber.add_response("describe_execution", execution(succeeded, "SUCCEEDED"), { "executionArn": succeeded["ExecutionArn"] })
+	stubber.add_client_error("send_task_success", service_error_code="TaskDoesNotExist")
+	stubber.add_response("describe_execution", execution(failed, "FAILED"), { "executionArn": failed["ExecutionArn"] })
+	stubber.add_client_error("send_task_failure", service_error_code="TaskTimedOut")
+	# The parent Task has already completed, so its token is no longer valid
+	stubber.add_client_error("send_task_heartbeat", service_error_code="InvalidToken")
+	# Other errors leave the record in place, to be retried by the next sweep
+	stubber.add_response("describe_execution", execution(throttled, "SUCCEEDED"), { "executionArn": throttled["ExecutionArn"] })
+	stubber.add_client_error("send_task_success", service_error_code="ThrottlingException")
+
+	registry = registry_module.InMemoryRegistry()
+	monitor._REGISTRY = registry
+	aws_clients.set_client("stepfunctions", client)
+	try:
+		with stubber:
+			for r in [ succeeded, failed, heartbeat, throttled ]:
+				registry.put(r)
+				monitor.process_active_execution(registry.get(r["ExecutionArn"]))
+			stubber.assert_no_pending_responses()
+	finally:
+		aws_clients.reset_clients()
+		monitor._REGISTRY = None
+
+	return dumps({
+		"Active": sorted([ r["Name"] for r in registry.due(1e13) ]),
+		"Archived": sorted([ (r["Name"], r["Status"]) for r in registry.archived.values() ])
+	}, sort_keys=True)
+
+def activity_dispatch():
+	from json import dumps
+
+	aws_clients = _import_lambda("aws_clients")
+	monitor = _import_lambda("monitor_branch_activity")
+
+	class PublishClient(object):
+		"""
+		SNS client without PublishBatch, as bundled with older Lambda runtimes.  Fails the messages in failing
+		"""
+
+		def __init__(self, failing):
+			self.calls = []
+			self._failing = failing
+
+		def publish(self, TopicArn, Message):
+			self.calls.append(("Publish", Message[:1]))
+			if Message in self._failing:
+				raise Exception("Publish failed")
+
+	class BatchClient(PublishClient):
+		"""
+		SNS client with PublishBatch, which reports the messages in rejected as failed entries
+		"""
+
+		def __init__(self, failing, rejected):
+			super(BatchClient, self).__init__(failing)
+			self._rejected = rejected
+
+		def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+			self.calls.append(("PublishBatch", "".join(sorted(e["Message"][:1] for e in PublishBatchRequestEntries))))
+			if sum(len(e["Message"]) for e in PublishBatchRequestEntries) > monitor._PUBLISH_BATCH_BYTES:
+				raise Exception("Batch too large")
+			return {
+				"Successful": [ { "Id": e["Id"] } for e in PublishBatchRequestEntries if e["Message"] not in self._rejected ],
+				"Failed": [ { "Id": e["Id"], "Code": "InternalError" } for e in PublishBatchRequestEntries if e["Message"] in self._rejected ]
+			}
+
+	# Messages are identified by their first character; C and D together exceed the PublishBatch size limit
+	tasks = [ ("Token-A", "A"), ("Token-B", "B"), ("Token-C", "C" * 150000), ("Token-D", "D" * 150000), ("Token-E", "E") ]
+
+	results = []
+	for client in [ PublishClient(failing=[ "B" ]), BatchClient(failing=[ "E" ], rejected=[ "A", "E" ]) ]:
+		aws_clients.set_client("sns", client)
+		try:
+			undispatched = monitor.dispatch_tasks(tasks)
+		finally:
+			aws_clients.reset_clients()
+		results.append({ "Calls": client.calls, "Undispatched": [ task[0] for task in undispatched ] })
+	return dumps(results, sort_keys=True)
+
+def status_handler_events():
+	import boto3
+	from botocore.stub import Stubber
+	from datetime import datetime
+	from json import dumps
+
+	registry_module = _import_lambda("active_execution_registry")
+	handler = _import_lambda("branched_execution_status_handler")
+
+	def record(name):
+		return {
+			"ExecutionArn": "arn:aws:states:REGION:ACCOUNT_ID:execution:Child:{}".format(name),
+			"TaskToken": "Token-{}".format(name),
+			"Name": name,
+			"NextHeartbeat": 1e12,
+			"NextStatusCheck": 1e12,
+			"NextCheck": 1e12
+		}
+
+	def event(r, status, **fields):
+		detail = dict(fields, executionArn=r["ExecutionArn"], status=status)
+		return { "detail-type": "Step Functions Execution Status Change", "detail": detail }
+
+	succeeded = record("Succeeded")
+	failed = record("Failed")
+	throttled = record("Throttled")
+
+	client = boto3.client("stepfunctions", region_name="us-east-1")
+	stubber = Stubber(client)
+	stubber.add_response("send_task_success", {}, { "taskToken": succeeded["TaskToken"], "output": "{\"Name\": \"Succeeded\"}" })
+	# Outputs omitted from the event are read from the execution
+	stubber.add_response(
+		"describe_execution",
+		{
+			"executionArn": failed["ExecutionArn"],
+			"stateMachineArn": "arn:aws:states:REGION:ACCOUNT_ID:stateMachine:Child",
+			"status": "FAILED",
+			"startDate": datetime(2017, 1, 1)
+		},
+		{ "executionArn": failed["ExecutionArn"] })
+	stubber.add_response("send_task_failure", {}, {
+		"taskToken": failed["TaskToken"],
+		"error": "Processing error",
+		"cause": dumps({ "Status": "FAILED", "Error": "States.TaskFailed", "Cause": "Work failed" })
+	})
+	# Errors other than the Task being closed leave the record in place, for the event to be retried
+	stubber.add_client_error("send_task_success", service_error_code="ThrottlingException")
+
+	registry = registry_module.InMemoryRegistry()
+	results = []
+	with stubber:
+		for r, e in [
+			(succeeded, event(succeeded, "SUCCEEDED", output="{\"Name\": \"Succeeded\"}")),
+			(failed, event(failed, "FAILED", error="States.TaskFailed", cause="Work failed")),
+			(throttled, event(throttled, "SUCCEEDED", output="{}"))]:
+			registry.put(r)
+			try:
+				results.append((r["Name"], handler.process_event(e, registry, client)))
+			except Exception as ex:
+				results.append((r["Name"], ex.response["Error"]["Code"]))
+		stubber.assert_no_pending_responses()
+
+	return dumps({
+		"Results": results,
+		"Active": sorted([ r["Name"] for r in registry.due(1e13) ]),
+		"Archived": sorted([ (r["Name"], r["Status"]) for r in registry.archived.values() ])
+	}, sort_keys=True)
+
+def _registry_record(name, next_check):
+	return {
+		"ExecutionArn": "arn:aws:states:REGION:ACCOUNT_ID:execution:Child:{}".format(name),
+		"TaskToken": "Token-{}".format(name),
+		"Name": name,
+		"NextCheck": next_check
+	}
+
+def registry_in_memory():
+	from json import dumps
+
+	registry_module = _import_lambda("active_execution_registry")
+
+	def names(records):
+		return [ r["Name"] for r in records ]
+
+	registry = registry_module.InMemoryRegistry()
+	registry.put(_registry_record("A", 100.5))
+	failures = registry.put_many([
+		_registry_record("B", 100.2),
+		_registry_record("C", 102.0),
+		_registry_record("D", 200.0),
+		{ "Name": "NoArn" }
+	])
+	results = {
+		"PutManyFailures": [ r["Name"] for r, _ in failures ],
+		# Earliest first, within and across buckets, including part of the current bucket
+		"Due": names(registry.due(now=102.0)),
+		"DueLimited": names(registry.due(now=1000.0, limit=2)),
+		"DuePartialBucket": names(registry.due(now=100.3))
+	}
+
+	# Rescheduled and archived records leave empty buckets, which are dropped by the next due()
+	registry.reschedule(registry.get(_registry_record("A", 0)["ExecutionArn"]), 300.0)
+	registry.archive(registry.get(_registry_record("B", 0)["ExecutionArn"]))
+	results["DueAfterArchive"] = names(registry.due(now=1000.0))
+	results["Buckets"] = sorted(registry._bucket_heap)
+	results["Archived"] = sorted([ r["Name"] for r in registry.archived.values() ])
+	return dumps(results, sort_keys=True)
+
+def registry_s3():
+	import boto3
+	from botocore.response import StreamingBody
+	from botocore.stub import ANY, Stubber
+	from io import BytesIO
+	from json import dumps
+
+	registry_module = _import_lambda("active_execution_registry")
+
+	a = _registry_record("A", 100.0)
+	b = _registry_record("B", 200.0)
+
+	def put(key):
+		return ("put_object", {}, { "Bucket": "Bucket", "Key": key, "Body": ANY, "ContentType": "application/json" })
+
+	def delete(key):
+		return ("delete_object", {}, { "Bucket": "Bucket", "Key": key })
+
+	def get(key, record):
+		body = dumps(record).encode("utf-8")
+		return ("get_object", { "Body": StreamingBody(BytesIO(body), len(body)) }, { "Bucket": "Bucket", "Key": key })
+
+	def listing(keys):
+		return ("list_objects_v2", { "Contents": [ { "Key": k } for k in keys ], "IsTruncated": False }, { "Bucket": "Bucket", "Prefix": "Due/" })
+
+	calls = [
+		put("Active/" + a["ExecutionArn"]),
+		put("Due/000000000000100/" + a["ExecutionArn"]),
+		put("Active/" + b["ExecutionArn"]),
+		put("Due/000000000000200/" + b["ExecutionArn"]),
+		# Rescheduling moves the Due/ copy of the record
+		put("Active/" + a["ExecutionArn"]),
+		put("Due/000000000000300/" + a["ExecutionArn"]),
+		delete("Due/000000000000100/" + a["ExecutionArn"]),
+		# Listing stops at the first key that is not yet due, so A is not read
+		listing([ "Due/000000000000200/" + b["ExecutionArn"], "Due/000000000000300/" + a["ExecutionArn"] ]),
+		get("Due/000000000000200/" + b["ExecutionArn"], b),
+		put("Archive/" + b["ExecutionArn"]),
+		delete("Due/000000000000200/" + b["ExecutionArn"]),
+		delete("Active/" + b["ExecutionArn"])
+	]
+
+	client = boto3.client("s3", region_name="us-east-1")
+	stubber = Stubber(client)
+	for method, response, params in calls:
+		stubber.add_response(method, response, params)
+
+	registry = registry_module.S3Registry("Bucket", s3_client=client)
+	with stubber:
+		registry.put(a)
+		failures = registry.put_many([ b ])
+		registry.reschedule(a, 300.0)
+		due = registry.due(now=250.0)
+		registry.archive(due[0])
+		stubber.assert_no_pending_responses()
+
+	# The calls made are checked by the Stubber
+	return dumps({
+		"PutManyFailures": len(failures),
+		"Due": [ r["Name"] for r in due ]
+	}, sort_keys=True)
+
+def registry_dynamodb():
+	import boto3
+	from botocore.stub import ANY, Stubber
+	from json import dumps
+
+	registry_module = _import_lambda("active_execution_registry")
+
+	def key(record):
+		return { "ExecutionArn": { "S": record["ExecutionArn"] } }
+
+	def item(record):
+		return { "ExecutionArn": { "S": record["ExecutionArn"] }, "Shard": { "S": "Active" }, "NextCheck": { "N": repr(record["NextCheck"]) }, "Record": { "S": dumps(record) } }
+
+	a = _registry_record("A", 100.0)
+	b = _registry_record("B", 200.0)
+	c = _registry_record("C", 300.0)
+
+	client = boto3.client("dynamodb", region_name="us-east-1")
+	stubber = Stubber(client)
+	stubber.add_response("put_item", {}, { "TableName": "Table", "Item": ANY })
+	# Unprocessed items are retried, and only those items
+	stubber.add_response(
+		"batch_write_item",
+		{ "UnprocessedItems": { "Table": [ { "PutRequest": { "Item": item(c) } } ] } },
+		{ "RequestItems": { "Table": [ { "PutRequest": { "Item": ANY } }, { "PutRequest": { "Item": ANY } } ] } })
+	stubber.add_response("batch_write_item", {}, { "RequestItems": { "Table": [ { "PutRequest": { "Item": ANY } } ] } })
+	stubber.add_response(
+		"query",
+		{ "Items": [ item(a), item(b) ], "LastEvaluatedKey": dict(key(b), Shard={ "S": "Active" }, NextCheck={ "N": "200.0" }) },
+		{
+			"TableName": "Table",
+			"IndexName": "NextCheck",
+			"KeyConditionExpression": "Shard = :shard AND NextCheck <= :now",
+			"ExpressionAttributeValues": { ":shard": { "S": "Active" }, ":now": { "N": "250.0" } },
+			"Limit": 2
+		})
+	stubber.add_response("delete_item", {}, { "TableName": "Table", "Key": key(a) })
+
+	registry = registry_module.DynamoDBRegistry("Table", dynamodb_client=client)
+	with stubber:
+		registry.put(a)
+		failures = registry.put_many([ b, c ])
+		due = registry.due(now=250.0, limit=2)
+		registry.archive(due[0])
+		stubber.assert_no_pending_responses()
+
+	return dumps({
+		"PutManyFailures": len(failures),
+		"Due": [ r["Name"] for r in due ]
+	}, sort_keys=True)
+
+def registry_schedule():
+	from json import dumps
+
+	registry_module = _import_lambda("active_execution_registry")
+
+	def heartbeat_interval(heartbeat_seconds):
+		return registry_module.schedule_new(_registry_record("A", None), now=0, heartbeat_seconds=heartbeat_seconds)["HeartbeatInterval"]
+
+	# Status checks double from 5s to 300s while the execution runs, whilst heartbeats keep their interval
+	record = registry_module.schedule_new(_registry_record("A", None), now=0, heartbeat_seconds=60)
+	checks = [ 0 ]
+	heartbeats = []
+	while len(checks) < 10:
+		now = record["NextCheck"]
+		status_checked = registry_module.status_check_due(record, now)
+		heartbeat_sent = registry_module.heartbeat_due(record, now)
+		record = registry_module.schedule_next(record, now, heartbeat_sent=heartbeat_sent, status_checked=status_checked)
+		if status_checked:
+			checks.append(now)
+		if heartbeat_sent:
+			heartbeats.append(now)
+
+	return dumps({
+		# Unknown HeartbeatSeconds, and Task HeartbeatSeconds shorter and longer than two sweeps
+		"HeartbeatIntervals": [ heartbeat_interval(h) for h in [ None, 4, 60 ] ],
+		# Records registered before the schedule was held are heartbeated on every sweep
+		"LegacyHeartbeatInterval": registry_module.schedule_next(_registry_record("A", 0), 0)["HeartbeatInterval"],
+		"StatusCheckIntervals": [ checks[i + 1] - checks[i] for i in range(len(checks) - 1) ],
+		"HeartbeatGaps": sorted(set([ heartbeats[i + 1] - heartbeats[i] for i in range(len(heartbeats) - 1) ]))
+	}, sort_keys=True)
+
+def validate_existence_cache():
+	import boto3
+	from botocore.stub import Stubber
+	from datetime import datetime
+	from json import dumps
+
+	aws_clients = _import_lambda("aws_clients")
+	validate = _import_lambda("validate_state_machine_existence")
+
+	existing = "arn:aws:states:REGION:ACCOUNT_ID:stateMachine:Existing"
+	missing = "arn:aws:states:REGION:ACCOUNT_ID:stateMachine:Missing"
+
+	client = boto3.client("stepfunctions", region_name="us-east-1")
+	stubber = Stubber(client)
+	def describe(arn):
+		if arn == existing:
+			stubber.add_response(
+				"describe_state_machine",
+				{
+					"stateMachineArn": arn,
+					"name": "Existing",
+					"definition": "{}",
+					"roleArn": "arn:aws:iam::ACCOUNT_ID:role/Role",
+					"type": "STANDARD",
+					"creationDate": datetime(2017, 1, 1)
+				},
+				{ "stateMachineArn": arn })
+		else:
+			stubber.add_client_error("describe_state_machine", service_error_code="StateMachineDoesNotExist", expected_params={ "stateMachineArn": arn })
+
+	# Existing is cached for 300s, and Missing for 30s, so Step Functions is called at 0 and 300, and at 0 and 30
+	checks = [ (existing, 0), (existing, 299), (existing, 300), (missing, 0), (missing, 29), (missing, 30) ]
+	for arn in [ existing, existing, missing, missing ]:
+		describe(arn)
+	# Each ARN of a bulk request is described once, and all the missing ARNs are reported together
+	describe(existing)
+	describe(missing)
+
+	validate.clear_cache()
+	aws_clients.set_client("stepfunctions", client)
+	try:
+		with stubber:
+			results = [ (arn.split(":")[-1], now, validate.state_machine_exists(arn, now)) for arn, now in checks ]
+			try:
+				validate.check_all_existence([ existing, missing, existing ], now=1000)
+				bulk = None
+			except Exception as e:
+				bulk = str(e)
+			stubber.assert_no_pending_responses()
+	finally:
+		aws_clients.reset_clients()
+		validate.clear_cache()
+
+	# The calls made are checked by the Stubber
+	return dumps({ "Checks": results, "BulkError": bulk }, sort_keys=True)
+
+def launch_record_failures():
+	import boto3
+	from botocore.stub import ANY, Stubber
+	from datetime import datetime
+	from json import dumps
+
+	aws_clients = _import_lambda("aws_clients")
+	registry_module = _import_lambda("active_execution_registry")
+	launcher = _import_lambda("launch_branched_state_machine")
+
+	branch_arn = "arn:aws:states:REGION:ACCOUNT_ID:stateMachine:Child"
+
+	def record(name, branch=True):
+		input_data = { "Name": name }
+		if branch:
+			input_data["BranchArn"] = branch_arn
+		message = { "TaskToken": "Token-{}".format(name), "ActivityArn": "arn:aws:states:REGION:ACCOUNT_ID:activity:Branch", "InputData": input_data }
+		return { "Sns": { "Message": dumps(message) } }
+
+	def execution_arn(name):
+		return "arn:aws:states:REGION:ACCOUNT_ID:execution:Child:{}".format(name)
+
+	class FailingRegistry(registry_module.InMemoryRegistry):
+		"""
+		Registry that cannot save the record of the Unregistered execution
+		"""
+
+		def put(self, record, previous=None):
+			if record["ExecutionArn"] == execution_arn("Unregistered"):
+				raise Exception("Registry unavailable")
+			return super(FailingRegistry, self).put(record, previous)
+
+	records = [ {}, record("NoBranch", branch=False), record("NotStarted"), record("Unregistered"), record("Launched") ]
+
+	client = boto3.client("stepfunctions", region_name="us-east-1")
+	stubber = Stubber(client)
+	# Executions are started in record order
+	stubber.add_client_error("start_execution", service_error_code="StateMachineDoesNotExist")
+	for name in [ "Unregistered", "Launched" ]:
+		stubber.add_response(
+			"start_execution",
+			{ "executionArn": execution_arn(name), "startDate": datetime(2017, 1, 1) },
+			{ "stateMachineArn": branch_arn, "name": ANY, "input": dumps({ "Name": name }) })
+	# The parent Tasks of the records that could not be launched are failed, unless the record has no TaskToken
+	for name in [ "NoBranch", "NotStarted" ]:
+		stubber.add_response("send_task_failure", {}, { "taskToken": "Token-{}".format(name), "error": "Launch error", "cause": ANY })
+	# An execution that could not be registered is stopped before its parent Task is failed
+	stubber.add_response("stop_execution", { "stopDate": datetime(2017, 1, 1) }, { "executionArn": execution_arn("Unregistered"), "error": "Launch error", "cause": ANY })
+	stubber.add_client_error("send_task_failure", service_error_code="TaskTimedOut")
+
+	registry = FailingRegistry()
+	launcher._REGISTRY = registry
+	max_workers = launcher._MAX_WORKERS
+	# A single worker launches the records in order, as the Stubber expects
+	launcher._MAX_WORKERS = 1
+	aws_clients.set_client("stepfunctions", client)
+	try:
+		with stubber:
+			results = launcher.process_records(records)
+			stubber.assert_no_pending_responses()
+	finally:
+		aws_clients.reset_clients()
+		launcher._REGISTRY = None
+		launcher._MAX_WORKERS = max_workers
+
+	return dumps({
+		"Results": results,
+		"Registered": [ r["ExecutionArn"] for r in registry.due(1e13) ]
+	}, sort_keys=True)
@@ -0,0 +1,267 @@
+def register_tests():
+	return [
+		{
+			"Name": "ChoiceBatch",
+			"Func": choice_batch,
+			"ResultFileName": "./test_results/tools/choice_batch.json"
+		},
+		{
+			"Name": "RetrySimulation",
+			"Func": retry_simulation,
+			"ResultFileName": "./test_results/tools/retry_simulation.json"
+		},
+		{
+			"Name": "HistoryEstimate",
+			"Func": history_estimate,
+			"ResultFileName": "./test_results/tools/history_estimate.json"
+		},
+		{
+			"Name": "OptimizeIdentity",
+			"Func": optimize_identity,
+			"ResultFileName": "./test_results/tools/optimize_identity.json"
+		},
+		{
+			"Name": "OptimizeOutputPath",
+			"Func": optimize_output_path,
+			"ResultFileName": "./test_results/tools/optimize_output_path.json"
+		},
+		{
+			"Name": "OptimizeInputPath",
+			"Func": optimize_input_path,
+			"ResultFileName": "./test_results/tools/optimize_input_path.json"
+		},
+		{
+			"Name": "OptimizeFail",
+			"Func": optimize_fail,
+			"ResultFileName": "./test_results/tools/optimize_fail.json"
+		},
+		{
+			"Name": "OptimizeCatch",
+			"Func": optimize_catch,
+			"ResultFileName": "./test_results/tools/optimize_catch.json"
+		},
+		{
+			"Name": "PartitionLongForLoop",
+			"Func": partition_long_for_loop,
+			"ResultFileName": "./test_results/tools/partition_long_for_loop.json"
+		}
+	]
+
+def choice_batch():
+	import awssl
+	import awssl.tools
+	from json import dumps
+
+	# Construct states
+	default = awssl.Fail(Name="Default", ErrorCause="No Matches!")
+	first = awssl.Pass(Name="First", EndState=True)
+	second = awssl.Pass(Name="Second", EndState=True)
+	third = awssl.Pass(Name="Third", EndState=True)
+
+	choice = awssl.Choice(
+		Name="ChoiceState",
+		ChoiceList=[
+			awssl.ChoiceRule(
+				Comparison=awssl.Comparison(Variable="$.foo", Comparator="NumericGreaterThanEquals", Value=10),
+				NextState=first),
+			awssl.AndChoiceRule(
+				ComparisonList=[
+					awssl.Comparison(Variable="$.bar", Comparator="StringEquals", Value="x"),
+					awssl.Comparison(Variable="$.when", Comparator="TimestampLessThan", Value="2017-01-01T00:00:00Z")],
+				NextState=second),
+			awssl.OrChoiceRule(
+				ComparisonList=[
+					awssl.Comparison(Variable="$.on", Comparator="BooleanEquals", Value=True),
+					awssl.Comparison(Variable="$.foo", Comparator="NumericLessThan", Value=-0.5)],
+				NextState=third),
+			awssl.NotChoiceRule(
+				Comparison=awssl.Comparison(Variable="$.bar", Comparator="StringEquals", Value="x"),
+				NextState=first)],
+		Default=default)
+
+	# Mixed types in the object columns never match a Comparator of another type
+	columns = {
+		"$.foo": [ 10, 5, 5, -1, 5, "10", True, 5 ],
+		"$.bar": [ "x", "x", "x", "x", "y", "x", "x", None ],
+		"$.when": [ "2016-12-31T23:00:00Z", "2016-12-31T23:00:00-02:00", "2017-01-01T00:00:00Z", "bad", "2016-01-01T00:00:00Z", "2016-01-01T00:00:00Z", "2018-01-01T00:00:00Z", None ],
+		"$.on": [ False, False, False, False, False, False, True, "true" ]
+	}
+	result = awssl.tools.evaluate_choice_batch(ChoiceState=choice, Columns=columns, ReturnMasks=True)
+	result["Masks"] = dict([ (name, [ bool(m) for m in mask ]) for name, mask in result["Masks"].items() ])
+
+	# Without a Default, unmatched inputs raise States.NoChoiceMatched
+	no_default = awssl.Choice(Name="NoDefault", ChoiceList=choice.get_choice_list()[:3])
+	return dumps([ result, awssl.tools.evaluate_choice_batch(ChoiceState=no_default, Columns=columns) ], sort_keys=True)
+
+def retry_simulation():
+	import awssl
+	import awssl.tools
+	from json import dumps
+
+	resource = "arn:aws:lambda:REGION:ACCOUNT_ID:function:FUNCTION_NAME"
+
+	def machine(catch):
+		fallback = awssl.Pass(Name="Fallback", EndState=True)
+		work = awssl.Task(
+			Name="Work",
+			EndState=True,
+			ResourceArn=resource,
+			RetryList=[awssl.Retrier(ErrorNameList=["States.ALL"], IntervalSeconds=1, MaxAttempts=2, BackoffRate=2.0)],
+			CatcherList=[awssl.Catcher(ErrorNameList=["States.ALL"], NextState=fallback)] if catch else None)
+		return awssl.StateMachine(Comment="Retry", StartState=work)
+
+	def simulate(sm, probability):
+		result = awssl.tools.simulate_retries(
+			Definition=sm,
+			Trials=20000,
+			FailureProbabilities={ resource: { "Lambda.ServiceException": probability } },
+			Latencies={ resource: 0.5 },
+			Seed=42)
+		summary = result["Summary"]
+		return {
+			"Errors": result["Errors"],
+			"ResourceInvocations": result["ResourceInvocations"],
+			"FailureRate": round(summary["FailureRate"], 4),
+			"Invocations": dict([ (k, round(v, 4)) for k, v in summary["Invocations"].items() ]),
+			"Duration": dict([ (k, round(v, 4)) for k, v in summary["Duration"].items() ])
+		}
+
+	# Three attempts at P=0.5 fail with probability 0.125; every attempt failing is always caught
+	return dumps([ simulate(machine(False), 0.5), simulate(machine(True), 1.0) ], sort_keys=True)
+
+def history_estimate():
+	import awssl
+	import awssl.ext
+	import awssl.tools
+	from json import dumps
+
+	awssl.ext.set_ext_arns(Dispatcher="arn:aws:lambda:REGION:ACCOUNT_ID:function:DISPATCHER_NAME")
+
+	# Construct states
+	retry = [awssl.Retrier(ErrorNameList=["States.ALL"], MaxAttempts=2)]
+	failed = awssl.Fail(Name="Failed", ErrorCause="Setup failed")
+	f = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=10,
+		BranchState=awssl.Task(Name="Work", EndState=True, ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:WORK", RetryList=retry))
+	setup = awssl.Task(
+		Name="Setup",
+		EndState=False,
+		NextState=f,
+		ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:SETUP",
+		CatcherList=[awssl.Catcher(ErrorNameList=["States.ALL"], NextState=failed)])
+
+	# Construct state machine
+	sm = awssl.StateMachine(Comment="A For loop of retried Tasks", StartState=setup)
+
+	def estimate(probability):
+		result = awssl.tools.estimate_history_events(Definition=sm, FailureProbability=probability)
+		for r in [ result ] + result["ExtStates"]:
+			r["Expected"] = round(r["Expected"], 4)
+		return result
+
+	return dumps([ estimate(0.0), estimate(0.1) ], sort_keys=True)
+
+def _optimize(states, start_at):
+	import awssl.tools
+	from json import dumps
+
+	result = awssl.tools.optimize_state_machine(Definition={ "StartAt": start_at, "States": states })
+	return dumps(result, sort_keys=True)
+
+def optimize_identity():
+	# Identity Pass states are removed, whether followed by another state or ending the branch
+	return _optimize({
+		"Start": { "Type": "Task", "Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:START", "Next": "Identity" },
+		"Identity": { "Type": "Pass", "Next": "Work" },
+		"Work": { "Type": "Task", "Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:WORK", "Next": "Done" },
+		"Done": { "Type": "Pass", "InputPath": "$", "OutputPath": "$", "End": True }
+	}, "Start")
+
+def optimize_output_path():
+	# The filter is absorbed into the OutputPath of the only state that transitions to it
+	return _optimize({
+		"Start": { "Type": "Task", "Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:START", "OutputPath": "$.result", "Next": "Filter" },
+		"Filter": { "Type": "Pass", "InputPath": "$.[0]", "Next": "Work" },
+		"Work": { "Type": "Task", "Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:WORK", "End": True }
+	}, "Start")
+
+def optimize_input_path():
+	# The filter starts the branch, so can only be absorbed into the InputPath of its successor
+	return _optimize({
+		"Filter": { "Type": "Pass", "InputPath": "$.payload", "OutputPath": "$.[1]", "Next": "Work" },
+		"Work": {
+			"Type": "Task",
+			"Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:WORK",
+			"InputPath": "$.items",
+			"Catch": [ { "ErrorEquals": [ "States.ALL" ], "Next": "Failed" } ],
+			"End": True
+		},
+		"Failed": { "Type": "Fail", "Error": "WorkFailed" }
+	}, "Filter")
+
+def optimize_fail():
+	# The input of a Fail state is discarded, so a filter ahead of it is removed whatever its path
+	return _optimize({
+		"Start": {
+			"Type": "Task",
+			"Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:START",
+			"Catch": [ { "ErrorEquals": [ "States.ALL" ], "Next": "Filter" } ],
+			"End": True
+		},
+		"Filter": { "Type": "Pass", "InputPath": "$.Cause", "Next": "Failed" },
+		"Failed": { "Type": "Fail", "Error": "StartFailed" }
+	}, "Start")
+
+def optimize_catch():
+	# A Catcher with a ResultPath other than "$" adds the error to the unfiltered input, so the filter must remain
+	return _optimize({
+		"Filter": { "Type": "Pass", "InputPath": "$.payload", "Next": "Work" },
+		"Work": {
+			"Type": "Task",
+			"Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:WORK",
+			"Catch": [ { "ErrorEquals": [ "States.ALL" ], "ResultPath": "$.error", "Next": "Recover" } ],
+			"End": True
+		},
+		"Recover": { "Type": "Task", "Resource": "arn:aws:lambda:REGION:ACCOUNT_ID:function:RECOVER", "End": True }
+	}, "Filter")
+
+def partition_long_for_loop():
+	import awssl
+	import awssl.ext
+	import awssl.tools
+	from json import dumps
+
+	awssl.ext.set_ext_arns(Dispatcher="arn:aws:lambda:REGION:ACCOUNT_ID:function:DISPATCHER_NAME")
+
+	# Construct states
+	f = awssl.ext.For(
+		Name="For",
+		EndState=True,
+		From=0,
+		To=300,
+		BranchState=awssl.Task(Name="Work", EndState=True, ResourceArn="arn:aws:lambda:REGION:ACCOUNT_ID:function:WORK"))
+
+	# Construct state machine
+	sm = awssl.StateMachine(Comment="A long sequential For loop", StartState=f)
+
+	def count_states(branch):
+		return sum([ 1 + sum([ count_states(b) for b in state.get("Branches", []) ]) for state in branch["States"].values() ])
+
+	def size(definition):
+		return len(dumps(definition, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+
+	result = awssl.tools.partition_state_machine(Definition=sm, MaxBytes=100000, MaxStates=400, Name="Loop")
+	manifest = result["Manifest"]
+	position = dict([ (name, i) for i, name in enumerate(manifest["DeploymentOrder"]) ])
+	return dumps({
+		"Hops": manifest["Hops"],
+		"DeploymentOrder": manifest["DeploymentOrder"],
+		# Measured independently of the partitioner
+		"WithinLimits": dict([ (name, size(d) <= 100000 and count_states(d) <= 400) for name, d in result["Definitions"].items() ]),
+		"ChildrenDeployedFirst": all([ position[m["Parent"]] > position[name] for name, m in manifest["StateMachines"].items() if m["Parent"] ]),
+		"StateMachines": dict([ (name, { "Parent": m["Parent"], "StateCount": m["StateCount"], "Task": m["States"][0] if m["States"] else None })
+			for name, m in manifest["StateMachines"].items() ])
+	}, sort_keys=True)